@@ -4,5 +4,5 @@ The Lepton AI python library.
 """
 
 # Client is the main class that we want to expose.
-from .client import Client
+from .client import Client, AsyncClient
 from ._version import __version__
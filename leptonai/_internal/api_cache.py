@@ -0,0 +1,300 @@
+"""
+Client side cache of the GET responses of leptonai.api.v2.APIClient. DO NOT USE
+THE PRIVATE CLASSES DIRECTLY. The only public class is APICache, which is exposed
+as leptonai.api.v2.APICache.
+
+The cache is an adapter of the requests session of the client, on top of its
+retrying adapter:
+
+- A response is fresh for the ttl of its endpoint, and served without a round
+  trip while it is fresh.
+- A stale response with an ETag or Last-Modified validator is revalidated with a
+  conditional request, and a 304 Not Modified refreshes it without transferring
+  the body again.
+- Any other call to a resource, such as POST /deployments or DELETE
+  /deployments/foo, drops the cached responses of that resource, which is the
+  first segment of the path ("deployments").
+
+Streamed calls, such as file downloads and logs, are never cached. Responses are
+scoped to the workspace and the url of the client, and to its auth token. On
+disk, they are only readable by the user.
+"""
+
+from collections import OrderedDict
+import hashlib
+import io
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlsplit
+
+from requests import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from leptonai import config
+from leptonai._internal.api_transport import _RetryAdapter
+from leptonai._internal.client_cache import (
+    _CacheEntry,
+    _HOP_BY_HOP_HEADERS,
+    _parse_cache_control,
+)
+from leptonai._internal.client_transport import RetryPolicy
+
+
+class APICache(object):
+    """
+    An opt-in cache of the GET responses of an APIClient, to be passed to it as
+    `APIClient(..., cache=APICache(...))`, for read-mostly endpoints that are
+    called repeatedly, such as the list of node groups. A cache is thread safe.
+
+    Args:
+        ttl (float, optional): For how many seconds the responses of endpoints not
+            in ttls are fresh. If None, they are not cached at all. Defaults to 0,
+            in which case the responses are only stored if they carry an ETag or
+            Last-Modified validator, and are revalidated on every call.
+        ttls (Dict[str, float], optional): The ttl of individual endpoints, keyed
+            by their path in the api, e.g. {"/dedicated-node-groups": 60,
+            "/shapes": 300}. The query is not part of the path. Defaults to None.
+        persist (bool, optional): Whether responses are also written to disk under
+            the lepton cache directory, so that later processes, such as the
+            next CLI command, reuse them. Defaults to False.
+        memory_only (Iterable[str], optional): The endpoints whose responses are
+            never written to disk, even if persist is True, such as the ones that
+            return secrets. Keyed like ttls, and an endpoint also covers the
+            paths under it, e.g. "/usersecrets" covers "/usersecrets/foo".
+            Defaults to None.
+        max_entries (int, optional): The maximum number of responses kept in
+            memory. Defaults to 256.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 0,
+        ttls: Optional[Dict[str, float]] = None,
+        persist: bool = False,
+        memory_only: Optional[Iterable[str]] = None,
+        max_entries: int = 256,
+    ):
+        self.ttl = ttl
+        self.ttls = {"/" + p.strip("/"): t for p, t in (ttls or {}).items()}
+        self.persist = persist
+        self.memory_only = tuple("/" + p.strip("/") for p in (memory_only or ()))
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "invalidations": 0,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit, miss, revalidation (304), store and invalidation counters
+        of the cache, and the number of responses kept in memory.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        return stats
+
+    def clear(self) -> None:
+        """
+        Drops all the cached responses, including the ones on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+        shutil.rmtree(self._disk_root(), ignore_errors=True)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _ttl(self, path: str) -> Optional[float]:
+        return self.ttls.get(path, self.ttl)
+
+    def _persists(self, path: str) -> bool:
+        return self.persist and not any(
+            path == p or path.startswith(p + "/") for p in self.memory_only
+        )
+
+    @staticmethod
+    def _disk_root() -> Path:
+        # Read at call time, so that the cache directory can be changed.
+        return Path(config.CACHE_DIR) / "api_responses"
+
+    def _disk_dir(self, key: Tuple) -> Path:
+        scope, resource = key[0], key[1]
+        digest = hashlib.sha256(scope.encode("utf-8")).hexdigest()[:16]
+        return self._disk_root() / digest / quote(resource, safe="")
+
+    def _disk_path(self, key: Tuple) -> Path:
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return self._disk_dir(key) / digest
+
+    def _get(self, key: Tuple) -> Optional[_CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self._persists(key[2]):
+            return None
+        try:
+            entry = _CacheEntry.loads(self._disk_path(key).read_bytes())
+        except (OSError, ValueError, KeyError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: Tuple, entry: _CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _put(self, key: Tuple, entry: _CacheEntry) -> None:
+        self._remember(key, entry)
+        if not self._persists(key[2]):
+            return
+        path = self._disk_path(key)
+        try:
+            # The directories are only accessible by the user, as the responses
+            # describe the workspace.
+            for directory in (path.parents[2], path.parents[1], path.parent):
+                directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # Written atomically, so that concurrent readers never see a partial
+            # entry. mkstemp creates the file readable by the user only.
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(entry.dumps())
+            os.replace(tmp, path)
+        except OSError:
+            # The disk layer is best effort.
+            pass
+
+    def _invalidate(self, scope: str, resource: str) -> None:
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == scope and k[1] == resource]
+            for k in stale:
+                del self._entries[k]
+            self._counters["invalidations"] += 1
+        if self.persist:
+            shutil.rmtree(self._disk_dir((scope, resource)), ignore_errors=True)
+
+
+def _split(request: PreparedRequest, base_url: str) -> Tuple[str, str, List]:
+    """
+    Returns the path of a request relative to the api, its resource, and its
+    sorted query.
+    """
+    url = urlsplit(request.url)
+    base_path = urlsplit(base_url).path.rstrip("/")
+    path = url.path
+    if base_path and path.startswith(base_path):
+        path = path[len(base_path) :]  # noqa: E203
+    path = "/" + path.strip("/")
+    resource = path.split("/")[1]
+    return path, resource, sorted(parse_qsl(url.query, keep_blank_values=True))
+
+
+class _CachingAdapter(_RetryAdapter):
+    """
+    A retrying adapter that serves GET requests from an APICache, and invalidates
+    the cached responses of the resources it writes to.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy],
+        cache: APICache,
+        base_url: str,
+        workspace_id: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(policy, **kwargs)
+        self._cache = cache
+        self._base_url = base_url
+        self._scope = f"{workspace_id or ''}@{base_url}"
+
+    def _to_response(self, entry: _CacheEntry, request: PreparedRequest) -> Response:
+        response = Response()
+        response.status_code = entry.status_code
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = "OK"
+        response.url = request.url  # type: ignore
+        response.request = request
+        response.connection = self
+        response._content = entry.content
+        response._content_consumed = True
+        # For the callers that read the body from raw or iterate over it.
+        response.raw = io.BytesIO(entry.content)
+        return response
+
+    def _entry(self, response: Response, ttl: float) -> Optional[_CacheEntry]:
+        """
+        Returns the entry to store for a response, or None if it is not cacheable.
+        """
+        directives = _parse_cache_control(response.headers.get("cache-control", ""))
+        if response.status_code != 200 or "no-store" in directives:
+            return None
+        headers = [
+            (k, v)
+            for k, v in response.headers.items()
+            if k.lower() not in _HOP_BY_HOP_HEADERS
+        ]
+        entry = _CacheEntry(200, headers, response.content, time.time(), ttl)
+        if ttl <= 0 and not entry.validators():
+            return None
+        return entry
+
+    def send(  # type: ignore
+        self, request: PreparedRequest, stream=False, **kwargs
+    ) -> Response:
+        cache = self._cache
+        path, resource, query = _split(request, self._base_url)
+        if request.method not in ("GET", "HEAD"):
+            try:
+                return super().send(request, stream=stream, **kwargs)
+            finally:
+                cache._invalidate(self._scope, resource)
+        ttl = cache._ttl(path)
+        if request.method != "GET" or stream or ttl is None:
+            return super().send(request, stream=stream, **kwargs)
+        key = (
+            self._scope,
+            resource,
+            path,
+            tuple(query),
+            request.headers.get("Authorization"),
+        )
+        entry = cache._get(key)
+        if entry is not None and entry.is_fresh():
+            cache._count("hits")
+            return self._to_response(entry, request)
+        if entry is not None:
+            request.headers.update(entry.validators())
+        response = super().send(request, stream=stream, **kwargs)
+        if entry is not None and response.status_code == 304:
+            response.close()
+            cache._count("revalidated")
+            refreshed = _CacheEntry(
+                entry.status_code, entry.headers, entry.content, time.time(), ttl
+            )
+            cache._put(key, refreshed)
+            return self._to_response(refreshed, request)
+        cache._count("misses")
+        new_entry = self._entry(response, ttl)
+        if new_entry is not None:
+            cache._count("stores")
+            cache._put(key, new_entry)
+        return response
@@ -0,0 +1,100 @@
+"""
+The retrying transport of leptonai.api.v2.APIClient. DO NOT USE THIS CLASS
+DIRECTLY: pass a RetryPolicy to the client as `APIClient(retry=...)` instead.
+
+The adapter retries idempotent calls only: calls whose method is one of the
+idempotent_methods of the policy. Other calls, such as creating a deployment,
+are sent once, as the client cannot tell whether a failed attempt had been
+processed by the server.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, SSLError, Timeout
+
+from leptonai._internal.client_transport import RetryPolicy
+
+# Errors after which an idempotent call is retried. Certificate errors will not
+# go away by themselves.
+_RETRY_ERRORS = (ConnectionError, Timeout)
+_NO_RETRY_ERRORS = (SSLError,)
+
+
+def _is_replayable(request: PreparedRequest) -> bool:
+    # Only requests with an in-memory body can be sent more than once.
+    return request.body is None or isinstance(request.body, (bytes, str))
+
+
+class _RetryAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that retries idempotent calls according to a RetryPolicy, and
+    counts the retries.
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy], **kwargs):
+        super().__init__(**kwargs)
+        self._policy = policy
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._retried_calls = 0
+        self._exhausted_calls = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "retries": self._retries,
+                "retried_calls": self._retried_calls,
+                "exhausted_calls": self._exhausted_calls,
+            }
+
+    def _count(self, retries: int, exhausted: bool) -> None:
+        with self._lock:
+            self._retries += retries
+            self._retried_calls += 1 if retries else 0
+            self._exhausted_calls += 1 if exhausted else 0
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:  # type: ignore
+        policy = self._policy
+        if (
+            policy is None
+            or not policy.is_idempotent(request.method, urlparse(request.url).path)
+            or not _is_replayable(request)
+        ):
+            return super().send(request, **kwargs)
+        start = time.time()
+        attempt = 0
+        exhausted = False
+        try:
+            while True:
+                try:
+                    res = super().send(request, **kwargs)
+                except _RETRY_ERRORS as e:
+                    if isinstance(e, _NO_RETRY_ERRORS):
+                        raise
+                    delay = policy.backoff(attempt)
+                    if attempt >= policy.max_retries or not policy.within_deadline(
+                        start, delay
+                    ):
+                        exhausted = True
+                        raise
+                else:
+                    if not policy.should_retry_status(res.status_code, True):
+                        return res
+                    delay = policy.backoff(attempt, res.headers.get("Retry-After"))
+                    if (
+                        attempt >= policy.max_retries
+                        or delay is None
+                        or not policy.within_deadline(start, delay)
+                    ):
+                        exhausted = True
+                        return res
+                    res.close()
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            self._count(attempt, exhausted)
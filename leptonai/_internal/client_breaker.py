@@ -0,0 +1,296 @@
+"""
+Circuit breaking for leptonai.client.Client. DO NOT USE THE PRIVATE CLASSES
+DIRECTLY. The public classes are CircuitBreaker and CircuitOpenError, which are
+exposed as leptonai.client.CircuitBreaker and leptonai.client.CircuitOpenError.
+
+The breaker is a transport that counts consecutive failures of a client: connect
+errors, timeouts and 5xx responses. Once they reach the threshold, the circuit
+opens and every call fails immediately with CircuitOpenError, instead of waiting
+for a deployment that is scaling from zero or is unhealthy. After the recovery
+timeout, the circuit is half-open: the next call first probes the health of the
+deployment, and either closes the circuit and goes through, or opens it again
+for twice as long. Calls made while the probe is in flight fail immediately.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+# Seconds a health probe may take, for each of its phases.
+_PROBE_TIMEOUT = 5.0
+
+# Errors that count as failures of the deployment. Timeouts on the client side,
+# such as PoolTimeout, say nothing about its health.
+_FAILURE_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.ReadTimeout,
+    httpx.WriteTimeout,
+)
+
+
+class CircuitOpenError(httpx.ConnectError):
+    """
+    Raised instead of sending a call while the circuit breaker of a client is
+    open. It is a subclass of httpx.ConnectError, as the request was not sent.
+    """
+
+
+class CircuitBreaker(object):
+    """
+    Fails calls fast while a deployment is unavailable, to be passed to a Client as
+    `Client(..., circuit_breaker=CircuitBreaker())`. Its state is returned by
+    `client.circuit_status()`, for example to shed load before calling the client.
+
+    Args:
+        failure_threshold (int, optional): The number of consecutive connect
+            errors, timeouts or 5xx responses that open the circuit. Defaults to 5.
+        recovery_timeout (float, optional): The seconds the circuit stays open
+            before the next call probes the health of the deployment. It doubles
+            after each failed probe, up to max_recovery_timeout. Defaults to 5.
+        max_recovery_timeout (float, optional): The maximum recovery timeout.
+            Defaults to 60.
+        on_state_change (Callable[[str, str], None], optional): If set, called with
+            the old and the new state ("closed", "open" or "half_open") whenever
+            the circuit changes state. Defaults to None.
+        connect_timeout (float, optional): The connect timeout of a client that
+            is created without a timeout, as a call that waits forever never
+            counts as a failure. Defaults to 10. None waits forever.
+        read_timeout (float, optional): The read timeout of a client that is
+            created without a timeout, which bounds the wait for the response
+            and for each chunk of a streamed response. Defaults to 120. None waits
+            forever.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 5.0,
+        max_recovery_timeout: float = 60.0,
+        on_state_change: Optional[Callable[[str, str], None]] = None,
+        connect_timeout: Optional[float] = 10.0,
+        read_timeout: Optional[float] = 120.0,
+    ):
+        if failure_threshold < 1:
+            raise ValueError(
+                f"failure_threshold must be positive, got {failure_threshold}."
+            )
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.on_state_change = on_state_change
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    def default_timeout(self) -> httpx.Timeout:
+        """
+        Returns the timeout of a client that is created without one.
+        """
+        return httpx.Timeout(None, connect=self.connect_timeout, read=self.read_timeout)
+
+
+class _CircuitState(object):
+    """
+    The state of the circuit of a client, shared by its sync and async transports.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, url: str):
+        self.breaker = breaker
+        self.url = url
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.retry_at = 0.0
+        self._recovery_timeout = breaker.recovery_timeout
+        # Reentrant, so that on_state_change may ask for the status.
+        self._lock = threading.RLock()
+
+    def _set_state(self, state: str) -> None:
+        # Called with the lock held.
+        old, self.state = self.state, state
+        if old != state and self.breaker.on_state_change is not None:
+            self.breaker.on_state_change(old, state)
+
+    def _open(self) -> None:
+        self.opened_at = time.time()
+        self.retry_at = self.opened_at + self._recovery_timeout
+        self._set_state(CIRCUIT_OPEN)
+
+    def before_request(self) -> bool:
+        """
+        Raises CircuitOpenError if the call should fail fast, and returns whether
+        the caller should probe the deployment before sending it.
+        """
+        with self._lock:
+            if self.state == CIRCUIT_CLOSED:
+                return False
+            if self.state == CIRCUIT_OPEN and time.time() >= self.retry_at:
+                self._set_state(CIRCUIT_HALF_OPEN)
+                return True
+        raise self.open_error()
+
+    def open_error(self) -> CircuitOpenError:
+        retry_in = max(0.0, self.retry_at - time.time())
+        return CircuitOpenError(
+            f"The circuit breaker of {self.url} is {self.state} after"
+            f" {self.failures} consecutive failures. The deployment will be probed"
+            f" again in {retry_in:.1f} seconds."
+        )
+
+    def probe_result(self, healthy: bool) -> None:
+        with self._lock:
+            if healthy:
+                self.failures = 0
+                self.opened_at = None
+                self._recovery_timeout = self.breaker.recovery_timeout
+                self._set_state(CIRCUIT_CLOSED)
+            else:
+                self._recovery_timeout = min(
+                    self.breaker.max_recovery_timeout, self._recovery_timeout * 2
+                )
+                self._open()
+
+    def record(self, failed: bool) -> None:
+        with self._lock:
+            if not failed:
+                self.failures = 0
+                return
+            self.failures += 1
+            if (
+                self.state == CIRCUIT_CLOSED
+                and self.failures >= self.breaker.failure_threshold
+            ):
+                self._open()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "opened_at": self.opened_at,
+                "retry_in": (
+                    max(0.0, self.retry_at - time.time())
+                    if self.state == CIRCUIT_OPEN
+                    else None
+                ),
+            }
+
+
+def _is_healthy(res: httpx.Response) -> bool:
+    # A deployment that answers at all, even without a health endpoint, is up.
+    return res.status_code < 500
+
+
+def _probe_requests(request: httpx.Request, url: str) -> List[httpx.Request]:
+    auth = {k: v for k, v in request.headers.items() if k.lower() == "authorization"}
+    timeout = httpx.Timeout(_PROBE_TIMEOUT).as_dict()
+    return [
+        httpx.Request(
+            "GET", f"{url}{path}", headers=auth, extensions={"timeout": timeout}
+        )
+        for path in ("/healthz", "/health")
+    ]
+
+
+class _BreakingTransport(httpx.BaseTransport):
+    """
+    A transport that fails requests fast according to a CircuitBreaker.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        state: _CircuitState,
+        probe_transport: Optional[httpx.BaseTransport] = None,
+    ):
+        self._transport = transport
+        self._state = state
+        # The innermost transport, so that a probe neither queues for the
+        # concurrency limit nor is retried.
+        self._probe_transport = probe_transport or transport
+
+    def _probe(self, request: httpx.Request) -> bool:
+        for probe in _probe_requests(request, self._state.url):
+            try:
+                res = self._probe_transport.handle_request(probe)
+                res.close()
+                if _is_healthy(res):
+                    return True
+            except httpx.TransportError:
+                continue
+        return False
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self._state.before_request():
+            healthy = False
+            try:
+                healthy = self._probe(request)
+            finally:
+                self._state.probe_result(healthy)
+            if not healthy:
+                raise self._state.open_error()
+        try:
+            res = self._transport.handle_request(request)
+        except _FAILURE_ERRORS:
+            self._state.record(failed=True)
+            raise
+        self._state.record(failed=res.status_code >= 500)
+        return res
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _AsyncBreakingTransport(httpx.AsyncBaseTransport):
+    """
+    The async counterpart of _BreakingTransport.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        state: _CircuitState,
+        probe_transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._transport = transport
+        self._state = state
+        # The innermost transport, so that a probe neither queues for the
+        # concurrency limit nor is retried.
+        self._probe_transport = probe_transport or transport
+
+    async def _probe(self, request: httpx.Request) -> bool:
+        for probe in _probe_requests(request, self._state.url):
+            try:
+                res = await self._probe_transport.handle_async_request(probe)
+                await res.aclose()
+                if _is_healthy(res):
+                    return True
+            except httpx.TransportError:
+                continue
+        return False
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._state.before_request():
+            healthy = False
+            try:
+                healthy = await self._probe(request)
+            finally:
+                self._state.probe_result(healthy)
+            if not healthy:
+                raise self._state.open_error()
+        try:
+            res = await self._transport.handle_async_request(request)
+        except _FAILURE_ERRORS:
+            self._state.record(failed=True)
+            raise
+        self._state.record(failed=res.status_code >= 500)
+        return res
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
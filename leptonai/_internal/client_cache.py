@@ -0,0 +1,401 @@
+"""
+Client side cache of GET responses for leptonai.client.Client. DO NOT USE THE
+PRIVATE CLASSES DIRECTLY. The only public class is ResponseCache, which is
+exposed as leptonai.client.ResponseCache.
+
+The cache is a transport that sits in front of every other transport of the
+client, so that a fresh hit costs no network round trip at all. It follows the
+usual http caching rules for a private cache:
+
+- Only successful GET responses with a known length are stored, and never if the
+  response says `Cache-Control: no-store`, or varies on a request header.
+- A response is fresh for `max-age` seconds (zero for `no-cache`), or for the
+  cache's default_ttl if the server does not say.
+- A stale response with an ETag or Last-Modified validator is revalidated with a
+  conditional request, and a 304 Not Modified refreshes it without transferring
+  the body again.
+
+Only the calls of the GET endpoints of a deployment are cached, not health checks
+or the openapi specification. Responses are keyed by their url without the query,
+the canonicalized (sorted) query params, and the authorization header.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from leptonai import config
+
+# Headers of a stored response that are not replayed, as they describe the
+# connection rather than the response.
+_HOP_BY_HOP_HEADERS = ("connection", "keep-alive", "transfer-encoding")
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for directive in value.split(","):
+        name, _, arg = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+class _CacheEntry(object):
+    __slots__ = ("status_code", "headers", "content", "stored_at", "max_age")
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: List[Tuple[str, str]],
+        content: bytes,
+        stored_at: float,
+        max_age: float,
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.stored_at = stored_at
+        self.max_age = max_age
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at < self.max_age
+
+    def validators(self) -> Dict[str, str]:
+        headers = httpx.Headers(self.headers)
+        conditional = {}
+        if "etag" in headers:
+            conditional["If-None-Match"] = headers["etag"]
+        if "last-modified" in headers:
+            conditional["If-Modified-Since"] = headers["last-modified"]
+        return conditional
+
+    def to_response(self, request: httpx.Request, hit: bool = False) -> httpx.Response:
+        return httpx.Response(
+            self.status_code,
+            headers=self.headers,
+            stream=httpx.ByteStream(self.content),
+            request=request,
+            extensions={CACHE_HIT_EXTENSION: True} if hit else {},
+        )
+
+    def dumps(self) -> bytes:
+        header = {
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "stored_at": self.stored_at,
+            "max_age": self.max_age,
+        }
+        return json.dumps(header).encode("utf-8") + b"\n" + self.content
+
+    @classmethod
+    def loads(cls, data: bytes) -> "_CacheEntry":
+        header, _, content = data.partition(b"\n")
+        fields = json.loads(header)
+        return cls(
+            fields["status_code"],
+            [tuple(h) for h in fields["headers"]],  # type: ignore
+            content,
+            fields["stored_at"],
+            fields["max_age"],
+        )
+
+
+class ResponseCache(object):
+    """
+    An in-memory LRU cache of GET responses, with an optional disk layer, to be
+    passed to a Client as `Client(..., cache=ResponseCache())`. It is meant for
+    expensive but deterministic GET endpoints, such as model metadata. A cache
+    may be shared by multiple clients, and is thread safe.
+
+    Args:
+        max_entries (int, optional): The maximum number of responses kept in
+            memory. Defaults to 1024.
+        max_bytes (int, optional): The maximum total size of the response bodies
+            kept in memory. Defaults to 64MB.
+        default_ttl (float, optional): For how many seconds a response is fresh
+            if the server does not send a Cache-Control max-age. Defaults to 0,
+            in which case such responses are only stored if they can be
+            revalidated with an ETag or Last-Modified validator.
+        spill_to_disk (bool, optional): Whether responses evicted from memory are
+            written to disk under the lepton cache directory, and read back from
+            there on a later miss. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 0,
+        spill_to_disk: bool = False,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.spill_to_disk = spill_to_disk
+        self._entries: "OrderedDict[Tuple, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0}
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit, miss, revalidation (304) and store counters of the cache,
+        and the number and total size of the responses kept in memory.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
+
+    def clear(self) -> None:
+        """
+        Drops all responses kept in memory. Responses spilled to disk are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    @staticmethod
+    def _disk_path(key: Tuple) -> Path:
+        # Read at call time, so that the cache directory can be changed.
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return Path(config.CACHE_DIR) / "client_responses" / digest
+
+    def _get(self, key: Tuple) -> Optional[_CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.spill_to_disk:
+            return None
+        try:
+            entry = _CacheEntry.loads(self._disk_path(key).read_bytes())
+        except (OSError, ValueError, KeyError):
+            return None
+        self._put(key, entry)
+        return entry
+
+    def _put(self, key: Tuple, entry: _CacheEntry) -> None:
+        if len(entry.content) > self.max_bytes:
+            if self.spill_to_disk:
+                self._spill(key, entry)
+            return
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.content)
+            self._entries[key] = entry
+            self._bytes += len(entry.content)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                evicted_key, evicted_entry = self._entries.popitem(last=False)
+                self._bytes -= len(evicted_entry.content)
+                evicted.append((evicted_key, evicted_entry))
+        if self.spill_to_disk:
+            for evicted_key, evicted_entry in evicted:
+                self._spill(evicted_key, evicted_entry)
+
+    def _spill(self, key: Tuple, entry: _CacheEntry) -> None:
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written atomically, so that concurrent readers never see a partial
+            # entry.
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(entry.dumps())
+            os.replace(tmp, path)
+        except OSError:
+            # The disk layer is best effort.
+            pass
+
+    def _entry_from_response(
+        self, response: httpx.Response, content: bytes
+    ) -> Optional[_CacheEntry]:
+        """
+        Returns the entry to store for a response, or None if it is not cacheable.
+        """
+        if response.status_code != 200:
+            return None
+        directives = _parse_cache_control(response.headers.get("cache-control", ""))
+        if "no-store" in directives:
+            return None
+        vary = response.headers.get("vary", "")
+        if vary and any(
+            v.strip().lower() != "accept-encoding" for v in vary.split(",")
+        ):
+            return None
+        max_age: float = self.default_ttl
+        if "no-cache" in directives:
+            max_age = 0
+        elif directives.get("max-age"):
+            try:
+                max_age = max(0, int(directives["max-age"]))  # type: ignore
+            except ValueError:
+                pass
+        headers = [
+            (k, v)
+            for k, v in response.headers.multi_items()
+            if k.lower() not in _HOP_BY_HOP_HEADERS
+        ]
+        entry = _CacheEntry(200, headers, content, time.time(), max_age)
+        if max_age <= 0 and not entry.validators():
+            return None
+        return entry
+
+    def _refresh(self, key: Tuple, entry: _CacheEntry, response: httpx.Response):
+        """
+        Refreshes a stored entry after the server answered 304 Not Modified.
+        """
+        headers = httpx.Headers(entry.headers)
+        for k, v in response.headers.items():
+            if k.lower() in ("cache-control", "etag", "expires", "last-modified"):
+                headers[k] = v
+        refreshed = self._entry_from_response(
+            httpx.Response(200, headers=headers), entry.content
+        )
+        if refreshed is not None:
+            self._put(key, refreshed)
+        return refreshed or entry
+
+
+# Request extension set by the Client on the calls of its GET endpoints. Other
+# requests, such as health checks, always go to the server.
+CACHE_EXTENSION = "lepton_cache"
+
+# Response extension set on the responses served from the cache without a round
+# trip, so that the stats of the client can tell them apart.
+CACHE_HIT_EXTENSION = "lepton_cache_hit"
+
+
+def _is_cacheable_request(request: httpx.Request) -> bool:
+    if request.method != "GET" or not request.extensions.get(CACHE_EXTENSION):
+        return False
+    directives = _parse_cache_control(request.headers.get("cache-control", ""))
+    return "no-store" not in directives
+
+
+def _cache_key(request: httpx.Request) -> Tuple:
+    url = request.url
+    base = str(url.copy_with(query=None, fragment=None))
+    return (
+        base,
+        tuple(sorted(url.params.multi_items())),
+        request.headers.get("authorization"),
+    )
+
+
+def _has_known_length(response: httpx.Response) -> bool:
+    # Streamed responses, such as server-sent events, are passed through.
+    return "content-length" in response.headers
+
+
+class _CachingTransport(httpx.BaseTransport):
+    """
+    A transport that serves GET requests from a ResponseCache.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, cache: ResponseCache):
+        self._transport = transport
+        self._cache = cache
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not _is_cacheable_request(request):
+            return self._transport.handle_request(request)
+        cache = self._cache
+        key = _cache_key(request)
+        entry = cache._get(key)
+        if entry is not None and entry.is_fresh():
+            cache._count("hits")
+            return entry.to_response(request, hit=True)
+        if entry is not None:
+            request.headers.update(entry.validators())
+        response = self._transport.handle_request(request)
+        if entry is not None and response.status_code == 304:
+            response.close()
+            cache._count("revalidated")
+            return cache._refresh(key, entry, response).to_response(request)
+        cache._count("misses")
+        if response.status_code != 200 or not _has_known_length(response):
+            return response
+        try:
+            content = b"".join(response.stream)
+        finally:
+            response.close()
+        new_entry = cache._entry_from_response(response, content)
+        if new_entry is not None:
+            cache._count("stores")
+            cache._put(key, new_entry)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(content),
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """
+    The async counterpart of _CachingTransport. Reading and writing the disk layer
+    is blocking, but only happens on a miss in memory or an eviction.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: ResponseCache):
+        self._transport = transport
+        self._cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not _is_cacheable_request(request):
+            return await self._transport.handle_async_request(request)
+        cache = self._cache
+        key = _cache_key(request)
+        entry = cache._get(key)
+        if entry is not None and entry.is_fresh():
+            cache._count("hits")
+            return entry.to_response(request, hit=True)
+        if entry is not None:
+            request.headers.update(entry.validators())
+        response = await self._transport.handle_async_request(request)
+        if entry is not None and response.status_code == 304:
+            await response.aclose()
+            cache._count("revalidated")
+            return cache._refresh(key, entry, response).to_response(request)
+        cache._count("misses")
+        if response.status_code != 200 or not _has_known_length(response):
+            return response
+        try:
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        new_entry = cache._entry_from_response(response, content)
+        if new_entry is not None:
+            cache._count("stores")
+            cache._put(key, new_entry)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(content),
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
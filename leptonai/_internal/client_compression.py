@@ -0,0 +1,233 @@
+"""
+Request body compression for leptonai.client.Client. DO NOT USE THE PRIVATE
+CLASSES DIRECTLY. The only public class is RequestCompression, which is exposed
+as leptonai.client.RequestCompression.
+
+Servers advertise the content codings they accept for request bodies with an
+`Accept-Encoding` header on their responses (RFC 7694). The compressing transport
+learns them from every response it sees, including the health check and openapi
+responses at construction time, and only compresses bodies with a coding that
+the server advertised. If the server still answers 415 Unsupported Media Type, the
+coding is forgotten and the request is sent again uncompressed.
+"""
+
+import asyncio
+import gzip
+import threading
+from typing import Optional, Set
+
+import httpx
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+REQUEST_COMPRESSION_ENCODINGS = ("auto", "gzip", "zstd")
+
+# Content types worth compressing. Others, such as images or already compressed
+# binary uploads, are sent as is.
+_COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/x-www-form-urlencoded",
+    "application/xml",
+    "text/",
+)
+
+_DEFAULT_LEVELS = {"gzip": 1, "zstd": 3}
+
+
+class RequestCompression(object):
+    """
+    Compresses large request bodies, to be passed to a Client as
+    `Client(..., compression=RequestCompression())`. This pays off for large
+    prompts and batched inputs sent over slow links, and costs a little cpu time.
+
+    Args:
+        encoding (str, optional): "gzip", "zstd" (which requires the zstandard
+            package), or "auto", which picks zstd if it is installed and accepted
+            by the server, and gzip otherwise. Defaults to "auto".
+        threshold (int, optional): Only bodies of at least this many bytes are
+            compressed. Defaults to 16KB.
+        level (int, optional): The compression level. Defaults to None, which
+            uses a fast level: 1 for gzip and 3 for zstd.
+        thread_threshold (int, optional): For an AsyncClient, bodies of at least
+            this many bytes are compressed in a worker thread, so that the event
+            loop is not blocked. Defaults to 1MB.
+        require_advertised (bool, optional): Whether to only compress with a
+            coding that the server advertised with an Accept-Encoding response
+            header. Set to False for servers that are known to accept compressed
+            bodies but do not advertise it. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        encoding: str = "auto",
+        threshold: int = 16 * 1024,
+        level: Optional[int] = None,
+        thread_threshold: int = 1024 * 1024,
+        require_advertised: bool = True,
+    ):
+        if encoding not in REQUEST_COMPRESSION_ENCODINGS:
+            raise ValueError(
+                f"Unknown encoding {encoding}. Supported encodings are"
+                f" {REQUEST_COMPRESSION_ENCODINGS}."
+            )
+        if encoding == "zstd" and zstandard is None:
+            raise ImportError(
+                "zstd compression requires the zstandard package. Install it with"
+                " `pip install zstandard`."
+            )
+        self.encoding = encoding
+        self.threshold = threshold
+        self.level = level
+        self.thread_threshold = thread_threshold
+        self.require_advertised = require_advertised
+
+    def candidates(self):
+        if self.encoding != "auto":
+            return (self.encoding,)
+        return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if level is None:
+        level = _DEFAULT_LEVELS[encoding]
+    if encoding == "gzip":
+        # mtime=0 keeps the output deterministic.
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+class _CompressionState(object):
+    """
+    The request codings that the server is known to accept, shared by the sync and
+    async transports of a client.
+    """
+
+    def __init__(self, compression: RequestCompression):
+        self.compression = compression
+        self._accepted: Set[str] = set()
+        self._rejected: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def learn(self, response: httpx.Response) -> None:
+        accept_encoding = response.headers.get("accept-encoding")
+        if not accept_encoding:
+            return
+        codings = {
+            c.split(";", 1)[0].strip().lower() for c in accept_encoding.split(",")
+        }
+        with self._lock:
+            self._accepted |= codings
+
+    def reject(self, encoding: str) -> None:
+        with self._lock:
+            self._rejected.add(encoding)
+
+    def choose(self, request: httpx.Request) -> Optional[str]:
+        """
+        Returns the coding to compress the request with, or None.
+        """
+        compression = self.compression
+        if request.method not in ("POST", "PUT", "PATCH"):
+            return None
+        if "content-encoding" in request.headers:
+            return None
+        # Only bodies that are in memory are compressed, not streamed uploads.
+        if not isinstance(request.stream, httpx.ByteStream):
+            return None
+        content_type = request.headers.get("content-type", "")
+        if not content_type.startswith(_COMPRESSIBLE_CONTENT_TYPES):
+            return None
+        if len(request.content) < compression.threshold:
+            return None
+        with self._lock:
+            for encoding in compression.candidates():
+                if encoding in self._rejected:
+                    continue
+                if not compression.require_advertised or encoding in self._accepted:
+                    return encoding
+        return None
+
+
+def _compressed_request(
+    request: httpx.Request, encoding: str, content: bytes
+) -> httpx.Request:
+    headers = request.headers.copy()
+    headers["Content-Encoding"] = encoding
+    headers["Content-Length"] = str(len(content))
+    return httpx.Request(
+        request.method,
+        request.url,
+        headers=headers,
+        content=content,
+        extensions=request.extensions,
+    )
+
+
+class _CompressingTransport(httpx.BaseTransport):
+    """
+    A transport that compresses request bodies according to a RequestCompression.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, state: _CompressionState):
+        self._transport = transport
+        self._state = state
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        encoding = self._state.choose(request)
+        if encoding is None:
+            res = self._transport.handle_request(request)
+            self._state.learn(res)
+            return res
+        content = compress(request.content, encoding, self._state.compression.level)
+        res = self._transport.handle_request(
+            _compressed_request(request, encoding, content)
+        )
+        if res.status_code == 415:
+            res.close()
+            self._state.reject(encoding)
+            res = self._transport.handle_request(request)
+        self._state.learn(res)
+        return res
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _AsyncCompressingTransport(httpx.AsyncBaseTransport):
+    """
+    The async counterpart of _CompressingTransport.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, state: _CompressionState):
+        self._transport = transport
+        self._state = state
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        encoding = self._state.choose(request)
+        if encoding is None:
+            res = await self._transport.handle_async_request(request)
+            self._state.learn(res)
+            return res
+        level = self._state.compression.level
+        if len(request.content) >= self._state.compression.thread_threshold:
+            content = await asyncio.get_running_loop().run_in_executor(
+                None, compress, request.content, encoding, level
+            )
+        else:
+            content = compress(request.content, encoding, level)
+        res = await self._transport.handle_async_request(
+            _compressed_request(request, encoding, content)
+        )
+        if res.status_code == 415:
+            await res.aclose()
+            self._state.reject(encoding)
+            res = await self._transport.handle_async_request(request)
+        self._state.learn(res)
+        return res
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
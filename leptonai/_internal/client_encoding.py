@@ -0,0 +1,57 @@
+"""
+Fast json encoding of the request bodies of leptonai.client.Client. DO NOT USE
+THESE FUNCTIONS DIRECTLY.
+
+fastapi's jsonable_encoder walks the whole payload in python and builds a copy of
+it, which httpx then serializes again. Instead, the payload is serialized to bytes
+once by the C accelerated json encoder, and only the values it does not know
+(File, pydantic models, numpy arrays, datetimes, ...) are converted on the way,
+so the cost of the python walk is only paid for those leaves.
+"""
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from leptonai.config import PYDANTIC_MAJOR_VERSION
+from leptonai.types import File
+
+
+def _is_numpy(obj: Any) -> bool:
+    # numpy is not a dependency of leptonai, so arrays and numpy scalars are
+    # recognized without importing it.
+    return type(obj).__module__ == "numpy" and hasattr(obj, "tolist")
+
+
+def _default(obj: Any) -> Any:
+    """
+    Converts a value that the json encoder does not know into one that it does.
+    """
+    if isinstance(obj, File):
+        # The same as what jsonable_encoder returns for a File.
+        return {"content": File.encode(obj.content)}
+    if _is_numpy(obj):
+        return obj.tolist()
+    if isinstance(obj, BaseModel) and PYDANTIC_MAJOR_VERSION >= 2:
+        return obj.model_dump(mode="json", by_alias=True)
+    return jsonable_encoder(obj)
+
+
+def _encode_json_body(obj: Any) -> bytes:
+    """
+    Serializes the keyword arguments of a call into a json request body. The
+    result is the same json document as `json.dumps(jsonable_encoder(obj))`,
+    without the insignificant whitespace.
+    """
+    try:
+        return json.dumps(
+            obj, default=_default, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+    except (TypeError, ValueError):
+        # For example, dict keys that are not strings or numbers, which only
+        # jsonable_encoder knows how to convert.
+        return json.dumps(
+            jsonable_encoder(obj), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
@@ -0,0 +1,280 @@
+"""
+Client side load shaping for leptonai.client.Client. DO NOT USE THE PRIVATE
+CLASSES DIRECTLY. The only public class is ConcurrencyLimit, which is exposed as
+leptonai.client.ConcurrencyLimit.
+
+The limiter is a transport that admits the requests of each url path in order of
+priority, then arrival, as long as the path has fewer than max_in_flight requests
+in flight and its token bucket has a token. A request holds its slot until its
+response is closed, so a streamed response counts as in flight until the caller
+has consumed it. The time a request waited is reported on its response, and is
+recorded as `queue_wait` in the client stats.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from leptonai._internal.client_transport import (
+    _AsyncReleasingStream,
+    _ReleasingStream,
+)
+
+# Request extension that carries the priority of a call, set by the `_priority`
+# argument of the generated methods.
+PRIORITY_EXTENSION = "lepton_priority"
+# Response extension that carries the seconds a request waited in the queue.
+QUEUE_WAIT_EXTENSION = "lepton_queue_wait"
+
+
+class ConcurrencyLimit(object):
+    """
+    Limits the load that a Client puts on each path of a deployment, to be passed
+    to a Client as `Client(..., concurrency_limit=ConcurrencyLimit(...))`. Calls
+    that exceed a limit wait in a queue on the client side, instead of being
+    rejected by the server with 429s.
+
+    Calls are admitted in order of their priority, which is given with the
+    `_priority` argument of the generated methods (higher first, defaults to 0),
+    and in order of arrival among calls of the same priority. For example, an
+    interactive call made with `client.run(..., _priority=10)` jumps ahead of the
+    batch calls that are queued on the same client.
+
+    Args:
+        max_in_flight (int, optional): The maximum number of requests of a path
+            in flight at the same time. Defaults to None, which means no limit.
+        max_qps (float, optional): The maximum rate of requests per second of a
+            path, enforced with a token bucket. Defaults to None, which means no
+            limit.
+        burst (int, optional): The size of the token bucket, i.e. how many
+            requests may be sent at once after a quiet period. Defaults to
+            max_qps, rounded up to at least 1.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_qps: Optional[float] = None,
+        burst: Optional[int] = None,
+    ):
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be positive, got {max_in_flight}.")
+        if max_qps is not None and max_qps <= 0:
+            raise ValueError(f"max_qps must be positive, got {max_qps}.")
+        self.max_in_flight = max_in_flight
+        self.max_qps = max_qps
+        self.burst = burst if burst is not None else max(1, int(max_qps or 1))
+
+
+class _TokenBucket(object):
+    def __init__(self, rate: float, capacity: int):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Takes a token and returns 0, or returns the seconds until one is available.
+        """
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._last) * self._rate
+        )
+        self._last = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+
+class _Waiter(object):
+    __slots__ = ("key", "wakeup")
+
+    def __init__(self, priority: int, seq: int):
+        self.key = (-priority, seq)
+        self.wakeup: Optional[asyncio.Future] = None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return self.key < other.key
+
+
+class _PathLimiter(object):
+    """
+    The admission state of one path. The subclasses implement the waiting.
+    """
+
+    def __init__(self, limit: ConcurrencyLimit):
+        self._max_in_flight = limit.max_in_flight
+        self._bucket = (
+            _TokenBucket(limit.max_qps, limit.burst) if limit.max_qps else None
+        )
+        self._in_flight = 0
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def _enqueue(self, priority: int) -> _Waiter:
+        waiter = _Waiter(priority, next(self._seq))
+        heapq.heappush(self._queue, waiter)
+        return waiter
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        if waiter in self._queue:
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+
+    def _try_acquire(self, waiter: _Waiter) -> Optional[float]:
+        """
+        Admits the waiter and returns 0, or returns how long it should wait before
+        trying again, where None means until it is woken up.
+        """
+        if self._queue[0] is not waiter:
+            return None
+        if self._max_in_flight is not None and self._in_flight >= self._max_in_flight:
+            return None
+        if self._bucket is not None:
+            delay = self._bucket.take()
+            if delay > 0:
+                return delay
+        heapq.heappop(self._queue)
+        self._in_flight += 1
+        return 0.0
+
+
+class _SyncPathLimiter(_PathLimiter):
+    def __init__(self, limit: ConcurrencyLimit):
+        super().__init__(limit)
+        self._condition = threading.Condition()
+
+    def acquire(self, priority: int) -> float:
+        start = time.monotonic()
+        with self._condition:
+            waiter = self._enqueue(priority)
+            try:
+                while True:
+                    delay = self._try_acquire(waiter)
+                    if delay == 0:
+                        # The next waiter may be admitted as well.
+                        self._condition.notify_all()
+                        return time.monotonic() - start
+                    self._condition.wait(delay)
+            except BaseException:
+                self._dequeue(waiter)
+                self._condition.notify_all()
+                raise
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+
+class _AsyncPathLimiter(_PathLimiter):
+    """
+    The asyncio counterpart of _SyncPathLimiter. It is used from a single event
+    loop, so its state needs no lock, and only the waiter at the head of the queue
+    is woken up.
+    """
+
+    def _wake_head(self) -> None:
+        if self._queue:
+            wakeup = self._queue[0].wakeup
+            if wakeup is not None and not wakeup.done():
+                wakeup.set_result(None)
+
+    async def acquire(self, priority: int) -> float:
+        start = time.monotonic()
+        waiter = self._enqueue(priority)
+        try:
+            while True:
+                delay = self._try_acquire(waiter)
+                if delay == 0:
+                    self._wake_head()
+                    return time.monotonic() - start
+                waiter.wakeup = asyncio.get_running_loop().create_future()
+                await asyncio.wait([waiter.wakeup], timeout=delay)
+                waiter.wakeup = None
+        except BaseException:
+            self._dequeue(waiter)
+            self._wake_head()
+            raise
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._wake_head()
+
+
+class _LimitingTransport(httpx.BaseTransport):
+    """
+    A transport that admits requests according to a ConcurrencyLimit.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, limit: ConcurrencyLimit):
+        self._transport = transport
+        self._limit = limit
+        self._limiters: Dict[str, _SyncPathLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, path: str) -> _SyncPathLimiter:
+        with self._lock:
+            limiter = self._limiters.get(path)
+            if limiter is None:
+                limiter = self._limiters[path] = _SyncPathLimiter(self._limit)
+            return limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = self._limiter(request.url.path)
+        wait = limiter.acquire(request.extensions.get(PRIORITY_EXTENSION, 0))
+        try:
+            res = self._transport.handle_request(request)
+        except BaseException:
+            limiter.release()
+            raise
+        res.extensions[QUEUE_WAIT_EXTENSION] = wait
+        return httpx.Response(
+            status_code=res.status_code,
+            headers=res.headers,
+            stream=_ReleasingStream(res.stream, limiter.release),  # type: ignore
+            extensions=res.extensions,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _AsyncLimitingTransport(httpx.AsyncBaseTransport):
+    """
+    The async counterpart of _LimitingTransport.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limit: ConcurrencyLimit):
+        self._transport = transport
+        self._limit = limit
+        self._limiters: Dict[str, _AsyncPathLimiter] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        limiter = self._limiters.get(path)
+        if limiter is None:
+            limiter = self._limiters[path] = _AsyncPathLimiter(self._limit)
+        wait = await limiter.acquire(request.extensions.get(PRIORITY_EXTENSION, 0))
+        try:
+            res = await self._transport.handle_async_request(request)
+        except BaseException:
+            limiter.release()
+            raise
+        res.extensions[QUEUE_WAIT_EXTENSION] = wait
+        return httpx.Response(
+            status_code=res.status_code,
+            headers=res.headers,
+            stream=_AsyncReleasingStream(res.stream, limiter.release),  # type: ignore
+            extensions=res.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,208 @@
+"""
+Streaming of OpenAI-compatible chat and text completions for
+leptonai.client.Client. DO NOT CREATE THESE CLASSES DIRECTLY: they are returned by
+`client.chat()` and `client.complete()`, and are exposed as
+leptonai.client.CompletionStream and leptonai.client.AsyncCompletionStream.
+
+The streams decode the server-sent events of the response as they arrive on the
+pooled connection of the client, yield the text delta of every chunk, and record
+the time to first token and the gaps between tokens on the way.
+"""
+
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+
+from leptonai._internal.client_stream import _SSEDecoder
+
+CHAT_COMPLETIONS_SUFFIX = "/chat/completions"
+COMPLETIONS_SUFFIX = "/completions"
+MODELS_SUFFIX = "/models"
+# Prefix of the OpenAI-compatible api of a deployment, used when its openapi
+# specification does not list the completion endpoints.
+DEFAULT_OPENAI_PREFIX = "/v1"
+
+
+def _find_openai_path(openapi: Dict, suffix: str) -> str:
+    """
+    Returns the path of the deployment that serves the given OpenAI endpoint, such
+    as "/v1/chat/completions" or "/api/v1/chat/completions".
+    """
+    candidates = [
+        p
+        for p in openapi.get("paths", {})
+        if p.endswith(suffix)
+        # "/v1/chat/completions" also ends with "/completions".
+        and not (suffix == COMPLETIONS_SUFFIX and p.endswith(CHAT_COMPLETIONS_SUFFIX))
+    ]
+    if candidates:
+        return min(candidates, key=len)
+    return DEFAULT_OPENAI_PREFIX + suffix
+
+
+def _models_path(path: str) -> str:
+    """
+    Returns the path that lists the models, next to a completion path.
+    """
+    for suffix in (CHAT_COMPLETIONS_SUFFIX, COMPLETIONS_SUFFIX):
+        if path.endswith(suffix):
+            return path[: -len(suffix)] + MODELS_SUFFIX
+    return DEFAULT_OPENAI_PREFIX + MODELS_SUFFIX
+
+
+def _first_model(res: httpx.Response) -> str:
+    models = res.json().get("data") or []
+    if not models:
+        raise RuntimeError(
+            f"The deployment at {res.request.url} serves no models. Pass in the"
+            " model explicitly."
+        )
+    return models[0]["id"]
+
+
+class _CompletionStreamBase(object):
+    """
+    The decoding and timing state shared by the sync and async streams.
+    """
+
+    def __init__(self, response: httpx.Response, chat: bool, start: float):
+        self.response = response
+        self._chat = chat
+        self._start = start
+        self._last: Optional[float] = None
+        self._decoder = _SSEDecoder()
+        self._pieces: List[str] = []
+        self.ttft: Optional[float] = None
+        self.inter_token_latencies: List[float] = []
+        self.latency: Optional[float] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self.finish_reason: Optional[str] = None
+        self.model: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """
+        The text received so far.
+        """
+        return "".join(self._pieces)
+
+    def _deltas(self, events) -> List[str]:
+        deltas = []
+        for event in events:
+            chunk = json.loads(event.data)
+            if "error" in chunk:
+                raise RuntimeError(f"The completion stream failed: {chunk['error']}")
+            self.model = chunk.get("model", self.model)
+            if chunk.get("usage"):
+                self.usage = chunk["usage"]
+            choices = chunk.get("choices")
+            if not choices:
+                continue
+            choice = choices[0]
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
+            if self._chat:
+                delta = (choice.get("delta") or {}).get("content")
+            else:
+                delta = choice.get("text")
+            if not delta:
+                continue
+            now = time.perf_counter()
+            if self._last is None:
+                self.ttft = now - self._start
+            else:
+                self.inter_token_latencies.append(now - self._last)
+            self._last = now
+            self._pieces.append(delta)
+            deltas.append(delta)
+        return deltas
+
+    def _finish(self) -> None:
+        if self.latency is None:
+            self.latency = time.perf_counter() - self._start
+
+    def timing(self) -> Dict[str, Any]:
+        """
+        Returns the time to first token, the mean and max inter-token latency, the
+        total latency and the number of streamed chunks, in seconds.
+        """
+        gaps = self.inter_token_latencies
+        return {
+            "ttft": self.ttft,
+            "mean_inter_token_latency": sum(gaps) / len(gaps) if gaps else None,
+            "max_inter_token_latency": max(gaps) if gaps else None,
+            "latency": self.latency,
+            "chunks": len(self._pieces),
+        }
+
+
+class CompletionStream(_CompletionStreamBase):
+    """
+    A streamed chat or text completion, returned by `client.chat(...)` and
+    `client.complete(...)`. Iterating over it yields the text deltas as they
+    arrive. Once the stream is consumed, `text` holds the full text, `usage` and
+    `finish_reason` are set if the server sent them, and `ttft`,
+    `inter_token_latencies` and `latency` hold the timing of the stream:
+
+        with client.chat([{"role": "user", "content": "Hi"}]) as stream:
+            for delta in stream:
+                print(delta, end="")
+        print(stream.timing())
+    """
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for chunk in self.response.iter_bytes():
+                yield from self._deltas(self._decoder.feed(chunk))
+                if self._decoder.done:
+                    break
+            else:
+                yield from self._deltas(self._decoder.flush())
+        finally:
+            self._finish()
+            self.close()
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __enter__(self) -> "CompletionStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncCompletionStream(_CompletionStreamBase):
+    """
+    The asyncio counterpart of CompletionStream, returned by the coroutines
+    `client.chat(...)` and `client.complete(...)` of an AsyncClient:
+
+        async with await client.chat(messages) as stream:
+            async for delta in stream:
+                ...
+    """
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        try:
+            async for chunk in self.response.aiter_bytes():
+                for delta in self._deltas(self._decoder.feed(chunk)):
+                    yield delta
+                if self._decoder.done:
+                    break
+            else:
+                for delta in self._deltas(self._decoder.flush()):
+                    yield delta
+        finally:
+            self._finish()
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.response.aclose()
+
+    async def __aenter__(self) -> "AsyncCompletionStream":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
@@ -0,0 +1,94 @@
+"""
+Writes response bodies of leptonai.client.Client into caller provided outputs, for
+calls made with `_out=...`. DO NOT USE THESE CLASSES DIRECTLY.
+
+The body is written chunk by chunk as it arrives, so a large artifact, such as a
+generated video, is never materialized in memory as a whole. Chunks are written
+as they come out of httpx without being re-chunked, and files are opened with a
+large buffer, so that the disk sees large writes.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Buffer size of the files that response bodies are written to.
+_OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+class _OutputWriter(object):
+    """
+    Writes chunks of a response body into a file path, a bytearray, a writable
+    memoryview, or any object with a `write` method.
+
+    A bytearray is filled in place from its start and grows if the body does not
+    fit, while a memoryview cannot grow and raises a ValueError instead. If
+    writing into a file path fails, the partially written file is removed.
+    """
+
+    def __init__(self, out: Any):
+        self._path: Optional[str] = None
+        self._file = None
+        self._buffer = None
+        self._num_bytes = 0
+        if isinstance(out, (str, os.PathLike)):
+            self._path = os.fspath(out)
+            self._file = open(self._path, "wb", buffering=_OUTPUT_BUFFER_SIZE)
+            self._write = self._file.write
+        elif isinstance(out, bytearray):
+            self._buffer = out
+            self._write = self._write_bytearray
+        elif isinstance(out, memoryview):
+            if out.readonly:
+                raise ValueError(
+                    "The memoryview to write the response into is readonly."
+                )
+            self._buffer = out.cast("B")
+            self._write = self._write_memoryview
+        elif hasattr(out, "write"):
+            self._write = out.write
+        else:
+            raise TypeError(
+                "_out must be a file path, a bytearray, a writable memoryview, or an"
+                f" object with a write method. Got {type(out)}."
+            )
+
+    def _write_bytearray(self, chunk: bytes) -> None:
+        self._buffer[self._num_bytes : self._num_bytes + len(chunk)] = chunk  # noqa
+
+    def _write_memoryview(self, chunk: bytes) -> None:
+        end = self._num_bytes + len(chunk)
+        if end > len(self._buffer):
+            raise ValueError(
+                f"The response does not fit in the memoryview of {len(self._buffer)}"
+                " bytes."
+            )
+        self._buffer[self._num_bytes : end] = chunk  # noqa: E203
+
+    def write(self, chunk: bytes) -> None:
+        self._write(chunk)
+        self._num_bytes += len(chunk)
+
+    def __enter__(self) -> "_OutputWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._file is not None:
+            self._file.close()
+            if exc_type is not None:
+                try:
+                    os.remove(self._path)  # type: ignore
+                except OSError:
+                    pass
+
+    def metadata(self, res: httpx.Response) -> Dict[str, Any]:
+        """
+        Returns what a call made with `_out` returns instead of the body.
+        """
+        return {
+            "status_code": res.status_code,
+            "content_type": res.headers.get("content-type"),
+            "bytes": self._num_bytes,
+            "path": self._path,
+        }
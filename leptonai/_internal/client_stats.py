@@ -0,0 +1,359 @@
+"""
+Per-path latency and throughput instrumentation for leptonai.client.Client. DO NOT
+USE THESE CLASSES DIRECTLY. The only public class is RequestMetrics, which is
+exposed as leptonai.client.RequestMetrics.
+
+The recorder is installed as httpx event hooks only when stats or a callback are
+requested, so a client without instrumentation pays nothing. When installed, the
+request hook stamps the start time and registers an httpcore trace callback that
+catches the connect phase, the response hook stamps the time to first byte, and
+the response stream is wrapped so that the total latency and the response bytes
+are recorded when the body has been consumed and the response is closed.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from leptonai._internal.client_cache import CACHE_HIT_EXTENSION
+from leptonai._internal.client_limiter import QUEUE_WAIT_EXTENSION
+
+# Key of the request extension that carries the timing of a request from the
+# request hook to the response hook.
+_TIMING_EXTENSION = "lepton_timing"
+
+# Number of most recent samples kept for each histogram.
+DEFAULT_STATS_WINDOW = 1024
+
+
+class RequestMetrics(object):
+    """
+    The metrics of a single request made by a Client, passed to the stats callback.
+
+    Attributes:
+        method: the http method, such as "POST".
+        path: the url path of the request, such as "/run".
+        status_code: the http status code of the response.
+        connect_time: seconds spent establishing a new connection (including tls),
+            or None if the request reused a pooled connection.
+        ttfb: seconds from sending the request until the response headers arrived.
+        latency: seconds from sending the request until the response was closed.
+        request_bytes: the size of the request body, or None if it was streamed
+            without a known length.
+        response_bytes: the number of response body bytes read from the wire.
+        queue_wait: seconds the request waited for the concurrency limit of the
+            client, or None if the client has none. It is included in ttfb and
+            latency.
+        cached: whether the response was served by the response cache of the
+            client without a round trip to the server.
+    """
+
+    __slots__ = (
+        "method",
+        "path",
+        "status_code",
+        "connect_time",
+        "ttfb",
+        "latency",
+        "request_bytes",
+        "response_bytes",
+        "queue_wait",
+        "cached",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        status_code: int,
+        connect_time: Optional[float],
+        ttfb: float,
+        latency: float,
+        request_bytes: Optional[int],
+        response_bytes: int,
+        queue_wait: Optional[float] = None,
+        cached: bool = False,
+    ):
+        self.method = method
+        self.path = path
+        self.status_code = status_code
+        self.connect_time = connect_time
+        self.ttfb = ttfb
+        self.latency = latency
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.queue_wait = queue_wait
+        self.cached = cached
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"RequestMetrics({fields})"
+
+
+class _RollingHistogram(object):
+    """
+    Keeps the most recent `window` samples in a ring buffer, and computes the
+    summary statistics only when they are asked for.
+    """
+
+    __slots__ = ("_samples", "_next", "count")
+
+    def __init__(self, window: int):
+        self._samples: List[float] = [0.0] * window
+        self._next = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self._samples[self._next] = value
+        self._next = (self._next + 1) % len(self._samples)
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        samples = sorted(self._samples[: min(self.count, len(self._samples))])
+        if not samples:
+            return {"count": 0}
+
+        def _percentile(q: float) -> float:
+            return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+        return {
+            "count": self.count,
+            "mean": sum(samples) / len(samples),
+            "p50": _percentile(0.5),
+            "p90": _percentile(0.9),
+            "p99": _percentile(0.99),
+            "max": samples[-1],
+        }
+
+
+_HISTOGRAMS = (
+    "connect_time",
+    "ttfb",
+    "latency",
+    "request_bytes",
+    "response_bytes",
+    "queue_wait",
+)
+
+
+class _PathStats(object):
+    def __init__(self, window: int):
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.new_connections = 0
+        self.cache_hits = 0
+        self.status_codes: Dict[int, int] = {}
+        self.histograms = {k: _RollingHistogram(window) for k in _HISTOGRAMS}
+
+    def add(self, metrics: RequestMetrics) -> None:
+        self.requests += 1
+        if metrics.cached:
+            self.cache_hits += 1
+        elif metrics.connect_time is not None:
+            self.new_connections += 1
+        self.status_codes[metrics.status_code] = (
+            self.status_codes.get(metrics.status_code, 0) + 1
+        )
+        for name, histogram in self.histograms.items():
+            value = getattr(metrics, name)
+            if value is not None:
+                histogram.add(value)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        # Cache hits never reach a connection, so they are not counted as reuses.
+        sent = self.requests - self.cache_hits
+        summary: Dict[str, Any] = {
+            "requests": self.requests,
+            "requests_per_second": self.requests / elapsed if elapsed > 0 else 0.0,
+            "status_codes": dict(self.status_codes),
+            "cache_hits": self.cache_hits,
+            "new_connections": self.new_connections,
+            "connection_reuse_ratio": 1 - self.new_connections / sent if sent else None,
+        }
+        summary.update({k: h.summary() for k, h in self.histograms.items()})
+        return summary
+
+
+class _Timing(object):
+    """
+    The timestamps of an in-flight request.
+    """
+
+    __slots__ = ("start", "connect_start", "connect_end", "ttfb")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.connect_start: Optional[float] = None
+        self.connect_end: Optional[float] = None
+        self.ttfb: Optional[float] = None
+
+    def on_trace(self, name: str) -> None:
+        if name == "connection.connect_tcp.started":
+            self.connect_start = time.perf_counter()
+        elif name in (
+            "connection.connect_tcp.complete",
+            "connection.start_tls.complete",
+        ):
+            self.connect_end = time.perf_counter()
+
+    @property
+    def connect_time(self) -> Optional[float]:
+        if self.connect_start is None or self.connect_end is None:
+            return None
+        return self.connect_end - self.connect_start
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    def __init__(self, stream, recorder: "_StatsRecorder", response: httpx.Response):
+        self._stream = stream
+        self._recorder = recorder
+        self._response = response
+        self._num_bytes = 0
+        self._closed = False
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._num_bytes += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._recorder.finish(self._response, self._num_bytes)
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, recorder: "_StatsRecorder", response: httpx.Response):
+        self._stream = stream
+        self._recorder = recorder
+        self._response = response
+        self._num_bytes = 0
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._num_bytes += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._recorder.finish(self._response, self._num_bytes)
+
+
+def _get_request_bytes(request: httpx.Request) -> Optional[int]:
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        return int(content_length)
+    return None if "transfer-encoding" in request.headers else 0
+
+
+class _StatsRecorder(object):
+    """
+    Aggregates the metrics of the requests made by a client, per url path, and
+    forwards each of them to an optional callback.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        callback: Optional[Callable[[RequestMetrics], None]] = None,
+        window: int = DEFAULT_STATS_WINDOW,
+    ):
+        self.enabled = enabled
+        self._callback = callback
+        self._window = window
+        self._lock = threading.Lock()
+        self._paths: Dict[str, _PathStats] = {}
+
+    # sync event hooks
+
+    def request_hook(self, request: httpx.Request) -> None:
+        timing = request.extensions[_TIMING_EXTENSION] = _Timing()
+        # A trace callback of the caller keeps being called.
+        trace = request.extensions.get("trace")
+
+        def _trace(name, info):
+            timing.on_trace(name)
+            if trace is not None:
+                trace(name, info)
+
+        request.extensions["trace"] = _trace
+
+    def response_hook(self, response: httpx.Response) -> None:
+        timing = response.request.extensions.get(_TIMING_EXTENSION)
+        if timing is None:
+            return
+        timing.ttfb = time.perf_counter() - timing.start
+        response.stream = _RecordingStream(response.stream, self, response)
+
+    # async event hooks. httpcore requires an async trace callback for async
+    # transports.
+
+    async def arequest_hook(self, request: httpx.Request) -> None:
+        timing = request.extensions[_TIMING_EXTENSION] = _Timing()
+        trace = request.extensions.get("trace")
+
+        async def _trace(name, info):
+            timing.on_trace(name)
+            if trace is not None:
+                await trace(name, info)
+
+        request.extensions["trace"] = _trace
+
+    async def aresponse_hook(self, response: httpx.Response) -> None:
+        timing = response.request.extensions.get(_TIMING_EXTENSION)
+        if timing is None:
+            return
+        timing.ttfb = time.perf_counter() - timing.start
+        response.stream = _AsyncRecordingStream(response.stream, self, response)
+
+    def event_hooks(self, is_async: bool = False) -> Dict[str, List[Callable]]:
+        if is_async:
+            return {"request": [self.arequest_hook], "response": [self.aresponse_hook]}
+        return {"request": [self.request_hook], "response": [self.response_hook]}
+
+    def finish(self, response: httpx.Response, response_bytes: int) -> None:
+        request = response.request
+        timing = request.extensions[_TIMING_EXTENSION]
+        metrics = RequestMetrics(
+            method=request.method,
+            path=request.url.path,
+            status_code=response.status_code,
+            connect_time=timing.connect_time,
+            ttfb=timing.ttfb,
+            latency=time.perf_counter() - timing.start,
+            request_bytes=_get_request_bytes(request),
+            response_bytes=response_bytes,
+            queue_wait=response.extensions.get(QUEUE_WAIT_EXTENSION),
+            cached=bool(response.extensions.get(CACHE_HIT_EXTENSION)),
+        )
+        if self.enabled:
+            with self._lock:
+                stats = self._paths.get(metrics.path)
+                if stats is None:
+                    stats = self._paths[metrics.path] = _PathStats(self._window)
+                stats.add(metrics)
+        if self._callback is not None:
+            # A failing callback must not fail the call it observes.
+            try:
+                self._callback(metrics)
+            except Exception as e:
+                logger.warning(f"Client stats callback failed: {e}")
+
+    def summary(self, reset: bool = False) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            summary = {path: stats.summary() for path, stats in self._paths.items()}
+            if reset:
+                self._paths = {}
+        return summary
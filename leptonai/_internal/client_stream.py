@@ -0,0 +1,215 @@
+"""
+Incremental decoders for streamed responses, used by leptonai.client.Client when
+`stream_decoder` is set. DO NOT USE THESE CLASSES DIRECTLY. The only public
+class is ServerSentEvent, which is exposed as leptonai.client.ServerSentEvent.
+
+The decoders are fed with raw chunks as they arrive from the wire, and return the
+events that became complete, so the first event is available as soon as its last
+byte is received. Partial lines are kept in a single bytearray that is extended in
+place, instead of concatenating strings for every chunk.
+"""
+
+import json
+from typing import Any, List, Optional
+
+STREAM_DECODERS = ("auto", "sse", "ndjson")
+
+# OpenAI-compatible servers end a stream of server-sent events with this data.
+_SSE_DONE = "[DONE]"
+
+_NDJSON_CONTENT_TYPES = (
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/x-jsonlines",
+)
+
+
+class ServerSentEvent(object):
+    """
+    A server-sent event, as defined by the html living standard.
+    """
+
+    __slots__ = ("event", "data", "id", "retry")
+
+    def __init__(
+        self,
+        event: str = "message",
+        data: str = "",
+        id: Optional[str] = None,
+        retry: Optional[int] = None,
+    ):
+        self.event = event
+        self.data = data
+        self.id = id
+        self.retry = retry
+
+    def json(self) -> Any:
+        """
+        Returns the data of the event decoded as json.
+        """
+        return json.loads(self.data)
+
+    def __repr__(self):
+        return (
+            f"ServerSentEvent(event={self.event!r}, data={self.data!r},"
+            f" id={self.id!r}, retry={self.retry!r})"
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, ServerSentEvent) and all(
+            getattr(self, k) == getattr(other, k) for k in self.__slots__
+        )
+
+
+class _LineBuffer(object):
+    """
+    Splits a stream of byte chunks into lines, without the line terminator.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        # Everything before this offset is known to contain no newline.
+        self._scanned = 0
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        self._buffer += chunk
+        lines = []
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", max(start, self._scanned))
+            if end < 0:
+                break
+            line_end = end
+            if line_end > start and self._buffer[line_end - 1] == 0x0D:  # "\r"
+                line_end -= 1
+            lines.append(bytes(self._buffer[start:line_end]))
+            start = end + 1
+        if start:
+            del self._buffer[:start]
+        self._scanned = len(self._buffer)
+        return lines
+
+    def flush(self) -> List[bytes]:
+        """
+        Returns the last line if the stream did not end with a newline.
+        """
+        if not self._buffer:
+            return []
+        line = bytes(self._buffer).rstrip(b"\r")
+        self._buffer.clear()
+        self._scanned = 0
+        return [line]
+
+
+class _SSEDecoder(object):
+    """
+    Decodes a text/event-stream body into ServerSentEvent objects. Decoding stops
+    at an OpenAI-style "[DONE]" event, which is not returned.
+    """
+
+    def __init__(self):
+        self._lines = _LineBuffer()
+        self._event = ""
+        self._data: List[str] = []
+        self._id: Optional[str] = None
+        self._retry: Optional[int] = None
+        self.done = False
+
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        if not self._data and not self._event:
+            return None
+        data = "\n".join(self._data)
+        event = ServerSentEvent(
+            event=self._event or "message", data=data, id=self._id, retry=self._retry
+        )
+        self._event = ""
+        self._data = []
+        self._retry = None
+        if data == _SSE_DONE:
+            self.done = True
+            return None
+        return event
+
+    def _decode_lines(self, lines: List[bytes]) -> List[ServerSentEvent]:
+        events = []
+        for raw in lines:
+            if self.done:
+                break
+            if not raw:
+                event = self._dispatch()
+                if event is not None:
+                    events.append(event)
+                continue
+            line = raw.decode("utf-8")
+            if line.startswith(":"):
+                # comment, usually used as a keepalive.
+                continue
+            field, _, value = line.partition(":")
+            if value.startswith(" "):
+                value = value[1:]
+            if field == "data":
+                self._data.append(value)
+            elif field == "event":
+                self._event = value
+            elif field == "id":
+                if "\0" not in value:
+                    self._id = value
+            elif field == "retry":
+                try:
+                    self._retry = int(value)
+                except ValueError:
+                    pass
+        return events
+
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        return self._decode_lines(self._lines.feed(chunk))
+
+    def flush(self) -> List[ServerSentEvent]:
+        # A stream that ends without the final blank line still dispatches its
+        # last event.
+        return self._decode_lines(self._lines.flush() + [b""])
+
+
+class _NDJSONDecoder(object):
+    """
+    Decodes a newline delimited json body into json objects.
+    """
+
+    def __init__(self):
+        self._lines = _LineBuffer()
+        self.done = False
+
+    @staticmethod
+    def _decode_lines(lines: List[bytes]) -> List[Any]:
+        return [json.loads(line) for line in lines if line.strip()]
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        return self._decode_lines(self._lines.feed(chunk))
+
+    def flush(self) -> List[Any]:
+        return self._decode_lines(self._lines.flush())
+
+
+def _get_stream_decoder(mode: Optional[str], content_type: str):
+    """
+    Returns a decoder for the given stream_decoder mode and response content
+    type, or None if the response should be streamed as raw bytes.
+    """
+    if mode is None:
+        return None
+    if mode == "auto":
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        if media_type == "text/event-stream":
+            mode = "sse"
+        elif media_type in _NDJSON_CONTENT_TYPES:
+            mode = "ndjson"
+        else:
+            return None
+    if mode == "sse":
+        return _SSEDecoder()
+    elif mode == "ndjson":
+        return _NDJSONDecoder()
+    raise ValueError(
+        f"Unknown stream decoder {mode}. Supported decoders are {STREAM_DECODERS}."
+    )
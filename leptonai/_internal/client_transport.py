@@ -0,0 +1,748 @@
+"""
+Internal httpx transports used by leptonai.client.Client. DO NOT USE THESE
+CLASSES DIRECTLY. The only public class is RetryPolicy, which is exposed as
+leptonai.client.RetryPolicy.
+
+The transports wrap the default httpx transports, so that they work for both
+streaming and non-streaming calls, and for both the sync and async clients.
+"""
+
+import asyncio
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+import httpx
+
+# Connect-phase errors: the request has not been sent to the endpoint, so it is
+# always safe to send it to another endpoint.
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+LOAD_BALANCING_POLICIES = ("p2c", "least_outstanding")
+
+# Number of worker threads that send hedged calls, if the connection limit of the
+# client is not known. This is the default connection limit of httpx.
+_DEFAULT_HEDGE_WORKERS = 100
+
+
+class _Endpoint(object):
+    """
+    The runtime state of one endpoint in an _EndpointPool.
+    """
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+        # When the endpoint is ejected, the time after which it may be probed again.
+        self.retry_at = 0.0
+        self.probing = False
+
+    def status(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "failures": self.failures,
+        }
+
+
+class _EndpointPool(object):
+    """
+    A set of endpoints that serve the same deployment, with the bookkeeping needed
+    to route each request to one of them:
+    - "p2c" (power of two choices) picks two random healthy endpoints and routes to
+      the one with fewer outstanding requests.
+    - "least_outstanding" routes to the healthy endpoint with the fewest
+      outstanding requests.
+    Endpoints that fail to connect or fail healthz are ejected, and re-admitted
+    after a successful healthz probe. Probes are attempted with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        policy: str = "p2c",
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        if policy not in LOAD_BALANCING_POLICIES:
+            raise ValueError(
+                f"Unknown load balancing policy {policy}. Supported policies are"
+                f" {LOAD_BALANCING_POLICIES}."
+            )
+        self.endpoints: List[_Endpoint] = [_Endpoint(url) for url in urls]
+        if not self.endpoints:
+            raise ValueError("At least one endpoint is needed.")
+        self.policy = policy
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+
+    def _pick(self, candidates: List[_Endpoint]) -> _Endpoint:
+        if self.policy == "p2c" and len(candidates) > 2:
+            first, second = random.sample(candidates, 2)
+            return first if first.outstanding <= second.outstanding else second
+        fewest = min(e.outstanding for e in candidates)
+        return random.choice([e for e in candidates if e.outstanding == fewest])
+
+    def acquire(self, exclude: Iterable[_Endpoint] = ()):
+        """
+        Picks an endpoint and counts a request as outstanding on it. Returns a
+        tuple (endpoint, should_probe). If should_probe is True, the endpoint is
+        an ejected one whose backoff has expired, and the caller should probe its
+        health before sending the request, then call admit() or eject().
+        """
+        now = time.time()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude]
+            if not candidates:
+                candidates = self.endpoints
+            for e in candidates:
+                if not e.healthy and not e.probing and e.retry_at <= now:
+                    e.probing = True
+                    e.outstanding += 1
+                    return e, True
+            healthy = [e for e in candidates if e.healthy]
+            if healthy:
+                endpoint = self._pick(healthy)
+            else:
+                # Everything is ejected: rather than failing outright, fall back to
+                # the endpoint that is expected to recover first.
+                endpoint = min(candidates, key=lambda e: e.retry_at)
+            endpoint.outstanding += 1
+            return endpoint, False
+
+    def release(self, endpoint: _Endpoint) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+
+    def admit(self, endpoint: _Endpoint) -> None:
+        with self._lock:
+            endpoint.healthy = True
+            endpoint.probing = False
+            endpoint.failures = 0
+            endpoint.retry_at = 0.0
+
+    def eject(self, endpoint: _Endpoint) -> None:
+        with self._lock:
+            endpoint.healthy = False
+            endpoint.probing = False
+            endpoint.failures += 1
+            backoff = min(
+                self.max_backoff, self.base_backoff * 2 ** (endpoint.failures - 1)
+            )
+            endpoint.retry_at = time.time() + backoff * random.uniform(0.5, 1.0)
+
+    def status(self):
+        with self._lock:
+            return [e.status() for e in self.endpoints]
+
+
+def _rewrite(
+    request: httpx.Request, url: str, base_url: str, endpoint: _Endpoint
+) -> None:
+    """
+    Points a request whose original url was built against base_url to the given
+    endpoint.
+    """
+    if url.startswith(base_url):
+        request.url = httpx.URL(endpoint.url + url[len(base_url) :])  # noqa: E203
+        request.headers["Host"] = request.url.netloc.decode("ascii")
+
+
+def _probe_requests(headers: httpx.Headers, endpoint: _Endpoint):
+    # Reuse the auth token of the client or of the request being routed.
+    auth = {k: v for k, v in headers.items() if k.lower() == "authorization"}
+    return [
+        httpx.Request("GET", f"{endpoint.url}{path}", headers=auth)
+        for path in ("/healthz", "/health")
+    ]
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """
+    Wraps a response stream, and calls release exactly once when it is closed.
+    """
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """
+    The async counterpart of _ReleasingStream.
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _BalancingTransport(httpx.BaseTransport):
+    """
+    A transport that sends every request built against base_url to one of the
+    endpoints of an _EndpointPool.
+    """
+
+    def __init__(
+        self, transport: httpx.BaseTransport, pool: _EndpointPool, base_url: str
+    ):
+        self._transport = transport
+        self._pool = pool
+        self._base_url = base_url
+
+    def _probe(self, headers: httpx.Headers, endpoint: _Endpoint) -> bool:
+        for probe in _probe_requests(headers, endpoint):
+            try:
+                res = self._transport.handle_request(probe)
+                res.close()
+                if res.status_code < 400:
+                    return True
+            except httpx.HTTPError:
+                continue
+        return False
+
+    def check_endpoints(self, headers: httpx.Headers) -> bool:
+        """
+        Probes the health of all endpoints, ejecting or admitting them
+        accordingly. Returns whether any endpoint is healthy.
+        """
+        any_healthy = False
+        for endpoint in self._pool.endpoints:
+            if self._probe(headers, endpoint):
+                self._pool.admit(endpoint)
+                any_healthy = True
+            else:
+                self._pool.eject(endpoint)
+        return any_healthy
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        tried: List[_Endpoint] = []
+        while True:
+            endpoint, should_probe = self._pool.acquire(exclude=tried)
+            tried.append(endpoint)
+            try:
+                if should_probe:
+                    if self._probe(request.headers, endpoint):
+                        self._pool.admit(endpoint)
+                    else:
+                        self._pool.eject(endpoint)
+                        self._pool.release(endpoint)
+                        continue
+                _rewrite(request, url, self._base_url, endpoint)
+                res = self._transport.handle_request(request)
+            except _CONNECT_ERRORS:
+                self._pool.eject(endpoint)
+                self._pool.release(endpoint)
+                if len(tried) >= len(self._pool.endpoints):
+                    raise
+                continue
+            except BaseException:
+                self._pool.release(endpoint)
+                raise
+            return httpx.Response(
+                status_code=res.status_code,
+                headers=res.headers,
+                stream=_ReleasingStream(
+                    res.stream, lambda: self._pool.release(endpoint)  # type: ignore
+                ),
+                extensions=res.extensions,
+            )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _AsyncBalancingTransport(httpx.AsyncBaseTransport):
+    """
+    The async counterpart of _BalancingTransport.
+    """
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport, pool: _EndpointPool, base_url: str
+    ):
+        self._transport = transport
+        self._pool = pool
+        self._base_url = base_url
+
+    async def _probe(self, headers: httpx.Headers, endpoint: _Endpoint) -> bool:
+        for probe in _probe_requests(headers, endpoint):
+            try:
+                res = await self._transport.handle_async_request(probe)
+                await res.aclose()
+                if res.status_code < 400:
+                    return True
+            except httpx.HTTPError:
+                continue
+        return False
+
+    async def check_endpoints(self, headers: httpx.Headers) -> bool:
+        any_healthy = False
+        for endpoint in self._pool.endpoints:
+            if await self._probe(headers, endpoint):
+                self._pool.admit(endpoint)
+                any_healthy = True
+            else:
+                self._pool.eject(endpoint)
+        return any_healthy
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        tried: List[_Endpoint] = []
+        while True:
+            endpoint, should_probe = self._pool.acquire(exclude=tried)
+            tried.append(endpoint)
+            try:
+                if should_probe:
+                    if await self._probe(request.headers, endpoint):
+                        self._pool.admit(endpoint)
+                    else:
+                        self._pool.eject(endpoint)
+                        self._pool.release(endpoint)
+                        continue
+                _rewrite(request, url, self._base_url, endpoint)
+                res = await self._transport.handle_async_request(request)
+            except _CONNECT_ERRORS:
+                self._pool.eject(endpoint)
+                self._pool.release(endpoint)
+                if len(tried) >= len(self._pool.endpoints):
+                    raise
+                continue
+            except BaseException:
+                self._pool.release(endpoint)
+                raise
+            return httpx.Response(
+                status_code=res.status_code,
+                headers=res.headers,
+                stream=_AsyncReleasingStream(
+                    res.stream, lambda: self._pool.release(endpoint)  # type: ignore
+                ),
+                extensions=res.extensions,
+            )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class RetryPolicy(object):
+    """
+    An opt-in retry and hedging policy for leptonai.client.Client. It is also the
+    retry policy of leptonai.api.v2.APIClient, which does not hedge.
+
+    Retries: a call is retried with jittered exponential backoff when
+    - the connection could not be established, or the server returned 429 or
+      503, in which cases the request was not processed by the server;
+    - the call is idempotent, and it timed out while reading the response, or the
+      server returned 502 or 504.
+    If the server returns a Retry-After header, the client waits for the given
+    time instead of the backoff. If Retry-After asks for longer than backoff_max,
+    the response is returned to the caller without retrying.
+
+    Hedging: if hedge is True, an idempotent call that has not received a
+    response after the hedge_quantile (default p95) latency of its path sends an
+    identical duplicate request. The first response wins, and the other request
+    is cancelled (for the async client) or discarded (for the sync client). The
+    sync client sends hedged calls from a pool of threads as large as its
+    connection limit, and sends the calls beyond it without hedging.
+
+    Calls with one of the idempotent_methods (default GET and HEAD) are
+    considered idempotent. POST endpoints are considered idempotent only if they
+    are listed in idempotent_paths, e.g. ["run", "embed"].
+
+    If deadline is set, a call is not retried once the retry would start more
+    than deadline seconds after the call was first sent.
+    """
+
+    ALWAYS_RETRY_STATUSES = (429, 503)
+    IDEMPOTENT_RETRY_STATUSES = (502, 504)
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        idempotent_paths: Iterable[str] = (),
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        idempotent_methods: Iterable[str] = ("GET", "HEAD"),
+        deadline: Optional[float] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.idempotent_paths = {"/" + p.strip("/") for p in idempotent_paths}
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.idempotent_methods = {m.upper() for m in idempotent_methods}
+        self.deadline = deadline
+
+    def is_idempotent(self, method: str, path: str) -> bool:
+        return method in self.idempotent_methods or path in self.idempotent_paths
+
+    def within_deadline(self, start: float, delay: float) -> bool:
+        """
+        Returns whether a retry that waits delay seconds would start within the
+        deadline of a call first sent at start.
+        """
+        return self.deadline is None or time.time() + delay - start <= self.deadline
+
+    def should_retry_error(self, e: Exception, idempotent: bool) -> bool:
+        if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True
+        return idempotent and isinstance(
+            e, (httpx.ReadTimeout, httpx.ReadError, httpx.RemoteProtocolError)
+        )
+
+    def should_retry_status(self, status_code: int, idempotent: bool) -> bool:
+        return status_code in self.ALWAYS_RETRY_STATUSES or (
+            idempotent and status_code in self.IDEMPOTENT_RETRY_STATUSES
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None):
+        """
+        Returns the number of seconds to wait before the given retry attempt
+        (starting from 0), or None if the server asked to wait for longer than
+        backoff_max.
+        """
+        if retry_after is not None:
+            delay = _parse_retry_after(retry_after)
+            if delay is not None:
+                return delay if delay <= self.backoff_max else None
+        # "full jitter" exponential backoff.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    """
+    Parses a Retry-After header, which is either a number of seconds or an
+    http date. Returns None if it cannot be parsed.
+    """
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class _LatencyWindow(object):
+    """
+    A rolling window of the most recent latencies of a path, used to estimate
+    latency quantiles.
+    """
+
+    def __init__(self, size: int = 256, refresh_every: int = 16):
+        self._latencies: deque = deque(maxlen=size)
+        self._refresh_every = refresh_every
+        self._since_refresh = 0
+        self._sorted: List[float] = []
+        self._lock = threading.Lock()
+
+    def add(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._since_refresh += 1
+
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+            if self._since_refresh >= self._refresh_every or not self._sorted:
+                self._sorted = sorted(self._latencies)
+                self._since_refresh = 0
+            values = self._sorted
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _copy_request(request: httpx.Request, url: httpx.URL) -> httpx.Request:
+    """
+    Returns a copy of the request pointing to url, so that retried and hedged
+    attempts do not share state that inner transports may rewrite.
+    """
+    return httpx.Request(
+        request.method,
+        url,
+        headers=request.headers.copy(),
+        stream=request.stream,
+        extensions=dict(request.extensions),
+    )
+
+
+def _is_replayable(request: httpx.Request) -> bool:
+    # Only requests with an in-memory body can be sent more than once.
+    return isinstance(request.stream, httpx.ByteStream)
+
+
+class _RetryTransport(httpx.BaseTransport):
+    """
+    A transport that retries and hedges requests according to a RetryPolicy.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        policy: RetryPolicy,
+        base_url: str,
+        max_workers: Optional[int] = None,
+    ):
+        self._transport = transport
+        self._policy = policy
+        self._base_url = base_url
+        self._latencies: Dict[str, _LatencyWindow] = defaultdict(_LatencyWindow)
+        # The primary and the hedge of a call are sent from worker threads. A
+        # request only takes a worker that is free, and is otherwise sent from the
+        # caller's thread without hedging, so that it never queues behind others.
+        max_workers = max_workers or _DEFAULT_HEDGE_WORKERS
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="lepton-hedge"
+        )
+        self._free_workers = threading.BoundedSemaphore(max_workers)
+
+    def _path(self, url: httpx.URL) -> str:
+        url_str = str(url).split("?", 1)[0]
+        if url_str.startswith(self._base_url):
+            return "/" + url_str[len(self._base_url) :].strip("/")  # noqa: E203
+        return url.path
+
+    def _timed_send(self, request: httpx.Request, path: str) -> httpx.Response:
+        start = time.time()
+        res = self._transport.handle_request(request)
+        if not res.is_error:
+            self._latencies[path].add(time.time() - start)
+        return res
+
+    def _submit(self, request: httpx.Request, path: str) -> Optional[Future]:
+        """
+        Sends the request from a free worker thread, or returns None if all the
+        workers are busy.
+        """
+        if not self._free_workers.acquire(blocking=False):
+            return None
+        try:
+            future = self._executor.submit(self._timed_send, request, path)
+        except BaseException:
+            self._free_workers.release()
+            raise
+        future.add_done_callback(lambda _: self._free_workers.release())
+        return future
+
+    def _hedged_send(
+        self, request: httpx.Request, url: httpx.URL, path: str
+    ) -> httpx.Response:
+        policy = self._policy
+        delay = self._latencies[path].quantile(
+            policy.hedge_quantile, policy.hedge_min_samples
+        )
+        primary = self._submit(request, path) if delay is not None else None
+        if primary is None:
+            return self._timed_send(request, path)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        hedge = self._submit(_copy_request(request, url), path)
+        if hedge is None:
+            return primary.result()
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        loser = hedge if winner is primary else primary
+        if winner.exception() is not None:
+            # The first attempt to finish failed: the other one is our best bet.
+            return loser.result()
+        # A blocking request cannot be interrupted, so the losing response is
+        # closed as soon as it arrives.
+        loser.add_done_callback(_close_response_quietly)
+        return winner.result()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self._policy
+        url = request.url
+        path = self._path(url)
+        idempotent = policy.is_idempotent(request.method, path)
+        replayable = _is_replayable(request)
+        hedge = policy.hedge and idempotent and replayable
+        start = time.time()
+        attempt = 0
+        while True:
+            attempt_request = _copy_request(request, url) if attempt else request
+            try:
+                if hedge:
+                    res = self._hedged_send(attempt_request, url, path)
+                else:
+                    res = self._timed_send(attempt_request, path)
+            except httpx.TransportError as e:
+                if (
+                    not replayable
+                    or attempt >= policy.max_retries
+                    or not policy.should_retry_error(e, idempotent)
+                ):
+                    raise
+                delay = policy.backoff(attempt)
+                if not policy.within_deadline(start, delay):
+                    raise
+            else:
+                if (
+                    not replayable
+                    or attempt >= policy.max_retries
+                    or not policy.should_retry_status(res.status_code, idempotent)
+                ):
+                    return res
+                delay = policy.backoff(attempt, res.headers.get("retry-after"))
+                if delay is None or not policy.within_deadline(start, delay):
+                    return res
+                res.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._transport.close()
+
+
+def _close_response_quietly(future: Future) -> None:
+    try:
+        future.result().close()
+    except Exception:
+        pass
+
+
+class _AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """
+    The async counterpart of _RetryTransport. The losing request of a hedged pair
+    is cancelled.
+    """
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport, policy: RetryPolicy, base_url: str
+    ):
+        self._transport = transport
+        self._policy = policy
+        self._base_url = base_url
+        self._latencies: Dict[str, _LatencyWindow] = defaultdict(_LatencyWindow)
+
+    _path = _RetryTransport._path
+
+    async def _timed_send(self, request: httpx.Request, path: str) -> httpx.Response:
+        start = time.time()
+        res = await self._transport.handle_async_request(request)
+        if not res.is_error:
+            self._latencies[path].add(time.time() - start)
+        return res
+
+    async def _hedged_send(
+        self, request: httpx.Request, url: httpx.URL, path: str
+    ) -> httpx.Response:
+        policy = self._policy
+        delay = self._latencies[path].quantile(
+            policy.hedge_quantile, policy.hedge_min_samples
+        )
+        if delay is None:
+            return await self._timed_send(request, path)
+        primary = asyncio.ensure_future(self._timed_send(request, path))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        hedge = asyncio.ensure_future(
+            self._timed_send(_copy_request(request, url), path)
+        )
+        try:
+            done, _ = await asyncio.wait(
+                {primary, hedge}, return_when=asyncio.FIRST_COMPLETED
+            )
+        except BaseException:
+            primary.cancel()
+            hedge.cancel()
+            raise
+        winner = primary if primary in done else hedge
+        loser = hedge if winner is primary else primary
+        if winner.exception() is not None:
+            return await loser
+        loser.cancel()
+        if loser.done() and not loser.cancelled() and loser.exception() is None:
+            await loser.result().aclose()
+        return winner.result()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self._policy
+        url = request.url
+        path = self._path(url)
+        idempotent = policy.is_idempotent(request.method, path)
+        replayable = _is_replayable(request)
+        hedge = policy.hedge and idempotent and replayable
+        start = time.time()
+        attempt = 0
+        while True:
+            attempt_request = _copy_request(request, url) if attempt else request
+            try:
+                if hedge:
+                    res = await self._hedged_send(attempt_request, url, path)
+                else:
+                    res = await self._timed_send(attempt_request, path)
+            except httpx.TransportError as e:
+                if (
+                    not replayable
+                    or attempt >= policy.max_retries
+                    or not policy.should_retry_error(e, idempotent)
+                ):
+                    raise
+                delay = policy.backoff(attempt)
+                if not policy.within_deadline(start, delay):
+                    raise
+            else:
+                if (
+                    not replayable
+                    or attempt >= policy.max_retries
+                    or not policy.should_retry_status(res.status_code, idempotent)
+                ):
+                    return res
+                delay = policy.backoff(attempt, res.headers.get("retry-after"))
+                if delay is None or not policy.within_deadline(start, delay):
+                    return res
+                await res.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
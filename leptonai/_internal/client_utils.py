@@ -1,4 +1,14 @@
-from typing import Dict, Tuple
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from leptonai import config
 
 
 def _json_to_type_string(schema: Dict) -> str:
@@ -78,6 +88,20 @@ def _get_requestbody_input_schema(openapi: Dict, api_info: Dict) -> Dict:
     return schema
 
 
+def _get_requestbody_content_types(openapi: Dict, path_name: str) -> List[str]:
+    """
+    Get the content types that the post method of the given path accepts as its
+    request body, such as "application/json" or "multipart/form-data". Returns an
+    empty list if the openapi specification does not declare any.
+    """
+    try:
+        return list(
+            openapi["paths"][path_name]["post"]["requestBody"]["content"].keys()
+        )
+    except (KeyError, AttributeError, TypeError):
+        return []
+
+
 def _get_method_docstring(openapi: Dict, path_name: str) -> str:
     """
     Get the docstring for a method from the openapi specification.
@@ -209,3 +233,70 @@ def _get_positional_argument_error_message(
             additional_message = ""
         POSITIONAL_ARGUMENT_ERROR_MESSAGE += additional_message
     return POSITIONAL_ARGUMENT_ERROR_MESSAGE
+
+
+def _get_openapi_cache_file(url: str) -> Path:
+    """
+    Get the path of the on-disk openapi cache file for the given deployment url.
+    """
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return config.CACHE_DIR / "client_openapi" / f"{key}.json"
+
+
+def _load_cached_openapi(url: str) -> Optional[Dict]:
+    """
+    Load the cached openapi entry for the given url. The entry is a dict with
+    keys "url", "openapi", "fetched_at", "etag" and "last_modified". Returns None
+    if there is no usable cache entry.
+    """
+    try:
+        with open(_get_openapi_cache_file(url), "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get("url") != url:
+        # corrupted entry, or (very unlikely) a hash collision.
+        return None
+    if "openapi" not in entry or "fetched_at" not in entry:
+        return None
+    return entry
+
+
+def _save_cached_openapi(url: str, response: httpx.Response, openapi: Dict) -> None:
+    """
+    Save the openapi spec of the given url to the on-disk cache, together with the
+    validators of the response. Failures are silently ignored, as the cache is only
+    an optimization.
+    """
+    cache_file = _get_openapi_cache_file(url)
+    entry = {
+        "url": url,
+        "openapi": openapi,
+        "fetched_at": time.time(),
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+    }
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first and rename, so that concurrent clients
+        # never read a partially written cache file.
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        pass
+
+
+def _get_conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+    """
+    Get the conditional request headers to revalidate a cached entry.
+    """
+    headers: Dict[str, str] = {}
+    if entry is None:
+        return headers
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
@@ -0,0 +1,191 @@
+"""
+WebSocket connections for leptonai.client.Client, built on the optional
+`websockets` package (version 13 or later). DO NOT CREATE THESE CLASSES DIRECTLY:
+use `client.websocket(path)`, or the methods that the client creates for the
+websocket endpoints of a deployment.
+
+OpenAPI does not describe websockets, so a deployment marks a websocket endpoint
+with an `x-websocket: true` extension on its path item or on its get operation,
+or by declaring a 101 Switching Protocols response for the get operation.
+"""
+
+import json
+from typing import Any, Dict, Iterator, Optional, Union
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+# Extension that marks a path of the openapi specification as a websocket.
+WEBSOCKET_EXTENSION = "x-websocket"
+
+Message = Union[str, bytes]
+
+
+def _is_websocket_path(path_item: Dict) -> bool:
+    if path_item.get(WEBSOCKET_EXTENSION):
+        return True
+    get = path_item.get("get")
+    if not isinstance(get, dict):
+        return False
+    return bool(get.get(WEBSOCKET_EXTENSION)) or "101" in get.get("responses", {})
+
+
+def _check_websockets_installed() -> None:
+    if websockets is None:
+        raise ImportError(
+            "WebSocket endpoints require the websockets package (version 13 or"
+            " later). Install it with `pip install websockets`."
+        )
+
+
+def _websocket_url(url: str) -> str:
+    if url.startswith("https://"):
+        return "wss://" + url[len("https://") :]  # noqa: E203
+    if url.startswith("http://"):
+        return "ws://" + url[len("http://") :]  # noqa: E203
+    return url
+
+
+def _encode(message: Any) -> Message:
+    # str is sent as a text frame and bytes as a binary frame; anything else is
+    # sent as json text.
+    if isinstance(message, (str, bytes)):
+        return message
+    if isinstance(message, (bytearray, memoryview)):
+        return bytes(message)
+    return json.dumps(message)
+
+
+class WebSocketConnection(object):
+    """
+    A websocket connection to an endpoint of a deployment, returned by
+    `Client.websocket()`. Text frames are received as str, and binary frames as
+    bytes. The connection sends pings every `heartbeat` seconds, and is closed if
+    the server does not answer them in time.
+
+        with client.websocket("/stream") as ws:
+            ws.send(audio_chunk)
+            for message in ws:
+                ...
+    """
+
+    def __init__(
+        self, url: str, headers: Dict[str, str], heartbeat: Optional[float], **kwargs
+    ):
+        _check_websockets_installed()
+        from websockets.sync.client import connect
+
+        self.url = url
+        self._connection = connect(
+            url,
+            additional_headers=headers,
+            ping_interval=heartbeat,
+            ping_timeout=heartbeat,
+            **kwargs,
+        )
+
+    def send(self, message: Any) -> None:
+        """
+        Sends a message: a str as a text frame, bytes as a binary frame, and any
+        other json serializable object as json text.
+        """
+        self._connection.send(_encode(message))
+
+    def recv(self, timeout: Optional[float] = None) -> Message:
+        """
+        Receives the next message, waiting at most timeout seconds if given.
+        """
+        return self._connection.recv(timeout=timeout)
+
+    def recv_json(self, timeout: Optional[float] = None) -> Any:
+        """
+        Receives the next message and decodes it as json.
+        """
+        return json.loads(self.recv(timeout=timeout))
+
+    def __iter__(self) -> Iterator[Message]:
+        """
+        Iterates over the received messages until the connection is closed.
+        """
+        return iter(self._connection)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "WebSocketConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncWebSocketConnection(object):
+    """
+    The asyncio counterpart of WebSocketConnection, returned by
+    `AsyncClient.websocket()`. It is connected by awaiting it, or by using it as
+    an async context manager:
+
+        async with client.websocket("/stream") as ws:
+            await ws.send(audio_chunk)
+            async for message in ws:
+                ...
+    """
+
+    def __init__(
+        self, url: str, headers: Dict[str, str], heartbeat: Optional[float], **kwargs
+    ):
+        _check_websockets_installed()
+        self.url = url
+        self._headers = headers
+        self._heartbeat = heartbeat
+        self._kwargs = kwargs
+        self._connection = None
+
+    async def connect(self) -> "AsyncWebSocketConnection":
+        from websockets.asyncio.client import connect
+
+        if self._connection is None:
+            self._connection = await connect(
+                self.url,
+                additional_headers=self._headers,
+                ping_interval=self._heartbeat,
+                ping_timeout=self._heartbeat,
+                **self._kwargs,
+            )
+        return self
+
+    def __await__(self):
+        return self.connect().__await__()
+
+    async def send(self, message: Any) -> None:
+        """
+        Sends a message, see `WebSocketConnection.send`.
+        """
+        await self._connection.send(_encode(message))  # type: ignore
+
+    async def recv(self) -> Message:
+        """
+        Receives the next message.
+        """
+        return await self._connection.recv()  # type: ignore
+
+    async def recv_json(self) -> Any:
+        """
+        Receives the next message and decodes it as json.
+        """
+        return json.loads(await self.recv())
+
+    def __aiter__(self):
+        return self._connection.__aiter__()  # type: ignore
+
+    async def aclose(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+
+    async def __aenter__(self) -> "AsyncWebSocketConnection":
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
@@ -0,0 +1,82 @@
+"""
+Connection warmup and keepalive helpers shared by leptonai.client.Client and
+leptonai.api.v2.client.APIClient. DO NOT USE THESE DIRECTLY: call the `warmup()`
+methods of the clients instead.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, Callable
+import weakref
+
+from loguru import logger
+
+# How long a warmup request waits for the others to hold their connections.
+_WARMUP_TIMEOUT = 30.0
+
+
+def _hold_concurrently(
+    n: int,
+    open_response: Callable[[], Any],
+    finish: Callable[[Any], None],
+    timeout: float = _WARMUP_TIMEOUT,
+) -> None:
+    """
+    Opens n responses at the same time, so that each of them takes its own pooled
+    connection, then finishes them, which returns the connections to the pool. A
+    response holds its connection until its body is read, so the bodies are only
+    read once all the responses have been opened.
+    """
+    barrier = threading.Barrier(n)
+
+    def _one(_) -> None:
+        try:
+            res = open_response()
+        except BaseException:
+            # Do not keep the others waiting for a connection that never comes.
+            barrier.abort()
+            raise
+        try:
+            barrier.wait(timeout)
+        except threading.BrokenBarrierError:
+            pass
+        finally:
+            finish(res)
+
+    if n == 1:
+        _one(None)
+        return
+    with ThreadPoolExecutor(n, thread_name_prefix="lepton-warmup") as executor:
+        list(executor.map(_one, range(n)))
+
+
+class _KeepaliveThread(threading.Thread):
+    """
+    A daemon thread that calls ping(owner) every interval seconds until it is
+    stopped, or until the owner, such as a client, is garbage collected. Only a
+    weak reference to the owner is kept, so that a client dropped without
+    stopping its pings is still collected. Failed pings are logged and do not
+    stop the thread.
+    """
+
+    def __init__(self, owner: Any, ping: Callable[[Any], None], interval: float):
+        super().__init__(name="lepton-keepalive", daemon=True)
+        self._owner = weakref.ref(owner)
+        self._ping = ping
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            owner = self._owner()
+            if owner is None:
+                return
+            try:
+                self._ping(owner)
+            except Exception as e:
+                logger.debug(f"Keepalive ping failed: {e}")
+            # Do not hold the owner while waiting for the next ping.
+            del owner
+
+    def stop(self) -> None:
+        self._stopped.set()
@@ -0,0 +1,81 @@
+import datetime
+import enum
+import json
+from typing import List, Optional
+import unittest
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from leptonai._internal.client_encoding import _encode_json_body
+from leptonai.types import File
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+class Message(BaseModel):
+    role: str
+    content: str
+    name: Optional[str] = None
+
+
+class Request(BaseModel):
+    messages: List[Message]
+    max_tokens: int = Field(16, alias="maxTokens")
+    image: Optional[File] = None
+
+
+class TestEncodeJsonBody(unittest.TestCase):
+    def assertSameAsJsonableEncoder(self, obj):
+        self.assertEqual(json.loads(_encode_json_body(obj)), jsonable_encoder(obj))
+
+    def test_builtin_types(self):
+        self.assertSameAsJsonableEncoder(
+            {"x": 1, "y": [1.5, "a", None, True], "z": {"nested": ("t", 2)}}
+        )
+        self.assertEqual(_encode_json_body({"x": "é"}), '{"x":"é"}'.encode("utf-8"))
+
+    def test_special_types(self):
+        self.assertSameAsJsonableEncoder({
+            "file": File(b"\x00\x01"),
+            "url": File("https://example.com/a.png"),
+            "request": Request(
+                messages=[Message(role="user", content="hi")],
+                maxTokens=8,
+                image=File(b"abc"),
+            ),
+            "when": datetime.datetime(2024, 1, 2, 3, 4, 5),
+            "color": Color.RED,
+            "raw": b"bytes",
+        })
+
+    def test_fallback_to_jsonable_encoder(self):
+        # date keys are not supported by the json encoder.
+        self.assertSameAsJsonableEncoder({"x": {datetime.date(2024, 1, 1): 1}})
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_numpy(self):
+        body = _encode_json_body({
+            "embedding": np.arange(4, dtype=np.float32),
+            "matrix": np.ones((2, 2), dtype=np.int64),
+            "scale": np.float64(0.5),
+        })
+        self.assertEqual(
+            json.loads(body),
+            {
+                "embedding": [0.0, 1.0, 2.0, 3.0],
+                "matrix": [[1, 1], [1, 1]],
+                "scale": 0.5,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
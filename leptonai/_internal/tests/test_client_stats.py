@@ -0,0 +1,66 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import unittest
+
+import httpx
+
+from leptonai._internal.client_stats import _StatsRecorder
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestStatsRecorder(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d/ping" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_chains_trace_callback(self):
+        recorder = _StatsRecorder()
+        events = []
+        with httpx.Client(event_hooks=recorder.event_hooks()) as client:
+            client.get(
+                self.url, extensions={"trace": lambda name, info: events.append(name)}
+            )
+        self.assertIn("connection.connect_tcp.started", events)
+        stats = recorder.summary()["/ping"]
+        self.assertEqual(stats["new_connections"], 1)
+        self.assertEqual(stats["connect_time"]["count"], 1)
+
+    def test_chains_async_trace_callback(self):
+        recorder = _StatsRecorder()
+        events = []
+
+        async def _trace(name, info):
+            events.append(name)
+
+        async def _main():
+            async with httpx.AsyncClient(
+                event_hooks=recorder.event_hooks(is_async=True)
+            ) as client:
+                response = await client.get(self.url, extensions={"trace": _trace})
+                await response.aclose()
+
+        asyncio.run(_main())
+        self.assertIn("connection.connect_tcp.started", events)
+        self.assertEqual(recorder.summary()["/ping"]["new_connections"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from leptonai._internal.client_stream import (
+    ServerSentEvent,
+    _LineBuffer,
+    _get_stream_decoder,
+)
+
+
+def _feed_all(decoder, body: bytes, chunk_size: int):
+    items = []
+    for i in range(0, len(body), chunk_size):
+        items.extend(decoder.feed(body[i : i + chunk_size]))  # noqa: E203
+        if decoder.done:
+            return items
+    return items + decoder.flush()
+
+
+class TestLineBuffer(unittest.TestCase):
+    def test_lines_across_chunks(self):
+        buffer = _LineBuffer()
+        self.assertEqual(buffer.feed(b"ab"), [])
+        self.assertEqual(buffer.feed(b"c\r\nde\nf"), [b"abc", b"de"])
+        self.assertEqual(buffer.feed(b"\n\n"), [b"f", b""])
+        self.assertEqual(buffer.feed(b"tail"), [])
+        self.assertEqual(buffer.flush(), [b"tail"])
+        self.assertEqual(buffer.flush(), [])
+
+
+class TestSSEDecoder(unittest.TestCase):
+    BODY = (
+        b": keepalive\n\n"
+        b'data: {"delta": "Hel"}\n\n'
+        b"event: update\r\nid: 7\r\ndata: line 1\r\ndata: line 2\r\n\r\n"
+        b"retry: 1000\ndata:no-space\n\n"
+        b"data: [DONE]\n\n"
+        b"data: after done\n\n"
+    )
+    EXPECTED = [
+        ServerSentEvent(data='{"delta": "Hel"}'),
+        ServerSentEvent(event="update", data="line 1\nline 2", id="7"),
+        ServerSentEvent(data="no-space", id="7", retry=1000),
+    ]
+
+    def test_every_chunk_size(self):
+        for chunk_size in range(1, len(self.BODY) + 1):
+            decoder = _get_stream_decoder("sse", "")
+            self.assertEqual(
+                _feed_all(decoder, self.BODY, chunk_size), self.EXPECTED, chunk_size
+            )
+            self.assertTrue(decoder.done)
+        self.assertEqual(self.EXPECTED[0].json(), {"delta": "Hel"})
+
+    def test_last_event_without_blank_line(self):
+        decoder = _get_stream_decoder("sse", "")
+        self.assertEqual(_feed_all(decoder, b"data: x", 3), [ServerSentEvent(data="x")])
+
+
+class TestNDJSONDecoder(unittest.TestCase):
+    def test_every_chunk_size(self):
+        body = b'{"a": 1}\n\n{"b": [1, 2]}\r\n"tail"'
+        for chunk_size in range(1, len(body) + 1):
+            decoder = _get_stream_decoder("ndjson", "")
+            self.assertEqual(
+                _feed_all(decoder, body, chunk_size), [{"a": 1}, {"b": [1, 2]}, "tail"]
+            )
+
+
+class TestGetStreamDecoder(unittest.TestCase):
+    def test_auto(self):
+        self.assertIsNone(_get_stream_decoder(None, "text/event-stream"))
+        self.assertIsNone(_get_stream_decoder("auto", "audio/mpeg"))
+        self.assertIsNotNone(
+            _get_stream_decoder("auto", "text/event-stream; charset=utf-8")
+        )
+        self.assertIsNotNone(_get_stream_decoder("auto", "application/x-ndjson"))
+        with self.assertRaises(ValueError):
+            _get_stream_decoder("xml", "")
+
+
+if __name__ == "__main__":
+    unittest.main()
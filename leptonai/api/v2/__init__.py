@@ -13,14 +13,15 @@ the platform. Typical usage::
 Resource groups (``client.deployment``, ``client.job``, ``client.pod``,
 ``client.secret``, ``client.ingress``, ``client.storage``, ``client.log``,
 ``client.raycluster``, ``client.nodegroup``, ``client.template``) each expose
-the operations for that resource. Data types live under
+the operations for that resource. ``AsyncAPIClient`` holds the same resource
+groups with awaitable methods. Data types live under
 :mod:`leptonai.api.v2.types`.
 
 Note that the web API is primarily intended for the ``lep`` CLI and the web
 console; there is no SLA guarantee for high-frequency programmatic use.
 """
 
-from .client import APIClient
+from .client import APIClient, AsyncAPIClient, APICache, RetryPolicy
 from .workspace_record import WorkspaceRecord
 from .api_resource import APIResourse, ClientError, ServerError
 from .utils import (
@@ -35,6 +36,9 @@ from . import types
 
 __all__ = [
     "APIClient",
+    "AsyncAPIClient",
+    "APICache",
+    "RetryPolicy",
     "WorkspaceRecord",
     "APIResourse",
     "ClientError",
@@ -1,6 +1,11 @@
-from pydantic import BaseModel
+from functools import lru_cache
+import json
+
+from pydantic import BaseModel, Field, TypeAdapter
 from requests import Response
+from typing_extensions import Annotated, TypedDict
 from typing import (
+    AsyncIterator,
     Dict,
     Optional,
     Union,
@@ -11,6 +16,11 @@ from typing import (
     NoReturn,
 )
 
+try:
+    from pydantic_core import from_json as _from_json
+except ImportError:  # pydantic < 2.5
+    _from_json = json.loads
+
 
 class ClientError(RuntimeError):
     def __init__(self, response: Response):
@@ -28,6 +38,65 @@ class ServerError(RuntimeError):
         self.response = response
 
 
+def _lenient_item(EnsuredType: Type[BaseModel]) -> Any:
+    # An item that is not a valid EnsuredType is kept as it is instead of failing
+    # the whole list, so that a list is always validated in one pass.
+    return Annotated[Union[EnsuredType, Any], Field(union_mode="left_to_right")]
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(EnsuredType: Type[BaseModel]) -> TypeAdapter:
+    """
+    Returns the validator of a list of EnsuredType, which is built once per type.
+    """
+    return TypeAdapter(List[_lenient_item(EnsuredType)])  # type: ignore
+
+
+@lru_cache(maxsize=None)
+def _keyed_list_adapter(EnsuredType: Type[BaseModel], list_key: str) -> TypeAdapter:
+    """
+    Returns the validator of a json object that holds a list of EnsuredType under
+    list_key. The other keys of the object are ignored.
+    """
+    keyed = TypedDict(  # type: ignore
+        "_KeyedList",
+        {list_key: List[_lenient_item(EnsuredType)]},  # type: ignore
+        total=False,
+    )
+    return TypeAdapter(keyed)
+
+
+def _decode_json(response) -> Any:
+    """
+    Decodes the json body of a response with the json parser of pydantic, which
+    is faster than the standard library. Invalid bodies raise the same error as
+    `response.json()`.
+    """
+    try:
+        return _from_json(response.content)
+    except ValueError:
+        return response.json()
+
+
+async def _aiter_log(response) -> AsyncIterator[str]:
+    """
+    Yields the text of a streamed httpx response as it arrives, and closes it.
+    Used by the async log apis.
+    """
+    try:
+        if response.is_error:
+            await response.aread()
+            raise RuntimeError(
+                f"API call failed with status code {response.status_code}. Details:"
+                f" {response.text}"
+            )
+        async for chunk in response.aiter_text():
+            if chunk:
+                yield chunk
+    finally:
+        await response.aclose()
+
+
 class APIResourse(object):
     """
     APIResource is a base class for all api implementations. It is registered
@@ -134,7 +203,8 @@ class APIResourse(object):
         list_key: Optional[str] = None,
     ) -> List[T]:
         """
-        Ensure the response JSON is a list convertible to ``EnsuredType``.
+        Ensure the response JSON is a list convertible to ``EnsuredType``. Items
+        that cannot be converted are skipped, and reported on stderr.
 
         Args:
             response: ``requests.Response`` object.
@@ -144,16 +214,31 @@ class APIResourse(object):
 
         self._raise_if_not_ok(response)
 
+        # The whole list is validated at once, straight from the response body if
+        # the list is the body itself. Only the items that are not valid are
+        # validated again one by one, to report why.
+        try:
+            if list_key:
+                adapter = _keyed_list_adapter(EnsuredType, list_key)
+                items = adapter.validate_json(response.content)[list_key]
+            else:
+                items = _list_adapter(EnsuredType).validate_json(response.content)
+        except Exception:
+            # For example, the list is not under list_key, or the body is not a
+            # list: the items are then checked one by one as they are.
+            data = _decode_json(response)
+            if list_key and isinstance(data, dict):
+                items = data.get(list_key, data)
+            else:
+                items = data
+
         valid_items = []
         errors: List[str] = []
 
-        if list_key:
-            data = response.json()
-            items_raw = data.get(list_key, data) if isinstance(data, dict) else data
-        else:
-            items_raw = response.json()
-
-        for idx, raw in enumerate(items_raw):
+        for idx, raw in enumerate(items):
+            if isinstance(raw, EnsuredType):
+                valid_items.append(raw)
+                continue
             try:
                 valid_items.append(EnsuredType(**raw))
             except Exception as e:
@@ -7,27 +7,33 @@ such as http sessions.
 import os
 import time
 import re
+import httpx
 import requests
-from typing import Optional, Union, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple, Union
 
-from .log import LogAPI
+from leptonai._internal.api_cache import APICache, _CachingAdapter
+from leptonai._internal.api_transport import _RetryAdapter
+from leptonai._internal.client_transport import RetryPolicy
+from leptonai._internal.keepalive import _hold_concurrently, _KeepaliveThread
+
+from .log import LogAPI, AsyncLogAPI
 
 from .types.workspace import WorkspaceInfo
 
 # import the related API resources. Note that in all these files, they should
 # not import workspace to avoid circular imports.
 from .api_resource import APIResourse
-from .dedicated_node_groups import DedicatedNodeGroupAPI
-from .deployment import DeploymentAPI
-from .job import JobAPI
-from .secret import SecretAPI
-from .pod import PodAPI
-from .ingress import IngressAPI
-from .storage import StorageAPI
-from .resource_shape import ResourceShapeAPI
-from .template import TemplateAPI
-from .finetune import FineTuneAPI
-from .raycluster import RayClusterAPI
+from .dedicated_node_groups import DedicatedNodeGroupAPI, AsyncDedicatedNodeGroupAPI
+from .deployment import DeploymentAPI, AsyncDeploymentAPI
+from .job import JobAPI, AsyncJobAPI
+from .secret import SecretAPI, AsyncSecretAPI
+from .pod import PodAPI, AsyncPodAPI
+from .ingress import IngressAPI, AsyncIngressAPI
+from .storage import StorageAPI, AsyncStorageAPI
+from .resource_shape import ResourceShapeAPI, AsyncResourceShapeAPI
+from .template import TemplateAPI, AsyncTemplateAPI
+from .finetune import FineTuneAPI, AsyncFineTuneAPI
+from .raycluster import RayClusterAPI, AsyncRayClusterAPI
 
 
 from .utils import (
@@ -45,11 +51,15 @@ from loguru import logger
 # Token expiry warning: warn at most once per process
 HAS_WARNED_TOKEN_EXPIRE: bool = False
 
+# The number of connections APIClient keeps per host. It matches the default
+# number of worker threads of `lep log get`, which share one client.
+DEFAULT_POOL_MAXSIZE = 32
+
 
-class APIClient(object):
+class _BaseAPIClient(object):
     """
-    A Lepton API client that is associated with a workspace. This class holds all
-    the apis callable by the user.
+    The workspace, credential and header resolution shared by APIClient and
+    AsyncAPIClient.
     """
 
     def __init__(
@@ -181,7 +191,6 @@ class APIClient(object):
 
         # In default, timeout for the API calls is set to 120 seconds.
         self._timeout = 120
-        self._session = requests.Session()
         if os.environ.get("LEPTON_DEBUG_HEADERS"):
             # LEPTON_DEBUG_HEADERS should be in the format of comma separated
             # header_key=header_value pairs.
@@ -197,6 +206,131 @@ class APIClient(object):
                     f" {os.environ['LEPTON_DEBUG_HEADERS']}"
                 )
 
+    def _auth_token_hint(self) -> str:
+        return (
+            self.auth_token[:2] + "****" + self.auth_token[-2:]
+            if self.auth_token
+            else ""
+        )
+
+    def _check_workspace_response(self, response) -> None:
+        """
+        Raises the workspace error matching the status of a /workspace response.
+        """
+        if response.status_code == 401:
+            raise WorkspaceUnauthorizedError(
+                workspace_id=self.workspace_id,
+                workspace_url=self.url,
+                auth_token=self._auth_token_hint(),
+            )
+
+        if response.status_code == 404:
+            raise WorkspaceNotFoundError(
+                workspace_id=self.workspace_id,
+                workspace_url=self.url,
+                auth_token=self._auth_token_hint(),
+            )
+
+        if response.status_code == 403:
+            raise WorkspaceForbiddenError(
+                workspace_id=self.workspace_id,
+                workspace_url=self.url,
+                auth_token=self._auth_token_hint(),
+            )
+
+    @staticmethod
+    def _parse_version(info: WorkspaceInfo) -> Optional[Tuple[int, int, int]]:
+        _semver_pattern = re.compile(
+            r"^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$"  # noqa: E501
+            # noqa: W605
+        )
+
+        match = _semver_pattern.match(info.git_commit)
+        return (
+            (int(match.group(1)), int(match.group(2)), int(match.group(3)))
+            if match
+            else None
+        )
+
+    def token(self) -> Union[str, None]:
+        """
+        Returns the current workspace token.
+        """
+        return self.auth_token
+
+    def get_workspace_id(self) -> Union[str, None]:
+        return self.workspace_id
+
+    def get_workspace_name(self) -> Union[str, None]:
+        return WorkspaceRecord.current().display_name
+
+    def get_dashboard_base_url(self) -> Optional[str]:
+        """
+        Returns the base dashboard URL derived from the current workspace URL.
+        """
+        base = (self.url or "").replace("://gateway", "://dashboard", 1)
+        base = base.replace("/api/v2", "", 1)
+        base = base.replace("/workspaces", "/workspace", 1)
+        return base
+
+
+class APIClient(_BaseAPIClient):
+    """
+    A Lepton API client that is associated with a workspace. This class holds all
+    the apis callable by the user.
+
+    A client is safe to share across threads: its calls do not modify the client,
+    and they share a pool of up to pool_maxsize connections per host. Calls made
+    by more threads than that still go through, but the extra connections are
+    closed instead of being returned to the pool.
+
+    If the client is given a retry policy, which is off by default, idempotent
+    calls that fail with connection errors, timeouts, or 429, 502, 503 or 504
+    responses are retried according to it, honoring the Retry-After header of
+    the server. `retry_stats()` returns the number of retries so far.
+
+    GET responses are cached if the client is given an APICache, which is off by
+    default. Writes through the client drop the cached responses of the resource
+    they write to.
+    """
+
+    def __init__(
+        self,
+        workspace_id: Optional[str] = None,
+        auth_token: Optional[str] = None,
+        url: Optional[str] = None,
+        workspace_origin_url: Optional[str] = None,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        retry: Optional[RetryPolicy] = None,
+        cache: Optional[APICache] = None,
+    ):
+        """
+        Creates a workspace api client. See `_BaseAPIClient.__init__` for how the
+        workspace and its credentials are resolved. pool_maxsize is the number of
+        connections kept per host, which should be at least the number of
+        threads that use the client at the same time. retry is the policy used to
+        retry idempotent calls, see `RetryPolicy`; None, the default, disables
+        retries. Only the methods in its idempotent_methods are retried. cache is
+        the cache of GET responses, see `APICache`; None, the default, disables
+        it.
+        """
+        super().__init__(workspace_id, auth_token, url, workspace_origin_url)
+        self._session = requests.Session()
+        self._cache = cache
+        if cache is None:
+            self._adapter = _RetryAdapter(retry, pool_maxsize=pool_maxsize)
+        else:
+            self._adapter = _CachingAdapter(
+                retry,
+                cache,
+                self.url,
+                workspace_id=self.workspace_id,
+                pool_maxsize=pool_maxsize,
+            )
+        self._session.mount("https://", self._adapter)
+        self._session.mount("http://", self._adapter)
+        self._keepalive: Optional[_KeepaliveThread] = None
+
         # Add individual APIs
         self.nodegroup = DedicatedNodeGroupAPI(self)
         self.deployment = DeploymentAPI(self)
@@ -215,11 +349,11 @@ class APIClient(object):
         """
         Internal utility function to add default values to the kwargs.
         """
-        kwargs.setdefault("headers", self._header)
         kwargs.setdefault("timeout", self._timeout)
-        # if kwargs does have headers, but does not have Authorization, we will add it.
-        for k, v in self._header.items():
-            kwargs["headers"].setdefault(k, v)
+        # Copy the headers, so that neither the default headers shared by the
+        # threads using the client nor the caller's headers are modified. Headers
+        # passed in by the caller take precedence.
+        kwargs["headers"] = {**self._header, **(kwargs.get("headers") or {})}
         return kwargs
 
     def _get(self, path: str, *args, **kwargs):
@@ -240,39 +374,99 @@ class APIClient(object):
     def _head(self, path: str, *args, **kwargs):
         return self._session.head(self.url + path, *args, **self._safe_add(kwargs))
 
-    def info(self) -> WorkspaceInfo:
-        """
-        Returns the workspace info.
-        """
-        ws_api = APIResourse(self)
-        response = self._get("/workspace")
-        auth_token_hint = (
-            self.auth_token[:2] + "****" + self.auth_token[-2:]
-            if self.auth_token
-            else ""
+    def _connection_pools(self):
+        adapter = self._session.get_adapter(self.url)
+        pools = adapter.poolmanager.pools
+        return [pools[key] for key in pools.keys()]
+
+    def _warm(self, n_connections: int) -> None:
+        def _finish(response: requests.Response) -> None:
+            # Reading the body returns the connection to the pool.
+            response.content
+
+        _hold_concurrently(
+            n_connections, lambda: self._get("/workspace", stream=True), _finish
         )
 
-        if response.status_code == 401:
-            raise WorkspaceUnauthorizedError(
-                workspace_id=self.workspace_id,
-                workspace_url=self.url,
-                auth_token=auth_token_hint,
-            )
+    def warmup(
+        self, n_connections: int = 1, keepalive_interval: Optional[float] = None
+    ) -> int:
+        """
+        Opens n_connections pooled connections to the workspace api ahead of the
+        first calls, so that they do not pay for dns, tcp and tls setup. If
+        keepalive_interval is set, the connections are used again every
+        keepalive_interval seconds from a background thread, so that they stay
+        hot between bursts of calls. Call `stop_keepalive()` to stop the pings.
 
-        if response.status_code == 404:
-            raise WorkspaceNotFoundError(
-                workspace_id=self.workspace_id,
-                workspace_url=self.url,
-                auth_token=auth_token_hint,
+        Returns the number of idle connections in the pool.
+        """
+        if n_connections < 1:
+            raise ValueError(f"n_connections must be positive, got {n_connections}.")
+        max_size = self._session.get_adapter(self.url)._pool_maxsize
+        if n_connections > max_size:
+            logger.warning(
+                f"Only {max_size} connections are kept in the pool, warming up"
+                f" {max_size} instead of {n_connections}."
             )
-
-        if response.status_code == 403:
-            raise WorkspaceForbiddenError(
-                workspace_id=self.workspace_id,
-                workspace_url=self.url,
-                auth_token=auth_token_hint,
+            n_connections = max_size
+        self._warm(n_connections)
+        if keepalive_interval is not None:
+            self.stop_keepalive()
+            self._keepalive = _KeepaliveThread(
+                self, lambda client: client._warm(n_connections), keepalive_interval
             )
+            self._keepalive.start()
+        return self.connection_stats()["idle_connections"]
 
+    def stop_keepalive(self) -> None:
+        """
+        Stops the keepalive pings started by `warmup()`, if any.
+        """
+        if self._keepalive is not None:
+            self._keepalive.stop()
+            self._keepalive = None
+
+    def connection_stats(self) -> Dict[str, Any]:
+        """
+        Returns the number of idle pooled connections, of requests sent and of
+        connections opened to the workspace api, and the fraction of requests that
+        reused a pooled connection.
+        """
+        pools = self._connection_pools()
+        requests_sent = sum(p.num_requests for p in pools)
+        new_connections = sum(p.num_connections for p in pools)
+        return {
+            "idle_connections": sum(
+                1 for p in pools for c in list(p.pool.queue) if c is not None
+            ),
+            "requests": requests_sent,
+            "new_connections": new_connections,
+            "connection_reuse_ratio": (
+                1 - new_connections / requests_sent if requests_sent else None
+            ),
+        }
+
+    def retry_stats(self) -> Dict[str, int]:
+        """
+        Returns the number of retries, of calls that were retried, and of calls
+        that still failed when the retry policy gave up on them.
+        """
+        return self._adapter.stats()
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """
+        Returns the counters of the response cache of the client, see
+        `APICache.stats()`, or None if the client has no cache.
+        """
+        return None if self._cache is None else self._cache.stats()
+
+    def info(self) -> WorkspaceInfo:
+        """
+        Returns the workspace info.
+        """
+        ws_api = APIResourse(self)
+        response = self._get("/workspace")
+        self._check_workspace_response(response)
         return ws_api.ensure_type(response, WorkspaceInfo)
 
     def version(self, info=None) -> Optional[Tuple[int, int, int]]:
@@ -281,35 +475,114 @@ class APIClient(object):
         this is a dev workspace, returns None.
         """
         info = info if info else self.info()
-        _semver_pattern = re.compile(
-            r"^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$"  # noqa: E501
-            # noqa: W605
-        )
+        return self._parse_version(info)
 
-        match = _semver_pattern.match(info.git_commit)
-        return (
-            (int(match.group(1)), int(match.group(2)), int(match.group(3)))
-            if match
-            else None
-        )
 
-    def token(self) -> Union[str, None]:
+class AsyncAPIClient(_BaseAPIClient):
+    """
+    The asyncio counterpart of APIClient. It resolves the workspace the same way,
+    and holds the same resource groups, whose methods are coroutines that return
+    the same types:
+
+        async with AsyncAPIClient() as client:
+            deployments, jobs = await asyncio.gather(
+                client.deployment.list_all(), client.job.list_all()
+            )
+
+    All the calls share one pooled httpx client, which multiplexes concurrent
+    calls over a single HTTP/2 connection when the server supports it. Call
+    `aclose()`, or use the client as an async context manager, to close it.
+    """
+
+    def __init__(
+        self,
+        workspace_id: Optional[str] = None,
+        auth_token: Optional[str] = None,
+        url: Optional[str] = None,
+        workspace_origin_url: Optional[str] = None,
+    ):
         """
-        Returns the current workspace token.
+        Creates an async workspace api client. See `_BaseAPIClient.__init__` for
+        how the workspace and its credentials are resolved.
         """
-        return self.auth_token
+        super().__init__(workspace_id, auth_token, url, workspace_origin_url)
+        self._session = httpx.AsyncClient(http2=True, timeout=self._timeout)
 
-    def get_workspace_id(self) -> Union[str, None]:
-        return self.workspace_id
+        # Add individual APIs
+        self.nodegroup = AsyncDedicatedNodeGroupAPI(self)
+        self.deployment = AsyncDeploymentAPI(self)
+        self.job = AsyncJobAPI(self)
+        self.pod = AsyncPodAPI(self)
+        self.secret = AsyncSecretAPI(self)
+        self.ingress = AsyncIngressAPI(self)
+        self.storage = AsyncStorageAPI(self)
+        self.log = AsyncLogAPI(self)
+        self.template = AsyncTemplateAPI(self)
+        self.finetune = AsyncFineTuneAPI(self)
+        self.shapes = AsyncResourceShapeAPI(self)
+        self.raycluster = AsyncRayClusterAPI(self)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Sends a request to the workspace api. If stream is True, the body is not
+        read, and the caller must close the response.
+        """
+        headers = {**self._header, **(headers or {})}
+        request = self._session.build_request(
+            method, self.url + path, headers=headers, **kwargs
+        )
+        return await self._session.send(request, stream=stream)
 
-    def get_workspace_name(self) -> Union[str, None]:
-        return WorkspaceRecord.current().display_name
+    async def _get(self, path: str, **kwargs) -> httpx.Response:
+        return await self._request("GET", path, **kwargs)
 
-    def get_dashboard_base_url(self) -> Optional[str]:
+    async def _post(self, path: str, **kwargs) -> httpx.Response:
+        return await self._request("POST", path, **kwargs)
+
+    async def _patch(self, path: str, **kwargs) -> httpx.Response:
+        return await self._request("PATCH", path, **kwargs)
+
+    async def _put(self, path: str, **kwargs) -> httpx.Response:
+        return await self._request("PUT", path, **kwargs)
+
+    async def _delete(self, path: str, **kwargs) -> httpx.Response:
+        return await self._request("DELETE", path, **kwargs)
+
+    async def _head(self, path: str, **kwargs) -> httpx.Response:
+        return await self._request("HEAD", path, **kwargs)
+
+    async def info(self) -> WorkspaceInfo:
         """
-        Returns the base dashboard URL derived from the current workspace URL.
+        Returns the workspace info.
         """
-        base = (self.url or "").replace("://gateway", "://dashboard", 1)
-        base = base.replace("/api/v2", "", 1)
-        base = base.replace("/workspaces", "/workspace", 1)
-        return base
+        ws_api = APIResourse(self)
+        response = await self._get("/workspace")
+        self._check_workspace_response(response)
+        return ws_api.ensure_type(response, WorkspaceInfo)
+
+    async def version(self, info=None) -> Optional[Tuple[int, int, int]]:
+        """
+        Returns a tuple of (major, minor, patch) of the workspace version, or if
+        this is a dev workspace, returns None.
+        """
+        info = info if info else await self.info()
+        return self._parse_version(info)
+
+    async def aclose(self) -> None:
+        """
+        Closes the pooled connections of the client.
+        """
+        await self._session.aclose()
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
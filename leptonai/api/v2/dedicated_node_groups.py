@@ -1,5 +1,6 @@
 # todo
 from typing import List, Union
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 from .api_resource import APIResourse
@@ -85,3 +86,72 @@ class DedicatedNodeGroupAPI(APIResourse):
                     except Exception as e:
                         results_mixed.append(e)
                 return results_mixed
+
+
+class AsyncDedicatedNodeGroupAPI(APIResourse):
+    """
+    The asyncio counterpart of DedicatedNodeGroupAPI, used by AsyncAPIClient.
+    """
+
+    _to_name = DedicatedNodeGroupAPI._to_name
+
+    async def list_all(self) -> List[DedicatedNodeGroup]:
+        responses = await self._get("/dedicated-node-groups")
+        return self.ensure_list(responses, DedicatedNodeGroup)
+
+    async def get(
+        self, name_or_ng: Union[str, DedicatedNodeGroup]
+    ) -> DedicatedNodeGroup:
+        response = await self._get(
+            f"/dedicated-node-groups/{self._to_name(name_or_ng)}"
+        )
+        return self.ensure_type(response, DedicatedNodeGroup)
+
+    async def list_nodes(
+        self, name_or_ng: Union[str, DedicatedNodeGroup]
+    ) -> List[Node]:
+        response = await self._get(
+            f"/dedicated-node-groups/{self._to_name(name_or_ng)}/nodes"
+        )
+        return self.ensure_list(response, Node)
+
+    async def list_idle_nodes(
+        self, name_or_ng: Union[str, DedicatedNodeGroup]
+    ) -> List[Node]:
+        response = await self._get(
+            f"/dedicated-node-groups/{self._to_name(name_or_ng)}/nodes",
+            params={"idle": "true"},
+        )
+        return self.ensure_list(response, Node)
+
+    async def list_reservations(
+        self, name_or_ng: Union[str, DedicatedNodeGroup]
+    ) -> List[NodeReservation]:
+        response = await self._get(
+            f"/dedicated-node-groups/{self._to_name(name_or_ng)}/reservations"
+        )
+        return self.ensure_list(response, NodeReservation)
+
+    async def batch_fetch_nodes(
+        self,
+        node_groups: List[Union[str, DedicatedNodeGroup]],
+        concurrency: int = 8,
+        return_exceptions: bool = False,
+    ) -> List[Union[List[Node], Exception]]:
+        """
+        Fetch nodes for multiple dedicated node groups concurrently, with at most
+        concurrency requests in flight, see DedicatedNodeGroupAPI.batch_fetch_nodes.
+        """
+        if not node_groups:
+            return []
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _list_nodes(ng: Union[str, DedicatedNodeGroup]) -> List[Node]:
+            async with semaphore:
+                return await self.list_nodes(ng)
+
+        return await asyncio.gather(
+            *(_list_nodes(ng) for ng in node_groups),
+            return_exceptions=return_exceptions,
+        )
@@ -1,7 +1,7 @@
 import warnings
-from typing import Union, List, Iterator, Optional
+from typing import AsyncIterator, Union, List, Iterator, Optional
 
-from .api_resource import APIResourse
+from .api_resource import APIResourse, _aiter_log
 from .types.deployment import LeptonDeployment, TokenVar
 from .types.events import LeptonEvent
 from .types.readiness import ReadinessIssue
@@ -175,3 +175,139 @@ class DeploymentAPI(APIResourse):
 
     # TODO: implement api for the various metrics, but for now we will simply ask users
     # to view the metrics from the web portal.
+
+
+class AsyncDeploymentAPI(APIResourse):
+    """
+    The asyncio counterpart of DeploymentAPI, used by AsyncAPIClient.
+    """
+
+    _to_name = DeploymentAPI._to_name
+
+    async def list_all(self):
+        response = await self._get("/deployments")
+        return self.ensure_list(response, LeptonDeployment)
+
+    async def create(self, spec: LeptonDeployment):
+        """
+        Create a deployment with the given deployment spec.
+        """
+        response = await self._post("/deployments", json=self.safe_json(spec))
+        return self.ensure_ok(response)
+
+    async def create_pod(self, spec: LeptonDeployment):
+        """
+        Creates a pod with the given deployment spec. This is equivalent to creating a deployment
+        with is_pod=True.
+        """
+        warnings.warn(
+            "create_pod is deprecated. Use the api under leptonai.api.v2.pod"
+            " instead, which is more explicit and gives more strict param checking.",
+            DeprecationWarning,
+        )
+        if spec.spec is None:
+            raise ValueError("LeptonDeploymentUserSpec must not be None.")
+        spec.spec.is_pod = True
+        return await self.create(spec)
+
+    async def get(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> LeptonDeployment:
+        response = await self._get(f"/deployments/{self._to_name(name_or_deployment)}")
+        return self.ensure_type(response, LeptonDeployment)
+
+    async def update(
+        self,
+        name_or_deployment: Union[str, LeptonDeployment],
+        spec: LeptonDeployment,
+        dryrun: bool = False,
+    ) -> LeptonDeployment:
+        dryrun_param = "" if not dryrun else "?dryrun=true"
+
+        response = await self._patch(
+            f"/deployments/{self._to_name(name_or_deployment)+dryrun_param}",
+            json=self.safe_json(spec),
+        )
+        return self.ensure_type(response, LeptonDeployment)
+
+    async def stop(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> LeptonDeployment:
+        """Scale the deployment down to zero replicas, see DeploymentAPI.stop."""
+        payload = {
+            "spec": {
+                "resource_requirement": {
+                    "min_replicas": 0,
+                }
+            }
+        }
+        response = await self._patch(
+            f"/deployments/{self._to_name(name_or_deployment)}",
+            json=payload,
+        )
+        return self.ensure_type(response, LeptonDeployment)
+
+    async def delete(self, name_or_deployment: Union[str, LeptonDeployment]) -> bool:
+        response = await self._delete(
+            f"/deployments/{self._to_name(name_or_deployment)}"
+        )
+        return self.ensure_ok(response)
+
+    async def restart(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> LeptonDeployment:
+        response = await self._put(
+            f"/deployments/{self._to_name(name_or_deployment)}/restart"
+        )
+        return self.ensure_type(response, LeptonDeployment)
+
+    async def get_readiness(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> ReadinessIssue:
+        response = await self._get(
+            f"/deployments/{self._to_name(name_or_deployment)}/readiness"
+        )
+        return self.ensure_type(response, ReadinessIssue)
+
+    async def get_termination(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> DeploymentTerminations:
+        response = await self._get(
+            f"/deployments/{self._to_name(name_or_deployment)}/termination"
+        )
+        return self.ensure_type(response, DeploymentTerminations)
+
+    async def get_replicas(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> List[Replica]:
+        response = await self._get(
+            f"/deployments/{self._to_name(name_or_deployment)}/replicas"
+        )
+        return self.ensure_list(response, Replica)
+
+    async def get_log(
+        self,
+        name_or_deployment: Union[str, LeptonDeployment],
+        replica: Union[str, Replica],
+        timeout: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Gets the log of the given deployment's specified replica, see
+        DeploymentAPI.get_log. Iterate over it with `async for`.
+        """
+        replica_id = replica if isinstance(replica, str) else replica.metadata.id_
+        response = await self._get(
+            f"/deployments/{self._to_name(name_or_deployment)}/replicas/{replica_id}/log",
+            stream=True,
+            timeout=timeout,
+        )
+        async for chunk in _aiter_log(response):
+            yield chunk
+
+    async def get_events(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> List[LeptonEvent]:
+        response = await self._get(
+            f"/deployments/{self._to_name(name_or_deployment)}/events"
+        )
+        return self.ensure_list(response, LeptonEvent)
@@ -1,4 +1,4 @@
-from typing import Union, List, Optional
+from typing import Any, Dict, Union, List, Optional
 
 from .api_resource import APIResourse
 from leptonai.api.v2.types.job import LeptonJobQueryMode
@@ -15,6 +15,28 @@ class FineTuneAPI(APIResourse):
             name_or_job if isinstance(name_or_job, str) else name_or_job.metadata.id_
         )
 
+    @staticmethod
+    def _list_params(
+        job_query_mode: str,
+        q: Optional[str],
+        query: Optional[str],
+        status: Optional[List[str]],
+        node_groups: Optional[List[str]],
+        created_by: Optional[str],
+    ) -> Dict[str, Any]:
+        params_base: Dict[str, Any] = {"job_query_mode": job_query_mode}
+        if q:
+            params_base["q"] = q
+        if query:
+            params_base["query"] = query
+        if status:
+            params_base["status"] = status
+        if node_groups:
+            params_base["node_groups"] = node_groups
+        if created_by:
+            params_base["created_by"] = created_by
+        return params_base
+
     def list_all(
         self,
         *,
@@ -30,17 +52,9 @@ class FineTuneAPI(APIResourse):
         """
         List fine-tune jobs with optional server-side filtering.
         """
-        params_base = {"job_query_mode": job_query_mode}
-        if q:
-            params_base["q"] = q
-        if query:
-            params_base["query"] = query
-        if status:
-            params_base["status"] = status
-        if node_groups:
-            params_base["node_groups"] = node_groups
-        if created_by:
-            params_base["created_by"] = created_by
+        params_base = self._list_params(
+            job_query_mode, q, query, status, node_groups, created_by
+        )
 
         # If user explicitly specifies page or page_size, do single request
         if page is not None or page_size is not None:
@@ -115,3 +129,102 @@ class FineTuneAPI(APIResourse):
             "/finetune/trainers", params={"default_only": str(default_only).lower()}
         )
         return self.ensure_list(response, TrainerInfo)
+
+
+class AsyncFineTuneAPI(APIResourse):
+    """
+    The asyncio counterpart of FineTuneAPI, used by AsyncAPIClient.
+    """
+
+    _to_id = FineTuneAPI._to_id
+
+    async def list_all(
+        self,
+        *,
+        job_query_mode: str = LeptonJobQueryMode.AliveOnly.value,
+        q: Optional[str] = None,
+        query: Optional[str] = None,
+        status: Optional[List[str]] = None,
+        node_groups: Optional[List[str]] = None,
+        page: Optional[int] = None,
+        page_size: Optional[int] = None,
+        created_by: Optional[str] = None,
+    ) -> List[LeptonFineTuneJob]:
+        """
+        List fine-tune jobs with optional server-side filtering.
+        """
+        params_base = FineTuneAPI._list_params(
+            job_query_mode, q, query, status, node_groups, created_by
+        )
+
+        if page is not None or page_size is not None:
+            if page is not None:
+                params_base["page"] = page
+            if page_size is not None:
+                params_base["page_size"] = page_size
+            response = await self._get("/finetune/jobs", params=params_base)
+            return self.ensure_list(
+                response, LeptonFineTuneJob, list_key="finetune_jobs"
+            )
+
+        results: List[LeptonFineTuneJob] = []
+        current_page = 1
+        while True:
+            params = dict(params_base)
+            params["page"] = current_page
+            params["page_size"] = 500
+            response = await self._get("/finetune/jobs", params=params)
+            items = self.ensure_list(
+                response, LeptonFineTuneJob, list_key="finetune_jobs"
+            )
+            if not items:
+                break
+            results.extend(items)
+            current_page += 1
+        return results
+
+    async def create(self, spec: LeptonFineTuneJob) -> LeptonFineTuneJob:
+        response = await self._post("/finetune/jobs", json=self.safe_json(spec))
+        return self.ensure_type(response, LeptonFineTuneJob)
+
+    async def get(
+        self,
+        id_or_job: Union[str, LeptonFineTuneJob],
+        *,
+        job_query_mode: str = LeptonJobQueryMode.AliveOnly.value,
+    ) -> LeptonFineTuneJob:
+        response = await self._get(
+            f"/finetune/jobs/{self._to_id(id_or_job)}",
+            params={"job_query_mode": job_query_mode} if job_query_mode else None,
+        )
+        return self.ensure_type(response, LeptonFineTuneJob)
+
+    async def update(
+        self, name_or_job: Union[str, LeptonFineTuneJob], spec: LeptonFineTuneJob
+    ) -> bool:
+        response = await self._patch(
+            f"/finetune/jobs/{self._to_id(name_or_job)}", json=self.safe_json(spec)
+        )
+        return self.ensure_ok(response)
+
+    async def delete(
+        self,
+        name_or_job: Union[str, LeptonFineTuneJob],
+        *,
+        job_query_mode: str = LeptonJobQueryMode.AliveOnly.value,
+    ) -> bool:
+        response = await self._delete(
+            f"/finetune/jobs/{self._to_id(name_or_job)}",
+            params={"job_query_mode": job_query_mode} if job_query_mode else None,
+        )
+        return self.ensure_ok(response)
+
+    async def list_supported_models(self) -> List[FineTuneModelInfo]:
+        response = await self._get("/finetune/supported-models")
+        return self.ensure_list(response, FineTuneModelInfo)
+
+    async def list_trainers(self, default_only: bool = True) -> List[TrainerInfo]:
+        response = await self._get(
+            "/finetune/trainers", params={"default_only": str(default_only).lower()}
+        )
+        return self.ensure_list(response, TrainerInfo)
@@ -80,3 +80,66 @@ class IngressAPI(APIResourse):
 
         response = self._delete(url)
         return self.ensure_type(response, LeptonIngress)
+
+
+class AsyncIngressAPI(APIResourse):
+    """
+    The asyncio counterpart of IngressAPI, used by AsyncAPIClient.
+    """
+
+    _to_name = IngressAPI._to_name
+
+    async def list_all(self):
+        response = await self._get("/ingress")
+        return self.ensure_list(response, LeptonIngress)
+
+    async def create(self, spec: LeptonIngress):
+        """
+        Create an ingress with the given Ingress spec.
+        """
+        response = await self._post("/ingress", json=self.safe_json(spec))
+        return self.ensure_ok(response)
+
+    async def get(self, name_or_ingress: Union[str, LeptonIngress]) -> LeptonIngress:
+        response = await self._get(f"/ingress/{self._to_name(name_or_ingress)}")
+        return self.ensure_type(response, LeptonIngress)
+
+    async def delete(self, name_or_ingress: Union[str, LeptonIngress]) -> bool:
+        response = await self._delete(f"/ingress/{self._to_name(name_or_ingress)}")
+        return self.ensure_ok(response)
+
+    async def update(
+        self, name_or_ingress: Union[str, LeptonIngress], spec: LeptonIngress
+    ) -> Union[LeptonIngress, str]:
+        response = await self._patch(
+            f"/ingress/{self._to_name(name_or_ingress)}", json=self.safe_json(spec)
+        )
+        return self.ensure_type(response, LeptonIngress)
+
+    async def create_endpoint(
+        self, name_or_ingress: Union[str, LeptonIngress], spec: LeptonIngressEndpoint
+    ) -> LeptonIngress:
+        """
+        Create a ingressEndpoint with the given LeptonIngress IngressEndpoint spec.
+        """
+        response = await self._post(
+            f"/ingress/{self._to_name(name_or_ingress)}/endpoint/deployment",
+            json=self.safe_json(spec),
+        )
+        return self.ensure_type(response, LeptonIngress)
+
+    async def delete_endpoint(
+        self,
+        name_or_ingress: Union[str, LeptonIngress],
+        name_or_deployment: Union[str, LeptonDeployment, LeptonIngressEndpoint],
+    ) -> LeptonIngress:
+        """
+        Deletes an endpoint for a given ingress and deployment, see
+        IngressAPI.delete_endpoint.
+        """
+        name = self._to_name(name_or_ingress)
+        deployment_name = self._to_name(name_or_deployment)
+        url = f"/ingress/{name}/endpoint/deployment/{deployment_name}"
+
+        response = await self._delete(url)
+        return self.ensure_type(response, LeptonIngress)
@@ -1,6 +1,6 @@
-from typing import Union, List, Iterator, Optional
+from typing import Any, AsyncIterator, Dict, Union, List, Iterator, Optional
 
-from .api_resource import APIResourse
+from .api_resource import APIResourse, _aiter_log
 from .types.events import LeptonEvent
 
 from .types.job import LeptonJob, LeptonJobQueryMode
@@ -13,6 +13,28 @@ class JobAPI(APIResourse):
             name_or_job if isinstance(name_or_job, str) else name_or_job.metadata.id_
         )
 
+    @staticmethod
+    def _list_params(
+        job_query_mode: str,
+        q: Optional[str],
+        query: Optional[str],
+        status: Optional[List[str]],
+        node_groups: Optional[List[str]],
+        created_by: Optional[str],
+    ) -> Dict[str, Any]:
+        params_base: Dict[str, Any] = {"job_query_mode": job_query_mode}
+        if q:
+            params_base["q"] = q
+        if query:
+            params_base["query"] = query
+        if status:
+            params_base["status"] = status
+        if node_groups:
+            params_base["node_groups"] = node_groups
+        if created_by:
+            params_base["created_by"] = created_by
+        return params_base
+
     def list_all(
         self,
         *,
@@ -35,17 +57,9 @@ class JobAPI(APIResourse):
         - page / page_size: pagination controls
         - created_by  : creator email (single)
         """
-        params_base = {"job_query_mode": job_query_mode}
-        if q:
-            params_base["q"] = q
-        if query:
-            params_base["query"] = query
-        if status:
-            params_base["status"] = status
-        if node_groups:
-            params_base["node_groups"] = node_groups
-        if created_by:
-            params_base["created_by"] = created_by
+        params_base = self._list_params(
+            job_query_mode, q, query, status, node_groups, created_by
+        )
 
         # If user explicitly specifies page or page_size, do single request
         if page is not None or page_size is not None:
@@ -154,3 +168,128 @@ class JobAPI(APIResourse):
         for chunk in response.iter_content(chunk_size=None):
             if chunk:
                 yield chunk.decode("utf8")
+
+
+class AsyncJobAPI(APIResourse):
+    """
+    The asyncio counterpart of JobAPI, used by AsyncAPIClient.
+    """
+
+    _to_id = JobAPI._to_id
+
+    async def list_all(
+        self,
+        *,
+        job_query_mode: str = LeptonJobQueryMode.AliveOnly.value,
+        q: Optional[str] = None,
+        query: Optional[str] = None,
+        status: Optional[List[str]] = None,
+        node_groups: Optional[List[str]] = None,
+        page: Optional[int] = None,
+        page_size: Optional[int] = None,
+        created_by: Optional[str] = None,
+    ) -> List[LeptonJob]:
+        """List jobs with optional server-side filtering, see JobAPI.list_all."""
+        params_base = JobAPI._list_params(
+            job_query_mode, q, query, status, node_groups, created_by
+        )
+
+        if page is not None or page_size is not None:
+            if page is not None:
+                params_base["page"] = page
+            if page_size is not None:
+                params_base["page_size"] = page_size
+            response = await self._get("/jobs", params=params_base)
+            return self.ensure_list(response, LeptonJob, list_key="jobs")
+
+        results: List[LeptonJob] = []
+        current_page = 1
+        while True:
+            params = dict(params_base)
+            params["page"] = current_page
+            params["page_size"] = 500
+            response = await self._get("/jobs", params=params)
+            items = self.ensure_list(response, LeptonJob, list_key="jobs")
+            if not items:
+                break
+            results.extend(items)
+            current_page += 1
+        return results
+
+    async def list_matching(self, pattern: str):
+        params = {
+            "query": pattern,
+        }
+        responses = await self._get("/jobs", params=params)
+        return self.ensure_list(responses, LeptonJob)
+
+    async def create(self, spec: LeptonJob) -> LeptonJob:
+        """
+        Create a job with the given job spec.
+        """
+        response = await self._post("/jobs", json=self.safe_json(spec))
+        return self.ensure_type(response, LeptonJob)
+
+    async def get(
+        self,
+        id_or_job: Union[str, LeptonJob],
+        *,
+        job_query_mode: str = LeptonJobQueryMode.AliveAndArchive.value,
+    ) -> LeptonJob:
+        response = await self._get(
+            f"/jobs/{self._to_id(id_or_job)}",
+            params={"job_query_mode": job_query_mode} if job_query_mode else None,
+        )
+        return self.ensure_type(response, LeptonJob)
+
+    async def update(self, name_or_job: Union[str, LeptonJob], spec: LeptonJob) -> bool:
+        response = await self._patch(
+            f"/jobs/{self._to_id(name_or_job)}", json=self.safe_json(spec)
+        )
+        return self.ensure_ok(response)
+
+    async def delete(
+        self,
+        name_or_job: Union[str, LeptonJob],
+        *,
+        job_query_mode: str = LeptonJobQueryMode.AliveOnly.value,
+    ) -> bool:
+        response = await self._delete(
+            f"/jobs/{self._to_id(name_or_job)}",
+            params={"job_query_mode": job_query_mode} if job_query_mode else None,
+        )
+        return self.ensure_ok(response)
+
+    async def get_events(self, name_or_job: Union[str, LeptonJob]) -> List[LeptonEvent]:
+        response = await self._get(f"/jobs/{self._to_id(name_or_job)}/events")
+        return self.ensure_list(response, LeptonEvent)
+
+    async def get_replicas(
+        self,
+        name_or_job: Union[str, LeptonJob],
+        job_query_mode: str = "alive_and_archive",
+    ) -> List[Replica]:
+        response = await self._get(
+            f"/jobs/{self._to_id(name_or_job)}/replicas",
+            params={"job_query_mode": job_query_mode},
+        )
+        return self.ensure_list(response, Replica)
+
+    async def get_log(
+        self,
+        id_or_job: Union[str, LeptonJob],
+        replica: Union[str, Replica],
+        timeout: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Gets the log of the given job's specified replica, see JobAPI.get_log.
+        Iterate over it with `async for`.
+        """
+        replica_id = replica if isinstance(replica, str) else replica.metadata.id_
+        response = await self._get(
+            f"/jobs/{self._to_id(id_or_job)}/replicas/{replica_id}/log",
+            stream=True,
+            timeout=timeout,
+        )
+        async for chunk in _aiter_log(response):
+            yield chunk
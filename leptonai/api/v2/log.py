@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Any, Dict, Optional, Union
 
 from leptonai.api.v2.api_resource import APIResourse
 from leptonai.api.v2.types.deployment import LeptonDeployment
@@ -7,6 +7,108 @@ from leptonai.api.v2.types.replica import Replica
 from leptonai.api.v2.types.job import LeptonJobQueryMode
 
 
+def _time_series_params(
+    name_or_deployment: Union[str, LeptonDeployment, None],
+    name_or_job: Union[str, LeptonJob, None],
+    replica: Union[str, Replica, None],
+    start: Optional[int],
+    end: Optional[int],
+    interval_ms: Optional[int],
+    limit: Optional[int],
+    q: Optional[str],
+    job_query_mode: Optional[str],
+    direction: Optional[str],
+) -> Dict[str, Any]:
+    """
+    Returns the query parameters of /logs/timeseries.
+    """
+    query_kwargs: Dict[str, Any] = {}
+
+    if start is not None:
+        query_kwargs["start"] = start
+    if end is not None:
+        query_kwargs["end"] = end
+    if interval_ms is not None:
+        query_kwargs["interval_ms"] = interval_ms
+    if limit is not None:
+        query_kwargs["limit"] = limit
+    if q is not None:
+        query_kwargs["q"] = q
+    if job_query_mode:
+        query_kwargs["job_query_mode"] = job_query_mode
+    if direction:
+        query_kwargs["direction"] = direction
+
+    if name_or_deployment:
+        deployment_id = (
+            name_or_deployment
+            if isinstance(name_or_deployment, str)
+            else name_or_deployment.metadata.id_
+        )
+        query_kwargs["deployment"] = deployment_id
+    elif name_or_job:
+        job_id = (
+            name_or_job if isinstance(name_or_job, str) else name_or_job.metadata.id_
+        )
+        query_kwargs["job"] = job_id
+
+    if replica:
+        replica_id = replica if isinstance(replica, str) else replica.metadata.id_
+        query_kwargs["replica"] = replica_id
+    return query_kwargs
+
+
+def _log_params(
+    name_or_deployment: Union[str, LeptonDeployment, None],
+    name_or_job: Union[str, LeptonJob, None],
+    replica: Union[str, Replica, None],
+    job_history_name: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
+    limit: int,
+    q: str,
+    job_query_mode: Optional[str],
+) -> Dict[str, Any]:
+    """
+    Returns the query parameters of /logs.
+    """
+    query_kwargs: Dict[str, Any] = {}
+    if start and end:
+        query_kwargs["start"] = start
+        query_kwargs["end"] = end
+        query_kwargs["timestamps"] = True
+        query_kwargs["direction"] = "backward"
+        query_kwargs["limit"] = limit
+        query_kwargs["q"] = q
+        if job_query_mode:
+            query_kwargs["job_query_mode"] = job_query_mode
+    elif start or end:
+        raise RuntimeError("For historical logs, both start or end must be specified")
+
+    if name_or_deployment:
+        deployment_id = (
+            name_or_deployment
+            if isinstance(name_or_deployment, str)
+            else name_or_deployment.metadata.id_
+        )
+        query_kwargs["deployment"] = deployment_id
+
+    elif name_or_job:
+        job_id = (
+            name_or_job if isinstance(name_or_job, str) else name_or_job.metadata.id_
+        )
+
+        query_kwargs["job"] = job_id
+
+    elif job_history_name:
+        query_kwargs["job_history_name"] = job_history_name
+
+    if replica:
+        replica_id = replica if isinstance(replica, str) else replica.metadata.id_
+        query_kwargs["replica"] = replica_id
+    return query_kwargs
+
+
 class LogAPI(APIResourse):
     def get_log_time_series(
         self,
@@ -39,41 +141,18 @@ class LogAPI(APIResourse):
             JSON-decoded response from the API
         """
 
-        query_kwargs = {}
-
-        if start is not None:
-            query_kwargs["start"] = start
-        if end is not None:
-            query_kwargs["end"] = end
-        if interval_ms is not None:
-            query_kwargs["interval_ms"] = interval_ms
-        if limit is not None:
-            query_kwargs["limit"] = limit
-        if q is not None:
-            query_kwargs["q"] = q
-        if job_query_mode:
-            query_kwargs["job_query_mode"] = job_query_mode
-        if direction:
-            query_kwargs["direction"] = direction
-
-        if name_or_deployment:
-            deployment_id = (
-                name_or_deployment
-                if isinstance(name_or_deployment, str)
-                else name_or_deployment.metadata.id_
-            )
-            query_kwargs["deployment"] = deployment_id
-        elif name_or_job:
-            job_id = (
-                name_or_job
-                if isinstance(name_or_job, str)
-                else name_or_job.metadata.id_
-            )
-            query_kwargs["job"] = job_id
-
-        if replica:
-            replica_id = replica if isinstance(replica, str) else replica.metadata.id_
-            query_kwargs["replica"] = replica_id
+        query_kwargs = _time_series_params(
+            name_or_deployment,
+            name_or_job,
+            replica,
+            start,
+            end,
+            interval_ms,
+            limit,
+            q,
+            job_query_mode,
+            direction,
+        )
 
         response = self._get(
             "/logs/timeseries",
@@ -98,50 +177,105 @@ class LogAPI(APIResourse):
         q: str = "",
         job_query_mode: str = "alive_and_archive",
     ) -> str:
-        query_kwargs = {}
-        if start and end:
-            query_kwargs["start"] = start
-            query_kwargs["end"] = end
-            query_kwargs["timestamps"] = True
-            query_kwargs["direction"] = "backward"
-            query_kwargs["limit"] = limit
-            query_kwargs["q"] = q
-            if job_query_mode:
-                query_kwargs["job_query_mode"] = job_query_mode
-        elif start or end:
+        query_kwargs = _log_params(
+            name_or_deployment,
+            name_or_job,
+            replica,
+            job_history_name,
+            start,
+            end,
+            limit,
+            q,
+            job_query_mode,
+        )
+
+        response = self._get(
+            "/logs",
+            params=query_kwargs,
+        )
+        if not response.ok:
             raise RuntimeError(
-                "For historical logs, both start or end must be specified"
+                f"API call failed with status code {response.status_code}. Details:"
+                f" {response.text}"
             )
+        return response.json()
 
-        if name_or_deployment:
-            deployment_id = (
-                name_or_deployment
-                if isinstance(name_or_deployment, str)
-                else name_or_deployment.metadata.id_
-            )
-            query_kwargs["deployment"] = deployment_id
 
-        elif name_or_job:
-            job_id = (
-                name_or_job
-                if isinstance(name_or_job, str)
-                else name_or_job.metadata.id_
-            )
+class AsyncLogAPI(APIResourse):
+    """
+    The asyncio counterpart of LogAPI, used by AsyncAPIClient.
+    """
 
-            query_kwargs["job"] = job_id
+    async def get_log_time_series(
+        self,
+        name_or_deployment: Union[str, LeptonDeployment] = None,
+        name_or_job: Union[str, LeptonJob] = None,
+        replica: Union[str, Replica] = None,
+        start: int = None,
+        end: int = None,
+        interval_ms: int = None,
+        limit: int = None,
+        q: str = "",
+        job_query_mode: str = LeptonJobQueryMode.AliveAndArchive.value,
+        direction: str = "backward",
+    ):
+        """
+        Call /logs/timeseries to retrieve aggregated time series for logs, see
+        LogAPI.get_log_time_series.
+        """
+        query_kwargs = _time_series_params(
+            name_or_deployment,
+            name_or_job,
+            replica,
+            start,
+            end,
+            interval_ms,
+            limit,
+            q,
+            job_query_mode,
+            direction,
+        )
 
-        elif job_history_name:
-            query_kwargs["job_history_name"] = job_history_name
+        response = await self._get(
+            "/logs/timeseries",
+            params=query_kwargs,
+        )
+        if response.is_error:
+            raise RuntimeError(
+                f"API call failed with status code {response.status_code}. Details:"
+                f" {response.text}"
+            )
+        return response.json()
 
-        if replica:
-            replica_id = replica if isinstance(replica, str) else replica.metadata.id_
-            query_kwargs["replica"] = replica_id
+    async def get_log(
+        self,
+        name_or_deployment: Union[str, LeptonDeployment] = None,
+        name_or_job: Union[str, LeptonJob] = None,
+        replica: Union[str, Replica] = None,
+        job_history_name: str = None,
+        start: str = None,
+        end: str = None,
+        limit: int = 5000,
+        q: str = "",
+        job_query_mode: str = "alive_and_archive",
+    ) -> str:
+        query_kwargs = _log_params(
+            name_or_deployment,
+            name_or_job,
+            replica,
+            job_history_name,
+            start,
+            end,
+            limit,
+            q,
+            job_query_mode,
+        )
 
-        response = self._get(
+        response = await self._get(
             "/logs",
             params=query_kwargs,
         )
-        if not response.ok:
+        if response.is_error:
             raise RuntimeError(
                 f"API call failed with status code {response.status_code}. Details:"
                 f" {response.text}"
@@ -1,4 +1,4 @@
-from typing import Union, List, Iterator, Optional
+from typing import AsyncIterator, Union, List, Iterator, Optional
 import warnings
 
 from .api_resource import APIResourse
@@ -114,3 +114,71 @@ class PodAPI(APIResourse):
 
     # TODO: implement api for the various metrics, but for now we will simply ask users
     # to view the metrics from the web portal.
+
+
+class AsyncPodAPI(APIResourse):
+    """
+    The asyncio counterpart of PodAPI, used by AsyncAPIClient.
+    """
+
+    _to_name = PodAPI._to_name
+    _sanity_check_pod_spec = PodAPI._sanity_check_pod_spec
+
+    async def list_all(self) -> List[LeptonDeployment]:
+        response = await self._get("/deployments")
+        deployments = self.ensure_list(response, LeptonDeployment)
+        return [d for d in deployments if d.spec.is_pod]
+
+    async def create(self, spec: LeptonDeployment):
+        """
+        Create a deployment with the given deployment spec.
+        """
+        spec.spec = self._sanity_check_pod_spec(spec.spec)
+        response = await self._post("/deployments", json=self.safe_json(spec))
+        return self.ensure_ok(response)
+
+    async def get(self, name_or_pod: Union[str, LeptonDeployment]) -> LeptonDeployment:
+        return await self._client.deployment.get(name_or_pod)
+
+    async def update(
+        self, name_or_deployment: Union[str, LeptonDeployment], spec: LeptonDeployment
+    ) -> LeptonDeployment:
+        return PodAPI.update(self, name_or_deployment, spec)  # type: ignore
+
+    async def delete(self, name_or_deployment: Union[str, LeptonDeployment]) -> bool:
+        return await self._client.deployment.delete(name_or_deployment)
+
+    async def restart(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> LeptonDeployment:
+        return await self._client.deployment.restart(name_or_deployment)
+
+    async def get_readiness(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> ReadinessIssue:
+        return await self._client.deployment.get_readiness(name_or_deployment)
+
+    async def get_termination(
+        self, name_or_deployment: Union[str, LeptonDeployment]
+    ) -> DeploymentTerminations:
+        return await self._client.deployment.get_termination(name_or_deployment)
+
+    async def get_log(
+        self,
+        name_or_deployment: Union[str, LeptonDeployment],
+        timeout: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Gets the log of the given pod, see PodAPI.get_log. Iterate over it with
+        `async for`.
+        """
+        replicas = await self._client.deployment.get_replicas(name_or_deployment)
+        if len(replicas) != 1:
+            raise RuntimeError(
+                "You encountered a programming error: number of replicas should be 1"
+                " for pods."
+            )
+        async for chunk in self._client.deployment.get_log(
+            name_or_deployment, replicas[0], timeout
+        ):
+            yield chunk
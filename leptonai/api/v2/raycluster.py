@@ -213,3 +213,51 @@ class RayClusterAPI(APIResourse):
     def delete(self, name_or_raycluster: Union[str, LeptonRayCluster]) -> bool:
         response = self._delete(f"/rayclusters/{self._to_name(name_or_raycluster)}")
         return self.ensure_ok(response)
+
+
+class AsyncRayClusterAPI(APIResourse):
+    """
+    The asyncio counterpart of RayClusterAPI, used by AsyncAPIClient.
+    """
+
+    _validate_update_spec_only_min_replicas = (
+        RayClusterAPI._validate_update_spec_only_min_replicas
+    )
+    _to_name = RayClusterAPI._to_name
+
+    async def list_all(self) -> List[LeptonRayCluster]:
+        response = await self._get("/rayclusters")
+        return self.ensure_list(response, LeptonRayCluster)
+
+    async def create(self, spec: LeptonRayCluster) -> bool:
+        response = await self._post("/rayclusters", json=self.safe_json(spec))
+        return self.ensure_ok(response)
+
+    async def get(
+        self, name_or_raycluster: Union[str, LeptonRayCluster]
+    ) -> LeptonRayCluster:
+        response = await self._get(f"/rayclusters/{self._to_name(name_or_raycluster)}")
+        return self.ensure_type(response, LeptonRayCluster)
+
+    async def update(
+        self,
+        name_or_raycluster: Union[str, LeptonRayCluster],
+        spec: LeptonRayCluster,
+    ) -> LeptonRayCluster:
+        if spec.spec is None:
+            raise ValueError("LeptonRayCluster.spec must not be None for update.")
+
+        payload = self.safe_json(spec)
+
+        self._validate_update_spec_only_min_replicas(payload)
+
+        response = await self._patch(
+            f"/rayclusters/{self._to_name(name_or_raycluster)}", json=payload
+        )
+        return self.ensure_type(response, LeptonRayCluster)
+
+    async def delete(self, name_or_raycluster: Union[str, LeptonRayCluster]) -> bool:
+        response = await self._delete(
+            f"/rayclusters/{self._to_name(name_or_raycluster)}"
+        )
+        return self.ensure_ok(response)
@@ -24,3 +24,22 @@ class ResourceShapeAPI(APIResourse):
 
         response = self._get("/shapes", params=params)
         return self.ensure_list(response, Shape)
+
+
+class AsyncResourceShapeAPI(APIResourse):
+    """
+    The asyncio counterpart of ResourceShapeAPI, used by AsyncAPIClient.
+    """
+
+    async def list_shapes(
+        self, node_group: Optional[str] = None, purpose: Optional[str] = None
+    ) -> List[Shape]:
+        """List resource shapes, see ResourceShapeAPI.list_shapes."""
+        params = {}
+        if node_group:
+            params["node_groups"] = node_group
+        if purpose:
+            params["purpose"] = purpose
+
+        response = await self._get("/shapes", params=params)
+        return self.ensure_list(response, Shape)
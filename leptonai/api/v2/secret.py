@@ -17,3 +17,21 @@ class SecretAPI(APIResourse):
     def delete(self, name: str) -> bool:
         response = self._delete(f"/usersecrets/{name}")
         return self.ensure_ok(response)
+
+
+class AsyncSecretAPI(APIResourse):
+    """
+    The asyncio counterpart of SecretAPI, used by AsyncAPIClient.
+    """
+
+    async def list_all(self) -> List[SecretItem]:
+        response = await self._get("/usersecrets")
+        return self.ensure_list(response, SecretItem)
+
+    async def create(self, secrets: List[SecretItem]) -> bool:
+        response = await self._post("/usersecrets", json=self.safe_json(secrets))
+        return self.ensure_ok(response)
+
+    async def delete(self, name: str) -> bool:
+        response = await self._delete(f"/usersecrets/{name}")
+        return self.ensure_ok(response)
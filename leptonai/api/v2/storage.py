@@ -120,3 +120,113 @@ class StorageAPI(APIResourse):
     def total_file_system_usage_bytes(self) -> FileSystem:
         response = self._get("/storage/du")
         return self.ensure_type(response, FileSystem)
+
+
+class AsyncStorageAPI(APIResourse):
+    """
+    The asyncio counterpart of StorageAPI, used by AsyncAPIClient.
+    """
+
+    async def get_file_type(
+        self, file_path: str, file_system: Optional[str] = None
+    ) -> Union[str, None]:
+        """
+        Check if the contents at file_path stored on the remote server are a file or
+        a directory, see StorageAPI.get_file_type.
+        """
+        file_path = file_path.rstrip(os.sep)
+        file_path = _prepend_separator(file_path)
+        parent_dir = (
+            "/" if os.path.dirname(file_path) == "" else os.path.dirname(file_path)
+        )
+
+        file_system = file_system or DEFAULT_STORAGE_VOLUME_NAME
+
+        parent_contents = await self.get_dir(parent_dir, file_system)
+
+        base = os.path.basename(file_path)
+        for dir_info in parent_contents:
+            if dir_info.name == base:
+                return dir_info.type
+        return None
+
+    async def list_storage(self) -> List[FileSystem]:
+        response = await self._get("/storage")
+        return self.ensure_list(response, FileSystem)
+
+    async def get_file(
+        self, remote_path: str, local_path: str, file_system: Optional[str] = None
+    ) -> Dict[str, str]:
+        file_system = file_system or DEFAULT_STORAGE_VOLUME_NAME
+        response = await self._get(
+            f"/storage/{file_system}{_prepend_separator(remote_path)}",
+            stream=True,
+        )
+        try:
+            if response.is_error:
+                await response.aread()
+            self.ensure_ok(response)
+
+            try:
+                with open(local_path, "wb") as file:
+                    async for chunk in response.aiter_bytes(chunk_size=4096):
+                        if chunk:
+                            file.write(chunk)
+            except Exception as e:
+                return self._print_programming_error(response, e)
+        finally:
+            await response.aclose()
+
+        return {"name": local_path}
+
+    async def get_dir(
+        self, remote_path: str, file_system: Optional[str] = None
+    ) -> List[DirInfo]:
+        file_system = file_system or DEFAULT_STORAGE_VOLUME_NAME
+        response = await self._get(
+            f"/storage/{file_system}{_prepend_separator(remote_path)}",
+        )
+        return self.ensure_list(response, DirInfo)
+
+    async def create_file(
+        self, local_path: str, remote_path: str, file_system: Optional[str] = None
+    ) -> bool:
+        file_system = file_system or DEFAULT_STORAGE_VOLUME_NAME
+        with open(local_path, "rb") as file:
+            response = await self._post(
+                f"/storage/{file_system}{_prepend_separator(remote_path)}",
+                files={"file": file},
+            )
+            return self.ensure_ok(response)
+
+    async def create_dir(
+        self, additional_path: str, file_system: Optional[str] = None
+    ) -> bool:
+        file_system = file_system or DEFAULT_STORAGE_VOLUME_NAME
+        response = await self._put(
+            f"/storage/{file_system}{_prepend_separator(additional_path)}"
+        )
+        return self.ensure_ok(response)
+
+    async def delete_file_or_dir(
+        self, additional_path: str, file_system: Optional[str] = None, removeall=False
+    ) -> bool:
+        file_system = file_system or DEFAULT_STORAGE_VOLUME_NAME
+        response = await self._delete(
+            f"/storage/{file_system}{_prepend_separator(additional_path)}",
+            params={"removeall": "true"} if removeall else None,
+        )
+        return self.ensure_ok(response)
+
+    async def check_exists(
+        self, additional_path: str, file_system: Optional[str] = None
+    ) -> bool:
+        file_system = file_system or DEFAULT_STORAGE_VOLUME_NAME
+        response = await self._head(
+            f"/storage/{file_system}{_prepend_separator(additional_path)}"
+        )
+        return response.status_code == 200
+
+    async def total_file_system_usage_bytes(self) -> FileSystem:
+        response = await self._get("/storage/du")
+        return self.ensure_type(response, FileSystem)
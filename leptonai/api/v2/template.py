@@ -61,3 +61,47 @@ class TemplateAPI(APIResourse):
     def get_private(self, template_id: str) -> LeptonTemplate:
         response = self._get(f"/templates/private/{template_id}")
         return self.ensure_type(response, LeptonTemplate)
+
+
+class AsyncTemplateAPI(APIResourse):
+    """
+    The asyncio counterpart of TemplateAPI, used by AsyncAPIClient.
+    """
+
+    async def render(
+        self,
+        template_id: str,
+        payload: Dict[str, Any],
+        is_private: Optional[bool] = None,
+        is_pod: Optional[bool] = None,
+    ) -> LeptonJob:
+        """Render a template, see TemplateAPI.render."""
+        if is_private is None:
+            pubs = await self.list_public()
+            in_public = any(t.metadata and t.metadata.id_ == template_id for t in pubs)
+            ns = "public" if in_public else "private"
+        else:
+            ns = "private" if is_private else "public"
+
+        response = await self._post(
+            f"/templates/{ns}/{template_id}/render", json=payload
+        )
+        if is_pod:
+            return self.ensure_type(response, LeptonDeployment)
+        return self.ensure_type(response, LeptonJob)
+
+    async def list_public(self) -> Any:
+        response = await self._get("/templates/public")
+        return self.ensure_list(response, LeptonTemplate)
+
+    async def list_private(self) -> Any:
+        response = await self._get("/templates/private")
+        return self.ensure_list(response, LeptonTemplate)
+
+    async def get_public(self, template_id: str) -> LeptonTemplate:
+        response = await self._get(f"/templates/public/{template_id}")
+        return self.ensure_type(response, LeptonTemplate)
+
+    async def get_private(self, template_id: str) -> LeptonTemplate:
+        response = await self._get(f"/templates/private/{template_id}")
+        return self.ensure_type(response, LeptonTemplate)
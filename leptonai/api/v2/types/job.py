@@ -1,5 +1,5 @@
 from enum import Enum
-from pydantic import BaseModel, field_validator, ConfigDict
+from pydantic import BaseModel, Field, field_validator, ConfigDict
 from typing import Optional, List, Any
 from loguru import logger
 
@@ -45,15 +45,15 @@ class LeptonJobUserSpec(BaseModel):
 
     resource_shape: Optional[str] = None
     affinity: Optional[LeptonResourceAffinity] = None
-    container: LeptonContainer = LeptonContainer()
+    container: LeptonContainer = Field(default_factory=LeptonContainer)
     shared_memory_size: Optional[int] = None
     completions: Optional[int] = 1
     parallelism: Optional[int] = 1
     max_failure_retry: Optional[int] = None
     max_job_failure_retry: Optional[int] = None
-    envs: Optional[List[EnvVar]] = []
-    mounts: Optional[List[Mount]] = []
-    image_pull_secrets: Optional[List[str]] = []
+    envs: Optional[List[EnvVar]] = Field(default_factory=list)
+    mounts: Optional[List[Mount]] = Field(default_factory=list)
+    image_pull_secrets: Optional[List[str]] = Field(default_factory=list)
     ttl_seconds_after_finished: Optional[int] = DefaultTTLSecondsAfterFinished
     intra_job_communication: Optional[bool] = None
     user_security_context: Optional[LeptonUserSecurityContext] = None
@@ -127,10 +127,10 @@ class LeptonJobStatusDetails(BaseModel):
 
 
 class LeptonJobStatus(LeptonJobStatusDetails):
-    job_history: List[LeptonJobStatusDetails] = []
+    job_history: List[LeptonJobStatusDetails] = Field(default_factory=list)
 
 
 class LeptonJob(BaseModel):
     metadata: Metadata
-    spec: LeptonJobUserSpec = LeptonJobUserSpec()
+    spec: LeptonJobUserSpec = Field(default_factory=LeptonJobUserSpec)
     status: Optional[LeptonJobStatus] = None
@@ -21,6 +21,7 @@ from .util import (
     format_timestamp_ms,
     resolve_save_path,
     PathResolutionError,
+    get_client,
 )
 
 
@@ -942,7 +943,7 @@ def create(
     """
     Creates an endpoint from a container image.
     """
-    client = APIClient()
+    client = get_client()
 
     # Load spec from file if provided
     if file:
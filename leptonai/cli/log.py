@@ -4,7 +4,7 @@ import traceback
 
 from loguru import logger
 from .util import _get_newest_job_by_name
-from .util import click_group, console
+from .util import click_group, console, CLI_RETRY_POLICY
 from .util import resolve_save_path, PathResolutionError
 
 from ..api.v2.client import APIClient
@@ -17,6 +17,9 @@ from datetime import datetime, timedelta, timezone
 from rich.progress import Progress
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Default number of threads that fetch the time windows of a log download.
+_DEFAULT_WORKERS = 32
+
 str_time_format = "%Y-%m-%d %H:%M:%S.%f"
 str_date_format = "%Y-%m-%d"
 
@@ -187,6 +190,7 @@ def safe_load_json(string):
 
 
 def fetch_all_within_time_slot(
+    client,
     deployment,
     job,
     replica,
@@ -196,37 +200,26 @@ def fetch_all_within_time_slot(
     time_end,
     cur_log_result,
 ):
-    client = APIClient()
     while time_end >= time_start:
-        max_retries = 5
-        base_delay = 0.5
-        log_dict = None
-        for retry in range(max_retries):
-            try:
-                log_dict = client.log.get_log(
-                    name_or_deployment=deployment,
-                    name_or_job=job,
-                    replica=replica,
-                    job_history_name=job_history_name,
-                    start=time_start,
-                    end=time_end,
-                    limit=10000,
-                    q=query,
-                )
-                break
-            except Exception as e:
-                logger.trace(traceback.format_exc())
-                logger.trace(e)
-                delay = base_delay * (2 ** (retry))
-                if retry < max_retries - 1:
-                    time.sleep(delay)
-
-        if log_dict is None:
+        # Transient errors are retried by the client.
+        try:
+            log_dict = client.log.get_log(
+                name_or_deployment=deployment,
+                name_or_job=job,
+                replica=replica,
+                job_history_name=job_history_name,
+                start=time_start,
+                end=time_end,
+                limit=10000,
+                q=query,
+            )
+        except Exception as e:
+            logger.trace(traceback.format_exc())
+            logger.trace(e)
             console.print(
                 "[yellow]Warning[/]: failed to fetch logs for time range"
-                f" {_epoch_to_time_str(time_start)}–{_epoch_to_time_str(time_end)} after"
-                f" {max_retries} retries; skipping this time range. Output may be"
-                " incomplete. "
+                f" {_epoch_to_time_str(time_start)}–{_epoch_to_time_str(time_end)};"
+                " skipping this time range. Output may be incomplete. "
             )
             return
 
@@ -448,7 +441,11 @@ def log_command(
             "Only one of 'deployment', 'job', or 'job_history_name' can be specified."
         )
 
-    client = APIClient()
+    # One client is shared by all the threads that fetch the time windows, so
+    # its pool must hold a connection for each of them.
+    client = APIClient(
+        pool_maxsize=max(workers or 0, _DEFAULT_WORKERS), retry=CLI_RETRY_POLICY
+    )
 
     if job_name is not None:
         job = _get_newest_job_by_name(job_name)
@@ -552,7 +549,7 @@ def log_command(
                 worker_count = (
                     min(len(time_windows), workers)
                     if workers is not None
-                    else min(len(time_windows), 32)
+                    else min(len(time_windows), _DEFAULT_WORKERS)
                 )
                 with ThreadPoolExecutor(max_workers=worker_count) as executor:
                     task = progress.add_task(
@@ -564,6 +561,7 @@ def log_command(
 
                         future = executor.submit(
                             fetch_all_within_time_slot,
+                            client,
                             deployment,
                             job,
                             replica,
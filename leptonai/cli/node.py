@@ -10,7 +10,6 @@ from .util import (
     make_name_id_cell,
     resolve_node_groups,
 )
-from ..api.v2.client import APIClient
 
 
 @click_group()
@@ -616,7 +615,7 @@ def resource_shape_command(node_group=None, purpose=None):
       - Shapes: one shape per block, first line is name, second line shows colored availability for pod/endpoint/job
       - Detailed: description and colored resource details
     """
-    client = APIClient()
+    client = get_client()
     node_groups = client.nodegroup.list_all()
 
     if node_group:
@@ -690,7 +689,7 @@ def storage_command(node_group=None):
     Shows the volumes attached to each node group including their size,
     source, mount path, and creation mode.
     """
-    client = APIClient()
+    client = get_client()
     node_groups = client.nodegroup.list_all()
 
     if node_group:
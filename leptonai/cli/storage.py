@@ -16,7 +16,7 @@ from .util import (
     check,
     _get_only_replica_public_ip,
 )
-from ..api.v2.client import APIClient
+from ..api.v2.client import APIClient, RetryPolicy
 
 custom_theme = Theme({
     "directory": "bold cyan",
@@ -24,6 +24,10 @@ custom_theme = Theme({
 
 console = Console(highlight=False, theme=custom_theme)
 
+# Backoff between the attempts of an rsync upload with --auto-recover, which
+# waits at least 3 seconds.
+_RSYNC_RETRY = RetryPolicy(backoff_base=3.0, backoff_max=60.0)
+
 
 def print_dir_contents(dir_path, dir_infos):
     """
@@ -366,7 +370,9 @@ def upload(
             attempts -= 1
             if attempts > 0:
                 console.print("[green]Retrying... [/]")
-                time.sleep(3)
+                # Waits at least backoff_base, as the jitter alone may not wait.
+                delay = _RSYNC_RETRY.backoff(auto_recover - attempts - 1)
+                time.sleep(max(_RSYNC_RETRY.backoff_base, delay))
 
         if attempts <= 0:
             console.print(
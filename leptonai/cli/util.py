@@ -15,7 +15,7 @@ from leptonai.api.v2.utils import WorkspaceError, WorkspaceConfigurationError
 
 from rich.console import Console
 from leptonai.api.v2.types.job import LeptonJob, LeptonJobQueryMode
-from leptonai.api.v2.client import APIClient
+from leptonai.api.v2.client import APICache, APIClient, RetryPolicy
 
 from leptonai.api.v2.types.deployment import (
     ContainerPort,
@@ -245,11 +245,52 @@ def is_valid_url(candidate_str: str) -> bool:
 # Singleton API client for CLI process
 _client_singleton: Optional[APIClient] = None
 
+# The retry policy of the api clients of the CLI: reads are retried up to 5 times
+# on connection errors, timeouts, 429, 502, 503 and 504, within a minute.
+CLI_RETRY_POLICY = RetryPolicy(
+    max_retries=5,
+    backoff_base=0.5,
+    idempotent_methods=("GET", "HEAD", "OPTIONS"),
+    deadline=60.0,
+)
+
+# The endpoints whose responses the CLI caches, and for how many seconds they are
+# fresh. Node groups and resource shapes rarely change; deployments and secrets
+# are always revalidated with their ETag, if the server sends one, so that a
+# command never acts on a stale list.
+_CLI_CACHE_TTLS = {
+    "/dedicated-node-groups": 60,
+    "/shapes": 300,
+    "/deployments": 0,
+    "/usersecrets": 0,
+}
+
+# Deployment specs carry env values and secrets their values, so they are never
+# written to disk.
+_CLI_CACHE_MEMORY_ONLY = ("/deployments", "/usersecrets")
+
+
+def _cli_disk_cache_enabled() -> bool:
+    """
+    Whether the cached responses are kept on disk, so that consecutive commands
+    reuse them. Off unless LEPTON_CLI_DISK_CACHE is set to a true value.
+    """
+    value = os.environ.get("LEPTON_CLI_DISK_CACHE", "")
+    return value.lower() in ("1", "true", "yes", "on")
+
 
 def get_client() -> APIClient:
     global _client_singleton
     if _client_singleton is None:
-        _client_singleton = APIClient()
+        _client_singleton = APIClient(
+            retry=CLI_RETRY_POLICY,
+            cache=APICache(
+                ttl=None,
+                ttls=_CLI_CACHE_TTLS,
+                persist=_cli_disk_cache_enabled(),
+                memory_only=_CLI_CACHE_MEMORY_ONLY,
+            ),
+        )
     return _client_singleton
 
 
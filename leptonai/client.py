@@ -1,18 +1,104 @@
+import asyncio
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import contextlib
 import keyword
-from typing import Callable, Dict, List, Set, Optional, Union, Iterable
+import os
+import threading
+import time
+from urllib.parse import urlencode
+from typing import (
+    IO,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Set,
+    Optional,
+    Tuple,
+    Union,
+    Iterable,
+    Iterator,
+)
+import weakref
 
-from fastapi.encoders import jsonable_encoder
+import contextlib2
 import httpx
 from loguru import logger
 
+from leptonai._internal.client_breaker import (  # noqa
+    CircuitBreaker,
+    CircuitOpenError,
+    _AsyncBreakingTransport,
+    _BreakingTransport,
+    _CircuitState,
+)
+from leptonai._internal.client_cache import (  # noqa
+    CACHE_EXTENSION,
+    ResponseCache,
+    _AsyncCachingTransport,
+    _CachingTransport,
+)
+from leptonai._internal.client_compression import (  # noqa
+    RequestCompression,
+    _AsyncCompressingTransport,
+    _CompressingTransport,
+    _CompressionState,
+)
+from leptonai._internal.client_encoding import _encode_json_body
+from leptonai._internal.client_limiter import (  # noqa
+    PRIORITY_EXTENSION,
+    ConcurrencyLimit,
+    _AsyncLimitingTransport,
+    _LimitingTransport,
+)
+from leptonai._internal.client_llm import (  # noqa
+    CHAT_COMPLETIONS_SUFFIX,
+    COMPLETIONS_SUFFIX,
+    AsyncCompletionStream,
+    CompletionStream,
+    _find_openai_path,
+    _first_model,
+    _models_path,
+)
+from leptonai._internal.client_output import _OutputWriter
+from leptonai._internal.client_stats import RequestMetrics, _StatsRecorder  # noqa
+from leptonai._internal.client_stream import (  # noqa
+    STREAM_DECODERS,
+    ServerSentEvent,
+    _get_stream_decoder,
+)
+from leptonai._internal.client_transport import (  # noqa
+    RetryPolicy,
+    _AsyncBalancingTransport,
+    _AsyncRetryTransport,
+    _BalancingTransport,
+    _EndpointPool,
+    _RetryTransport,
+)
+from leptonai._internal.client_websocket import (  # noqa
+    AsyncWebSocketConnection,
+    WebSocketConnection,
+    _is_websocket_path,
+    _websocket_url,
+)
+from leptonai._internal.keepalive import (
+    _WARMUP_TIMEOUT,
+    _hold_concurrently,
+    _KeepaliveThread,
+)
 from leptonai._internal.client_utils import (  # noqa
+    _get_conditional_headers,
     _get_method_docstring,
     _get_positional_argument_error_message,
+    _get_requestbody_content_types,
+    _load_cached_openapi,
+    _save_cached_openapi,
 )
 from leptonai.api.v2.workspace_record import WorkspaceRecord
 from leptonai.config import DEFAULT_PORT, build_endpoint_url
-from leptonai.types import FileParam  # noqa
+from leptonai.types import File, FileParam  # noqa
 from leptonai.util import is_valid_url
 
 
@@ -46,6 +132,110 @@ def current() -> str:
     return id
 
 
+# Chunk size used when streaming file-like arguments to the server.
+_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _is_binary_argument(value: Any) -> bool:
+    """
+    Returns whether an argument can be sent as raw bytes instead of json.
+    """
+    if isinstance(value, File):
+        return isinstance(value.content, bytes)
+    return hasattr(value, "read")
+
+
+def _get_form_value(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return _encode_json_body(value).decode("utf-8")
+
+
+def _get_multipart_kwargs(kwargs: Dict) -> Dict:
+    """
+    Converts the keyword arguments of a call into multipart/form-data fields and
+    files. httpx streams the file parts, so file-like objects are not read into
+    memory at once.
+    """
+    data: Dict[str, Any] = {}
+    files: Dict[str, Any] = {}
+    for k, v in kwargs.items():
+        if _is_binary_argument(v):
+            if isinstance(v, File):
+                files[k] = (k, v.content, "application/octet-stream")
+            else:
+                filename = os.path.basename(getattr(v, "name", "") or k)
+                files[k] = (filename, v, "application/octet-stream")
+        elif v is None:
+            continue
+        elif isinstance(v, (list, tuple)):
+            data[k] = [_get_form_value(x) for x in v]
+        else:
+            data[k] = _get_form_value(v)
+    return {"data": data, "files": files}
+
+
+def _build_url(workspace_or_url: str, deployment: Optional[str] = None) -> str:
+    """
+    Returns the url of a deployment, given either a full url, or a workspace id and
+    a deployment name.
+    """
+    if is_valid_url(workspace_or_url):
+        return workspace_or_url.rstrip("/")
+    # https://<workspace_id>-<deployment_name>.xenon.lepton.run
+    if deployment is None:
+        raise ValueError("You must specify the deployment name.")
+    return build_endpoint_url(workspace_or_url, deployment)
+
+
+def _resolve_token(
+    workspace_or_url: Union[str, List[Union[str, Tuple[str, str]]]],
+    token: Optional[str],
+) -> Optional[str]:
+    """
+    Returns the token to authenticate with: the given one, or else the token of
+    the workspace from the local workspace record when the deployment is given by
+    a workspace id.
+    """
+    if token is not None:
+        return token
+    if isinstance(workspace_or_url, list):
+        workspaces = [e[0] for e in workspace_or_url if isinstance(e, tuple)]
+        if not workspaces:
+            return None
+        workspace_or_url = workspaces[0]
+    if is_valid_url(workspace_or_url):
+        return None
+    info = WorkspaceRecord.get(workspace_or_url)
+    return info.auth_token if info is not None else None
+
+
+class _LazyMethod(object):
+    """
+    A placeholder for an endpoint method that is only built when it is first
+    accessed. DO NOT USE THIS CLASS DIRECTLY. This is an internal utility class.
+    """
+
+    __slots__ = ("_builder", "_method")
+
+    def __init__(self, builder: Callable[[], Callable]):
+        self._builder = builder
+        self._method: Optional[Callable] = None
+
+    def resolve(self) -> Callable:
+        if self._method is None:
+            self._method = self._builder()
+        return self._method
+
+
+def _resolve(value):
+    """
+    Returns the actual method if value is a lazy placeholder, or value itself
+    otherwise.
+    """
+    return value.resolve() if isinstance(value, _LazyMethod) else value
+
+
 class _MultipleEndpointWithDefault(object):
     """
     A class that wraps multiple endpoints with the same name and different http
@@ -77,12 +267,12 @@ class _MultipleEndpointWithDefault(object):
         return self
 
     def __call__(self, *args, **kwargs):
-        return self._default(*args, **kwargs)
+        return _resolve(self._default)(*args, **kwargs)
 
     def __getattr__(self, http_method: str) -> Callable:
         if http_method not in self.methods:
             raise AttributeError(f"No http method called {http_method} exists.")
-        return self.methods[http_method]
+        return _resolve(self.methods[http_method])
 
 
 class PathTree(object):
@@ -93,9 +283,20 @@ class PathTree(object):
         self.name = name
         self.debug_record = debug_record
 
+    def _get_resolved(self, name: str) -> Union[Callable, "PathTree"]:
+        """
+        Returns the member with the given name, building it first if it is still a
+        lazy placeholder. Raises KeyError if there is no such member.
+        """
+        value = self._path_cache[name]
+        if isinstance(value, _LazyMethod):
+            value = value.resolve()
+            self._path_cache[name] = value
+        return value
+
     def __getattr__(self, name: str) -> Union[Callable, "PathTree"]:
         try:
-            return self._path_cache[name]
+            return self._get_resolved(name)
         except KeyError:
             raise AttributeError(
                 f"No such path named {name} found. I am currently at {self.name} and"
@@ -110,7 +311,7 @@ class PathTree(object):
 
     def __getitem__(self, name: str) -> Union[Callable, "PathTree"]:
         try:
-            return self._path_cache[name]
+            return self._get_resolved(name)
         except KeyError:
             raise AttributeError(
                 f"No such path named {name} found. I am currently at {self.name} and"
@@ -254,12 +455,24 @@ class Client(object):
     that there is an openapi.json file at `https://my.com/foo/bar/openapi.json`,
     and that all calls like "/function" will be relative to `https://my.com/foo/bar`,
     aka `https://my.com/foo/bar/function`.
+
+    Every method also accepts an `_out` keyword argument, which streams the
+    response body into a file path, a bytearray, a writable memoryview, or any
+    object with a `write` method, instead of returning it. This is useful for
+    large binary responses such as generated audio or video. The call then returns
+    a dict of metadata: the status code, the content type, the number of bytes
+    written, and the file path if one was given:
+
+        meta = client.render(prompt="...", _out="video.mp4")
+
+    Similarly, the `_priority` keyword argument sets the priority of a call when
+    the client has a `concurrency_limit`.
     """
 
     # TODO: add support for creating client with name/id
     def __init__(
         self,
-        workspace_or_url: str,
+        workspace_or_url: Union[str, List[Union[str, Tuple[str, str]]]],
         deployment: Optional[str] = None,
         token: Optional[str] = None,
         stream: Optional[bool] = None,
@@ -267,6 +480,18 @@ class Client(object):
         timeout: Optional[httpx._types.TimeoutTypes] = None,
         no_check: bool = False,
         http2: bool = True,
+        limits: Optional[httpx.Limits] = None,
+        skip_healthz: bool = False,
+        openapi_cache_ttl: Optional[float] = None,
+        load_balancing: str = "p2c",
+        retry: Optional[RetryPolicy] = None,
+        stream_decoder: Optional[str] = None,
+        stats: bool = False,
+        stats_callback: Optional[Callable[[RequestMetrics], None]] = None,
+        cache: Optional[ResponseCache] = None,
+        concurrency_limit: Optional[ConcurrencyLimit] = None,
+        compression: Optional[RequestCompression] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
     ):
         """
         Initializes a Lepton client that calls a deployment in a workspace.
@@ -274,7 +499,9 @@ class Client(object):
         Args:
             workspace_or_url (str): The workspace id, or a full URL to the deployment's
                 endpoint. Use `local()` to access a local deployment, and `current()`
-                to access the current workspace if you have logged in.
+                to access the current workspace if you have logged in. To spread the
+                calls over several deployments that serve the same model, pass in a
+                list of full URLs and/or (workspace id, deployment name) tuples.
             deployment (str, optional): The deployment name. If a full URL is passed
                 in, deployment can be None.
             token (str, optional): The token to use for authentication. Defaults to None.
@@ -286,7 +513,70 @@ class Client(object):
                 In most cases, pass in a float number to specify the timeout in seconds.
             no_check: (bool, optional): Whether to skip checking for any errors and print
                 out messages. Defaults to False.
-            http2: (bool, optional): Whether to use http2. Defaults to True.
+            http2: (bool, optional): Whether to use http2. Defaults to True. With
+                http2, concurrent calls are multiplexed over a small number of
+                connections. If the server does not support http2, the client falls
+                back to http/1.1 transparently.
+            limits: (httpx.Limits, optional): The connection pool limits, such as
+                `httpx.Limits(max_connections=256, max_keepalive_connections=64,
+                keepalive_expiry=30)`. As a client talks to a single deployment host,
+                these are effectively per-host limits. Defaults to None, which uses
+                httpx's default limits.
+            skip_healthz: (bool, optional): Whether to skip the healthz probes at
+                construction time. Defaults to False.
+            openapi_cache_ttl: (float, optional): If set, the openapi specification
+                is cached on disk under the lepton cache directory, keyed by url.
+                Within this many seconds after it was fetched, the cached spec is
+                used without contacting the server; after that, it is revalidated
+                with a conditional request. Defaults to None, which disables the
+                cache.
+            load_balancing: (str, optional): When multiple endpoints are given, how
+                each call picks an endpoint: "p2c" (power of two choices, the
+                default) or "least_outstanding". Endpoints that fail to connect or
+                fail healthz() are ejected, and re-admitted after a successful
+                health probe, with exponential backoff between probes.
+            retry: (RetryPolicy, optional): The policy to retry failed calls with
+                jittered backoff that honors Retry-After, and to hedge slow
+                idempotent calls. See `RetryPolicy` for details. Defaults to None,
+                which sends every call exactly once.
+            stream_decoder: (str, optional): When stream is True, decode streamed
+                responses instead of yielding raw bytes. "sse" yields
+                `ServerSentEvent` objects and stops at an OpenAI-style "[DONE]"
+                event, "ndjson" yields one json object per line, and "auto" picks
+                one of them from the response content type (falling back to raw
+                bytes). Defaults to None, which yields raw bytes.
+            stats: (bool, optional): Whether to record, per path, rolling
+                histograms of the connect time, time to first byte, total latency,
+                request and response bytes, and the status codes of the calls,
+                which are returned by `client.stats()`. Defaults to False, in which
+                case no instrumentation is installed at all.
+            stats_callback: (Callable[[RequestMetrics], None], optional): If set,
+                called with the `RequestMetrics` of every request once its response
+                is closed, for example to export them to a metrics system. It is
+                called from the thread or event loop that made the call, so it
+                should be fast. Defaults to None.
+            cache: (ResponseCache, optional): If set, responses of GET endpoints
+                are cached in it, following their Cache-Control and ETag /
+                Last-Modified headers, and stale ones are revalidated with
+                conditional requests. See `ResponseCache` for details. Its hit and
+                miss counters are reported by `client.stats()`. Defaults to None.
+            concurrency_limit: (ConcurrencyLimit, optional): If set, limits the
+                number of in-flight requests and the request rate of each path,
+                queueing the calls that exceed them on the client side. Calls are
+                admitted by the `_priority` argument of the generated methods. See
+                `ConcurrencyLimit` for details. Defaults to None.
+            compression: (RequestCompression, optional): If set, request bodies
+                above a size threshold are compressed with gzip or zstd, once the
+                server has advertised that it accepts them. See
+                `RequestCompression` for details. Defaults to None.
+            circuit_breaker: (CircuitBreaker, optional): If set, consecutive
+                connect errors, timeouts and 5xx responses open a circuit, during
+                which calls fail immediately with `CircuitOpenError` instead of
+                waiting for an unavailable deployment. The deployment is probed
+                with healthz before the circuit closes again. Its state is
+                returned by `client.circuit_status()`. If timeout is not set, the
+                client uses the bounded connect_timeout and read_timeout of the
+                breaker instead of waiting forever. Defaults to None.
 
         Implementation Note: when one uses a full URL, the client accesses the deployment
         specific endpoint directly. This endpoint may have a certain delay, and may not be
@@ -295,33 +585,75 @@ class Client(object):
         This is the recommended way to use the client. We may remove the ability to use a
         full URL in the future.
         """
-        if is_valid_url(workspace_or_url):
-            self.url = workspace_or_url.rstrip("/")
+        # Set by get_client() for clients that are shared through the pool.
+        self._pool_key: Optional[Tuple] = None
+        self._keepalive: Optional[_KeepaliveThread] = None
+        # The default model of each OpenAI-compatible api, by models path.
+        self._openai_models: Dict[str, str] = {}
+        self._endpoint_pool: Optional[_EndpointPool] = None
+        if isinstance(workspace_or_url, list):
+            urls = [
+                _build_url(*e) if isinstance(e, tuple) else _build_url(e)
+                for e in workspace_or_url
+            ]
+            self._endpoint_pool = _EndpointPool(urls, policy=load_balancing)
+            # All requests are built against the first url, and the balancing
+            # transport routes each of them to one of the endpoints.
+            self.url = urls[0]
         else:
-            # https://<workspace_id>-<deployment_name>.xenon.lepton.run
-            if deployment is None:
-                raise ValueError("You must specify the deployment name.")
-            self.url = build_endpoint_url(workspace_or_url, deployment)
+            self.url = _build_url(workspace_or_url, deployment)
 
         headers = {}
 
+        token = _resolve_token(workspace_or_url, token)
         if token is not None:
             headers.update({"Authorization": f"Bearer {token}"})
 
         # In default, since AI deployments are usually slow, we don't want to
         # timeout. httpx's default is 5 seconds, which is too short for AI
-        # deployments.
-        self._session = httpx.Client(
-            headers=headers, timeout=timeout if timeout else httpx.Timeout(None)
+        # deployments. A circuit breaker needs a bounded wait to see timeouts.
+        if not timeout:
+            timeout = (
+                circuit_breaker.default_timeout()
+                if circuit_breaker is not None
+                else httpx.Timeout(None)
+            )
+        self._session_kwargs: Dict = {
+            "headers": headers,
+            "timeout": timeout,
+            "http2": http2,
+        }
+        if limits is not None:
+            self._session_kwargs["limits"] = limits
+        self._retry_policy: Optional[RetryPolicy] = retry
+        self._cache: Optional[ResponseCache] = cache
+        self._concurrency_limit: Optional[ConcurrencyLimit] = concurrency_limit
+        self._compression_state: Optional[_CompressionState] = (
+            _CompressionState(compression) if compression is not None else None
+        )
+        self._circuit_state: Optional[_CircuitState] = (
+            _CircuitState(circuit_breaker, self.url)
+            if circuit_breaker is not None
+            else None
         )
+        self._stats_recorder: Optional[_StatsRecorder] = None
+        if stats or stats_callback is not None:
+            self._stats_recorder = _StatsRecorder(stats, stats_callback)
+        self._session = self._create_session()
         self.openapi: Dict = {}
         self._debug_record: List = []
         self._path_cache: PathTree = PathTree("", self._debug_record)
         self.stream: Optional[bool] = stream
         self.chunk_size: Optional[int] = chunk_size
+        if stream_decoder is not None and stream_decoder not in STREAM_DECODERS:
+            raise ValueError(
+                f"Unknown stream decoder {stream_decoder}. Supported decoders are"
+                f" {STREAM_DECODERS}."
+            )
+        self.stream_decoder: Optional[str] = stream_decoder
 
         # Check healthz to see if things are properly working
-        if not self.healthz():
+        if not skip_healthz and not self.healthz():
             self._debug_record.append(
                 "Client is not healthy - healthz() returned False. This might be"
                 " due to:\n- a nonstandard deployment that does not have a healthz"
@@ -331,15 +663,128 @@ class Client(object):
             )
 
         # At load time, we will also load the openapi specification.
+        self._load_openapi(openapi_cache_ttl)
+
+        # At load time, we will also set up all path caches.
+        for path_name in self.paths():
+            path_dict = self.openapi["paths"][path_name]  # type: ignore
+            # Note: we are not using if-elif here because path_dict might have both
+            # "post" and "get" methods.
+            if "post" in path_dict:
+                self._create_post_path(path_name)
+            # A websocket endpoint is opened with a get request, which is not
+            # exposed as a get method.
+            if _is_websocket_path(path_dict):
+                self._create_websocket_path(path_name)
+            elif "get" in path_dict:
+                self._create_get_path(path_name)
+            elif "post" not in path_dict:
+                self._debug_record.append(
+                    f"Endpoint {path_name} does not have a post or get method."
+                    " Currently we only support post and get methods, and"
+                    " websockets."
+                )
+        if self._debug_record and not no_check:
+            logger.warning(
+                "There are issues with the client. Check debug messages with "
+                "`client.debug_record()`."
+            )
+
+    def _transport_kwargs(self) -> Dict:
+        return {
+            k: v for k, v in self._session_kwargs.items() if k in ("http2", "limits")
+        }
+
+    def _has_custom_transport(self) -> bool:
+        """
+        Returns whether the default httpx transport needs to be wrapped.
+        """
+        return (
+            self._endpoint_pool is not None
+            or self._retry_policy is not None
+            or self._cache is not None
+            or self._concurrency_limit is not None
+            or self._compression_state is not None
+            or self._circuit_state is not None
+        )
+
+    def _create_session(self) -> httpx.Client:
+        """
+        internal method to create the http session of the client.
+        """
+        kwargs = dict(self._session_kwargs)
+        if self._stats_recorder is not None:
+            kwargs["event_hooks"] = self._stats_recorder.event_hooks()
+        if not self._has_custom_transport():
+            return httpx.Client(**kwargs)
+        transport: httpx.BaseTransport = httpx.HTTPTransport(**self._transport_kwargs())
+        if self._endpoint_pool is not None:
+            transport = self._balancing_transport = _BalancingTransport(
+                transport, self._endpoint_pool, self.url
+            )
+        # The circuit breaker probes the health of the deployment through here.
+        probe_transport = transport
+        # Retries wrap the balancing transport, so that a retried call may be
+        # routed to a different endpoint.
+        if self._retry_policy is not None:
+            limits = self._session_kwargs.get("limits") or httpx.Limits()
+            transport = _RetryTransport(
+                transport,
+                self._retry_policy,
+                self.url,
+                max_workers=limits.max_connections,
+            )
+        # Bodies are compressed once, outside of the retries.
+        if self._compression_state is not None:
+            transport = _CompressingTransport(transport, self._compression_state)
+        # Retried calls keep their slot instead of queueing again.
+        if self._concurrency_limit is not None:
+            transport = _LimitingTransport(transport, self._concurrency_limit)
+        # An open circuit fails calls before they queue for the limit, and judges
+        # the outcome of a call after all its retries.
+        if self._circuit_state is not None:
+            transport = _BreakingTransport(
+                transport, self._circuit_state, probe_transport
+            )
+        # The cache is the outermost layer, so that a fresh hit skips everything.
+        if self._cache is not None:
+            transport = _CachingTransport(transport, self._cache)
+        return httpx.Client(transport=transport, **kwargs)
+
+    def _load_openapi(self, cache_ttl: Optional[float] = None) -> None:
+        """
+        internal method to load the openapi specification of the deployment.
+
+        If cache_ttl is not None, the parsed spec is also cached on disk. A cached
+        spec that is younger than cache_ttl seconds is used without any network
+        round trip, and an older one is revalidated with a conditional request
+        using its ETag / Last-Modified validators.
+        """
+        cached = _load_cached_openapi(self.url) if cache_ttl is not None else None
+        if cached is not None and time.time() - cached["fetched_at"] < cache_ttl:
+            self.openapi = cached["openapi"]
+            return
         try:
-            raw_openapi = self._get("openapi.json")
+            # The spec is always fetched in non-streaming mode, so that a 304 Not
+            # Modified response can be told apart from an empty spec.
+            res = self._session.get(
+                f"{self.url}/openapi.json", headers=_get_conditional_headers(cached)
+            )
+            if res.status_code == 304 and cached is not None:
+                self.openapi = cached["openapi"]
+                _save_cached_openapi(self.url, res, self.openapi)
+                return
+            self._raise_for_detailed_status(res)
             try:
-                self.openapi = self._get_proper_res_content(raw_openapi)  # type: ignore
-            except httpx.DecodingError:
+                self.openapi = res.json()
+            except (httpx.DecodingError, ValueError):
                 self._debug_record.append(
                     "OpenAPI spec failed to be json decoded. This is not an issue of"
                     " the client, but a corrupted openapi spec."
                 )
+            else:
+                if cache_ttl is not None:
+                    _save_cached_openapi(self.url, res, self.openapi)
         except (ConnectionError, httpx.ConnectError) as e:
             raise ConnectionError(
                 "Cannot connect to server. This is not an issue of the"
@@ -370,29 +815,25 @@ class Client(object):
                 " deployment does not have an openapi specification."
             )
 
-        # At load time, we will also set up all path caches.
-        for path_name in self.paths():
-            path_dict = self.openapi["paths"][path_name]  # type: ignore
-            # Note: we are not using if-elif here because path_dict might have both
-            # "post" and "get" methods.
-            if "post" in path_dict:
-                self._create_post_path(path_name)
-            if "get" in path_dict:
-                self._create_get_path(path_name)
-            if "post" not in path_dict and "get" not in path_dict:
-                self._debug_record.append(
-                    f"Endpoint {path_name} does not have a post or get method."
-                    " Currently we only support post and get methods."
-                )
-        if self._debug_record and not no_check:
-            logger.warning(
-                "There are issues with the client. Check debug messages with "
-                "`client.debug_record()`."
-            )
-
     def __del__(self):
         self._session.close()
 
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the underlying connections. For a client obtained from
+        `get_client()`, this releases one reference instead, and the connections
+        are only closed when the last reference is released.
+        """
+        if _release_client(self):
+            self.stop_keepalive()
+            self._session.close()
+
     def __call__(self, *args, **kwargs):
         if self._path_cache._has(""):
             return self._path_cache[""](*args, **kwargs)
@@ -482,26 +923,118 @@ class Client(object):
                 # as it does not make sense to stream a json object.
                 res.read()
                 yield False, res.json()
-            if self.stream and "chunked" in res.headers.get("transfer-encoding", ""):
+            decoder = self._get_stream_decoder(res)
+            if decoder is not None or self._is_streaming_response(res):
                 yield True, None
-                yield from res.iter_bytes(chunk_size=self.chunk_size)
+                if decoder is None:
+                    yield from res.iter_bytes(chunk_size=self.chunk_size)
+                    return
+                # Decoded streams are fed with chunks as they arrive, so that
+                # every event is yielded as soon as it is complete.
+                for chunk in res.iter_bytes():
+                    yield from decoder.feed(chunk)
+                    if decoder.done:
+                        return
+                yield from decoder.flush()
             else:
+                res.read()
                 yield False, res.content
 
+    def _get_stream_decoder(self, res: httpx.Response):
+        """
+        Returns the decoder of a streamed response, or None if the response should
+        not be decoded.
+        """
+        if not self.stream:
+            return None
+        return _get_stream_decoder(
+            self.stream_decoder, res.headers.get("content-type", "")
+        )
+
+    def _is_streaming_response(self, res: httpx.Response) -> bool:
+        """
+        Returns whether the response should be returned to the caller as a stream.
+        """
+        if not self.stream:
+            return False
+        if "chunked" in res.headers.get("transfer-encoding", ""):
+            return True
+        # http/2 does not use chunked transfer encoding: a response without a
+        # content length is a streamed one.
+        if res.http_version == "HTTP/2" and "content-length" not in res.headers:
+            return True
+        return res.headers.get("content-type", "").startswith("text/event-stream")
+
     def _get_proper_res_content(self, res: httpx.Response):
         content = self._generator(res)
         is_stream, non_stream_content = next(content)
         return content if is_stream else non_stream_content
 
-    def _create_post_path(self, path_name: str) -> None:
+    def _request_kwargs(self, path_name: str, http_method: str, kwargs: Dict) -> Dict:
         """
-        internal method to create a method that reflects the post path.
+        internal method to convert the keyword arguments of a generated method into
+        the keyword arguments of the underlying http request.
+        """
+        extensions: Dict[str, Any] = {}
+        priority = kwargs.pop("_priority", None)
+        if priority is not None:
+            extensions[PRIORITY_EXTENSION] = priority
+        if http_method == "post":
+            request_kwargs = self._post_request_kwargs(path_name, kwargs)
+        else:
+            if self._cache is not None:
+                extensions[CACHE_EXTENSION] = True
+            request_kwargs = {"params": kwargs}
+        if extensions:
+            request_kwargs["extensions"] = extensions
+        return request_kwargs
+
+    def _post_request_kwargs(self, path_name: str, kwargs: Dict) -> Dict:
+        """
+        internal method to convert the keyword arguments of a post method into the
+        body of the underlying http request.
+
+        Binary arguments (File objects holding bytes, and file-like objects) are
+        sent as raw bytes instead of base64 encoded json if the openapi
+        specification of the path accepts it: a single binary argument is sent
+        as an application/octet-stream body, and otherwise the arguments are
+        sent as multipart/form-data. Otherwise, the arguments are
+        sent as json, see `_encode_json_body`.
+        """
+        binary_keys = [k for k, v in kwargs.items() if _is_binary_argument(v)]
+        if binary_keys and self.openapi:
+            content_types = _get_requestbody_content_types(self.openapi, path_name)
+            if len(kwargs) == 1 and "application/octet-stream" in content_types:
+                return {
+                    "content": self._binary_content(kwargs[binary_keys[0]]),
+                    "headers": {"Content-Type": "application/octet-stream"},
+                }
+            if "multipart/form-data" in content_types:
+                return _get_multipart_kwargs(kwargs)
+        kwargs = {k: File(v) if hasattr(v, "read") else v for k, v in kwargs.items()}
+        # The body is serialized to bytes once here, instead of converting it
+        # with jsonable_encoder and letting httpx serialize the result again.
+        return {
+            "content": _encode_json_body(kwargs),
+            "headers": {"Content-Type": "application/json"},
+        }
+
+    def _binary_content(self, value: Union[File, IO]):
+        """
+        internal method to convert a binary argument into the content of a request.
+        File-like objects are streamed in chunks instead of being read at once.
+        """
+        if isinstance(value, File):
+            return value.content
+        return iter(lambda: value.read(_UPLOAD_CHUNK_SIZE), b"")
 
-        :param name: the name of the path. For example, if it is "https://x.lepton.ai/run", then "run"
-        is the name used here.
-        :param function_name: the name of the function.
-        :return: a method that can be called to call post to the path.
+    def _build_method(self, path_name: str, http_method: str) -> Callable:
+        """
+        internal method to build the callable that sends a request to the given path.
+        Subclasses override this to change how the request is issued, e.g. the
+        AsyncClient returns a coroutine function instead.
         """
+        send = self._post if http_method == "post" else self._get
 
         def _method(*args, **kwargs):
             if args:
@@ -510,16 +1043,62 @@ class Client(object):
                         self.openapi, path_name, args
                     )
                 )
-            res = self._post(
-                path_name,
-                json=jsonable_encoder(kwargs),
-            )
+            out = kwargs.pop("_out", None)
+            request_kwargs = self._request_kwargs(path_name, http_method, kwargs)
+            if out is not None:
+                return self._download(path_name, http_method, request_kwargs, out)
+            res = send(path_name, **request_kwargs)
             return self._get_proper_res_content(res)
 
-        _method.__name__ = path_name
-        if self.openapi:
-            _method.__doc__ = _get_method_docstring(self.openapi, path_name)
-        self._path_cache._add(path_name, _method, "post")
+        return _method
+
+    def _download(
+        self, path_name: str, http_method: str, request_kwargs: Dict, out: Any
+    ) -> Dict[str, Any]:
+        """
+        internal method to send a request and stream the response body into `out`,
+        regardless of whether the client streams responses.
+        """
+        with self._session.stream(
+            http_method.upper(), f"{self.url}/{path_name.lstrip('/')}", **request_kwargs
+        ) as res:
+            self._raise_for_detailed_status(res)
+            with _OutputWriter(out) as writer:
+                for chunk in res.iter_bytes():
+                    writer.write(chunk)
+            return writer.metadata(res)
+
+    def _create_path(self, path_name: str, http_method: str) -> None:
+        """
+        internal method to create a method that reflects the given path and http
+        method, and register it in the path cache.
+        """
+
+        # The method, as well as its docstring that walks the openapi schema, is
+        # only built when it is first accessed, so that constructing a client
+        # stays cheap for deployments with many endpoints.
+        def _materialize() -> Callable:
+            if http_method == "websocket":
+                _method = self._build_websocket_method(path_name)
+            else:
+                _method = self._build_method(path_name, http_method)
+            _method.__name__ = path_name
+            if self.openapi:
+                _method.__doc__ = _get_method_docstring(self.openapi, path_name)
+            return _method
+
+        self._path_cache._add(path_name, _LazyMethod(_materialize), http_method)
+
+    def _create_post_path(self, path_name: str) -> None:
+        """
+        internal method to create a method that reflects the post path.
+
+        :param name: the name of the path. For example, if it is "https://x.lepton.ai/run", then "run"
+        is the name used here.
+        :param function_name: the name of the function.
+        :return: a method that can be called to call post to the path.
+        """
+        self._create_path(path_name, "post")
 
     def _create_get_path(self, path_name: str) -> None:
         """
@@ -530,7 +1109,16 @@ class Client(object):
         :param function_name: the name of the function.
         :return: a method that can be called to call get to the path.
         """
+        self._create_path(path_name, "get")
+
+    def _create_websocket_path(self, path_name: str) -> None:
+        """
+        internal method to create a method that opens a websocket connection to the
+        path. The keyword arguments of the method are sent as query params.
+        """
+        self._create_path(path_name, "websocket")
 
+    def _build_websocket_method(self, path_name: str) -> Callable:
         def _method(*args, **kwargs):
             if args:
                 raise RuntimeError(
@@ -538,13 +1126,159 @@ class Client(object):
                         self.openapi, path_name, args
                     )
                 )
-            res = self._get(path_name, params=kwargs)
-            return self._get_proper_res_content(res)
+            return self.websocket(path_name, params=kwargs)
+
+        return _method
+
+    def _websocket_args(
+        self, path: str, params: Optional[Dict]
+    ) -> Tuple[str, Dict[str, str]]:
+        """
+        internal method to return the url and the headers of a websocket connection,
+        reusing the auth token of the client.
+        """
+        url = f"{_websocket_url(self.url)}/{path.lstrip('/')}"
+        if params:
+            url += "?" + urlencode(params, doseq=True)
+        headers = {
+            k: v
+            for k, v in self._session.headers.items()
+            if k.lower() == "authorization"
+        }
+        return url, headers
+
+    def websocket(
+        self,
+        path: str,
+        params: Optional[Dict] = None,
+        heartbeat: Optional[float] = 20.0,
+        **kwargs,
+    ) -> WebSocketConnection:
+        """
+        Opens a websocket connection to the given path of the deployment, using the
+        auth token of the client. Websocket endpoints that the deployment declares
+        in its openapi specification are also exposed as methods of the client,
+        which call this with their keyword arguments as params. This requires the
+        `websockets` package.
+
+        Args:
+            path (str): The path of the endpoint, such as "/stream".
+            params (dict, optional): Query params of the connection request.
+            heartbeat (float, optional): The interval in seconds between pings, and
+                how long to wait for their pongs before the connection is
+                considered dead. None disables the heartbeat. Defaults to 20.
+            **kwargs: Other arguments of `websockets.sync.client.connect`, such as
+                max_size.
+        """
+        url, headers = self._websocket_args(path, params)
+        return WebSocketConnection(url, headers, heartbeat, **kwargs)
+
+    def _openai_request(
+        self,
+        session: Union[httpx.Client, httpx.AsyncClient],
+        path: str,
+        body: Dict,
+        stream: bool,
+    ) -> httpx.Request:
+        headers = {"Content-Type": "application/json"}
+        if stream:
+            headers["Accept"] = "text/event-stream"
+        return session.build_request(
+            "POST",
+            f"{self.url}/{path.lstrip('/')}",
+            content=_encode_json_body(dict(body, stream=stream)),
+            headers=headers,
+        )
+
+    def _openai_model(self, path: str) -> str:
+        """
+        internal method to return the first model served next to the given
+        completion path, which is used when no model is given.
+        """
+        models_path = _models_path(path)
+        if models_path not in self._openai_models:
+            res = self._session.get(f"{self.url}/{models_path.lstrip('/')}")
+            self._raise_for_detailed_status(res)
+            self._openai_models[models_path] = _first_model(res)
+        return self._openai_models[models_path]
+
+    def _openai_call(
+        self,
+        suffix: str,
+        body: Dict,
+        model: Optional[str],
+        stream: bool,
+        path: Optional[str],
+    ) -> Union[CompletionStream, Dict[str, Any]]:
+        path = path or _find_openai_path(self.openapi, suffix)
+        body["model"] = model or self._openai_model(path)
+        request = self._openai_request(self._session, path, body, stream)
+        start = time.perf_counter()
+        res = self._session.send(request, stream=stream)
+        self._raise_for_detailed_status(res)
+        if not stream:
+            return res.json()
+        return CompletionStream(res, suffix == CHAT_COMPLETIONS_SUFFIX, start)
+
+    def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        stream: bool = True,
+        path: Optional[str] = None,
+        **params,
+    ) -> Union[CompletionStream, Dict[str, Any]]:
+        """
+        Creates a chat completion, for deployments that serve an OpenAI-compatible
+        api, over the connections of the client and with its auth token. This is
+        the equivalent of `openai.OpenAI().chat.completions.create(...)`, without
+        the need for a second client:
+
+            with client.chat([{"role": "user", "content": "Hi"}]) as stream:
+                for delta in stream:
+                    print(delta, end="")
+            print(stream.ttft, stream.usage)
 
-        _method.__name__ = path_name
-        if self.openapi:
-            _method.__doc__ = _get_method_docstring(self.openapi, path_name)
-        self._path_cache._add(path_name, _method, "get")
+        Args:
+            messages (list): The messages of the conversation.
+            model (str, optional): The model to use. Defaults to None, which uses
+                the first model listed by the deployment.
+            stream (bool, optional): Whether to stream the completion. Defaults to
+                True, which returns a `CompletionStream` of the content deltas that
+                also records the time to first token and between tokens. If False,
+                returns the completion as a json object.
+            path (str, optional): The path of the chat completions endpoint.
+                Defaults to None, which uses the path in the openapi specification
+                of the deployment that ends with "/chat/completions", or
+                "/v1/chat/completions" if there is none.
+            **params: Other parameters of the request, such as max_tokens,
+                temperature or stream_options.
+        """
+        return self._openai_call(
+            CHAT_COMPLETIONS_SUFFIX,
+            dict(params, messages=messages),
+            model,
+            stream,
+            path,
+        )
+
+    def complete(
+        self,
+        prompt: Union[str, List],
+        model: Optional[str] = None,
+        stream: bool = True,
+        path: Optional[str] = None,
+        **params,
+    ) -> Union[CompletionStream, Dict[str, Any]]:
+        """
+        Creates a text completion, for deployments that serve an OpenAI-compatible
+        api. The arguments are the same as for :meth:`chat`, except that the
+        prompt is given instead of the messages, and the path defaults to the
+        one that ends with "/completions". A stream yields the text deltas.
+        """
+        return self._openai_call(
+            COMPLETIONS_SUFFIX, dict(params, prompt=prompt), model, stream, path
+        )
 
     def paths(self) -> List[str]:
         """
@@ -565,8 +1299,14 @@ class Client(object):
         so you should treat the return value of this function as a hint, not a
         guarantee.
 
+        When the client has multiple endpoints, every endpoint is probed: failing
+        ones are ejected from routing, healthy ones are (re-)admitted, and the
+        function returns whether any endpoint is healthy.
+
         :return: whether the deployment is healthily running.
         """
+        if self._endpoint_pool is not None:
+            return self._balancing_transport.check_endpoints(self._session.headers)
         for path in ("/healthz", "/health"):
             try:
                 res = self._get(path)
@@ -576,7 +1316,256 @@ class Client(object):
                 continue
         return False
 
+    def _connection_count(self, session: Union[httpx.Client, httpx.AsyncClient]) -> int:
+        """
+        internal method to return the number of connections in the pool of the
+        session, looking through the transports that wrap the http transport.
+        """
+        transport: Any = session._transport
+        while not hasattr(transport, "_pool") and hasattr(transport, "_transport"):
+            transport = transport._transport
+        pool = getattr(transport, "_pool", None)
+        return len(pool.connections) if pool is not None else 0
+
+    def _keepalive_expiry(self) -> Optional[float]:
+        limits = self._session_kwargs.get("limits") or httpx.Limits()
+        return limits.keepalive_expiry
+
+    def _warm(self, n_connections: int) -> None:
+        def _open() -> httpx.Response:
+            request = self._session.build_request("GET", f"{self.url}/healthz")
+            return self._session.send(request, stream=True)
+
+        def _finish(res: httpx.Response) -> None:
+            res.read()
+            res.close()
+
+        _hold_concurrently(n_connections, _open, _finish)
+
+    def warmup(
+        self, n_connections: int = 1, keepalive_interval: Optional[float] = None
+    ) -> int:
+        """
+        Opens n_connections pooled connections to the deployment ahead of the first
+        calls, so that they do not pay for dns, tcp and tls setup. It sends
+        n_connections concurrent healthz requests, each on its own connection.
+        With http2, calls are multiplexed over one connection, so a larger
+        n_connections only matters for servers that speak http/1.1.
+
+        If keepalive_interval is set, the same requests are sent again every
+        keepalive_interval seconds from a background thread, so that the
+        connections stay hot between bursts of calls. It should be shorter than
+        the keepalive_expiry of the client limits (5 seconds by default) and the
+        keepalive timeout of the server. Call `stop_keepalive()` or `close()` to
+        stop the pings.
+
+        The fraction of calls that reused a pooled connection is reported as
+        `connection_reuse_ratio` by `client.stats()`.
+
+        Args:
+            n_connections (int, optional): The number of connections to open.
+                Defaults to 1.
+            keepalive_interval (float, optional): The interval in seconds between
+                keepalive pings. Defaults to None, which sends no pings.
+
+        Returns:
+            int: the number of connections in the pool of the client.
+        """
+        if n_connections < 1:
+            raise ValueError(f"n_connections must be positive, got {n_connections}.")
+        self._warm(n_connections)
+        if keepalive_interval is not None:
+            self._check_keepalive_interval(keepalive_interval)
+            self.stop_keepalive()
+            self._keepalive = _KeepaliveThread(
+                self, lambda client: client._warm(n_connections), keepalive_interval
+            )
+            self._keepalive.start()
+        return self._connection_count(self._session)
+
+    def _check_keepalive_interval(self, keepalive_interval: float) -> None:
+        expiry = self._keepalive_expiry()
+        if expiry is not None and keepalive_interval >= expiry:
+            logger.warning(
+                f"The keepalive interval {keepalive_interval}s is not shorter than"
+                f" the keepalive expiry {expiry}s of the client, so idle connections"
+                " will be closed between pings. Pass in a larger keepalive_expiry"
+                " with `limits=httpx.Limits(...)`."
+            )
+
+    def stop_keepalive(self) -> None:
+        """
+        Stops the keepalive pings started by `warmup()`, if any.
+        """
+        if self._keepalive is not None:
+            self._keepalive.stop()
+            self._keepalive = None
+
+    def _resolve_path(self, path: str) -> Callable:
+        """
+        internal method to find the method for a path such as "run", "/run" or
+        "foo/bar". Raises AttributeError if the path does not exist.
+        """
+        node: Any = self._path_cache
+        for name in path.strip("/").split("/"):
+            node = node[PathTree.rectify_name(name)]
+        if isinstance(node, PathTree):
+            node = node[""]
+        return node
+
+    def map(
+        self,
+        path: Union[str, Callable],
+        inputs: Iterable[Dict],
+        concurrency: int = 8,
+        ordered: bool = True,
+        return_exceptions: bool = True,
+    ) -> Iterator:
+        """
+        Calls an endpoint once for every item in inputs, with at most `concurrency`
+        calls in flight at the same time, and yields the results as they become
+        available. The calls share the pooled connections of the client. Inputs
+        are consumed lazily, so a large (or infinite) iterable is only read as
+        fast as the endpoint can process it.
+
+        Usage:
+            for result in client.map("run", ({"x": i} for i in range(100000))):
+                ...
+
+        Args:
+            path (str or callable): The endpoint to call, such as "run" or
+                "foo/bar", or a method of the client such as `client.run`.
+            inputs (Iterable[Dict]): The keyword arguments of each call.
+            concurrency (int, optional): The maximum number of in-flight calls.
+                Defaults to 8. Note that calls beyond the connection pool limits of
+                the client wait for a free connection.
+            ordered (bool, optional): If True (default), results are yielded in the
+                same order as the inputs. If False, results are yielded as soon as
+                they complete, as (index, result) tuples, where index is the
+                position of the corresponding input.
+            return_exceptions (bool, optional): If True (default), an exception
+                raised by a call is yielded in place of its result, and the
+                remaining calls continue. If False, the exception is raised.
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be positive, got {concurrency}.")
+        method = self._resolve_path(path) if isinstance(path, str) else path
+        iterator = enumerate(inputs)
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        def _submit() -> Optional[Future]:
+            try:
+                index, kwargs = next(iterator)
+            except StopIteration:
+                return None
+            future = executor.submit(method, **kwargs)
+            future.index = index  # type: ignore
+            return future
+
+        def _result(future: Future):
+            if not return_exceptions:
+                return future.result()
+            try:
+                return future.result()
+            except Exception as e:
+                return e
+
+        try:
+            if ordered:
+                queue: deque = deque()
+                while len(queue) < concurrency:
+                    future = _submit()
+                    if future is None:
+                        break
+                    queue.append(future)
+                while queue:
+                    result = _result(queue.popleft())
+                    future = _submit()
+                    if future is not None:
+                        queue.append(future)
+                    yield result
+            else:
+                pending: Set[Future] = set()
+                while len(pending) < concurrency:
+                    future = _submit()
+                    if future is None:
+                        break
+                    pending.add(future)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        new_future = _submit()
+                        if new_future is not None:
+                            pending.add(new_future)
+                        yield future.index, _result(future)  # type: ignore
+        finally:
+            # If the caller stops early, do not start any of the queued calls.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def endpoint_status(self) -> List[Dict]:
+        """
+        Returns the routing state of every endpoint of the client: its url,
+        whether it is healthy, the number of outstanding requests, and the number
+        of consecutive failures. A client created with a single url has one
+        endpoint that is always reported as healthy.
+        """
+        if self._endpoint_pool is None:
+            return [{"url": self.url, "healthy": True, "outstanding": 0, "failures": 0}]
+        return self._endpoint_pool.status()
+
+    def circuit_status(self) -> Dict[str, Any]:
+        """
+        Returns the state of the circuit breaker of the client: "state" is one of
+        "closed", "open" and "half_open", "failures" is the number of consecutive
+        failures, "opened_at" is the time the circuit opened, and "retry_in" is
+        the number of seconds until an open circuit is probed again. A client
+        without a circuit breaker is always reported as closed.
+        """
+        if self._circuit_state is None:
+            return {
+                "state": "closed",
+                "failures": 0,
+                "opened_at": None,
+                "retry_in": None,
+            }
+        return self._circuit_state.status()
+
+    def stats(self, reset: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the recorded metrics of the client's requests, keyed by url path.
+        Each entry holds the number of requests, the throughput in requests per
+        second, a count per status code, the number of requests served by the
+        response cache (cache_hits), the number of requests that opened a new
+        connection and the fraction of the requests sent to the server that reused
+        a pooled one (connection_reuse_ratio), and a summary (count, mean, p50,
+        p90, p99 and max) of the most recent samples of connect_time, ttfb and
+        latency (in seconds), and request_bytes and response_bytes. If reset is
+        True, the recorded metrics are cleared after being returned.
+
+        If the client has a response cache, its counters are returned under the
+        "cache" key, see `ResponseCache.stats()`.
+
+        Stats are only recorded if the client was created with `stats=True` or
+        with a `cache`.
+        """
+        recording = self._stats_recorder is not None and self._stats_recorder.enabled
+        if not recording and self._cache is None:
+            raise RuntimeError(
+                "Stats are not recorded. Create the client with `stats=True` to"
+                " record them."
+            )
+        stats: Dict[str, Dict[str, Any]] = {}
+        if recording:
+            stats.update(self._stats_recorder.summary(reset=reset))  # type: ignore
+        if self._cache is not None:
+            stats["cache"] = self._cache.stats()
+        return stats
+
     def debug_record(self) -> List[str]:
+        """
+        Prints and returns the issues found while the client mapped the paths of
+        the deployment's openapi specification to python methods.
+        """
         print("\n\n".join(self._debug_record))
         if self._debug_record:
             print(
@@ -617,6 +1606,555 @@ class Client(object):
             raise AttributeError(f"No such endpoint named {name} found.")
 
     def __dir__(self) -> Iterable[str]:
-        return ["debug_record", "paths", "healthz", "openapi"] + list(
-            self._path_cache.__dir__()
+        return [
+            "debug_record",
+            "paths",
+            "healthz",
+            "openapi",
+            "map",
+            "endpoint_status",
+            "circuit_status",
+            "warmup",
+            "stats",
+            "websocket",
+            "chat",
+            "complete",
+        ] + list(self._path_cache.__dir__())
+
+
+class AsyncClient(Client):
+    """
+    The asyncio counterpart of :class:`Client`. It exposes the same pythonic
+    access to the functions defined in a deployment, but every generated method
+    is a coroutine function, so that many calls can be in flight concurrently
+    from a single event loop:
+
+        client = AsyncClient("my-workspace", "my-deployment", token=MY_TOKEN)
+        result = await client.foo(x=1)
+        results = await asyncio.gather(*(client.foo(x=i) for i in range(1000)))
+
+    If `stream` is set and the endpoint returns a chunked, non-json response, the
+    awaited result is an async generator of bytes:
+
+        async for chunk in await client.generate(prompt="..."):
+            ...
+
+    The constructor accepts the same arguments as :class:`Client`. Note that, the
+    same as Client, the constructor synchronously checks healthz and loads the
+    openapi specification, so it is best to create the client once, outside the
+    hot path of the event loop. Call `await client.aclose()`, or use the client as
+    an async context manager, to release the underlying connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._async_keepalive: Optional[asyncio.Task] = None
+        super().__init__(*args, **kwargs)
+        self._async_session = self._create_async_session()
+
+    def _create_async_session(self) -> httpx.AsyncClient:
+        kwargs = dict(self._session_kwargs)
+        if self._stats_recorder is not None:
+            kwargs["event_hooks"] = self._stats_recorder.event_hooks(is_async=True)
+        if not self._has_custom_transport():
+            return httpx.AsyncClient(**kwargs)
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+            **self._transport_kwargs()
+        )
+        if self._endpoint_pool is not None:
+            transport = self._async_balancing_transport = _AsyncBalancingTransport(
+                transport, self._endpoint_pool, self.url
+            )
+        probe_transport = transport
+        if self._retry_policy is not None:
+            transport = _AsyncRetryTransport(transport, self._retry_policy, self.url)
+        if self._compression_state is not None:
+            transport = _AsyncCompressingTransport(transport, self._compression_state)
+        if self._concurrency_limit is not None:
+            transport = _AsyncLimitingTransport(transport, self._concurrency_limit)
+        if self._circuit_state is not None:
+            transport = _AsyncBreakingTransport(
+                transport, self._circuit_state, probe_transport
+            )
+        if self._cache is not None:
+            transport = _AsyncCachingTransport(transport, self._cache)
+        return httpx.AsyncClient(transport=transport, **kwargs)
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Closes the underlying async connections. For a client obtained from
+        `get_client()`, this releases one reference instead, and the connections
+        are only closed when the last reference is released.
+        """
+        if _release_client(self):
+            self.stop_keepalive()
+            await self._async_session.aclose()
+
+    async def _aget(self, path: str, *args, **kwargs) -> httpx.Response:
+        if self.stream:
+            return self._async_session.stream(
+                "GET", f"{self.url}/{path.lstrip('/')}", *args, **kwargs
+            )  # type: ignore
+        else:
+            return await self._async_session.get(
+                f"{self.url}/{path.lstrip('/')}", *args, **kwargs
+            )
+
+    async def _apost(self, path: str, *args, **kwargs) -> httpx.Response:
+        if self.stream:
+            return self._async_session.stream(
+                "POST", f"{self.url}/{path.lstrip('/')}", *args, **kwargs
+            )  # type: ignore
+        else:
+            return await self._async_session.post(
+                f"{self.url}/{path.lstrip('/')}", *args, **kwargs
+            )
+
+    async def _agenerator(self, res: httpx.Response):
+        ctx = res if self.stream else contextlib2.nullcontext(res)
+        # use context to ensure that the response is properly closed.
+        async with ctx as res:  # type: ignore
+            if res.is_error:
+                # read the body so the detailed error message can be built.
+                await res.aread()
+                self._raise_for_detailed_status(res)
+            decoder = self._get_stream_decoder(res)
+            if res.headers.get("content-type", None) == "application/json":
+                # For a json response, we will return the json object directly,
+                # as it does not make sense to stream a json object.
+                await res.aread()
+                yield False, res.json()
+            elif decoder is not None or self._is_streaming_response(res):
+                yield True, None
+                if decoder is None:
+                    async for chunk in res.aiter_bytes(chunk_size=self.chunk_size):
+                        yield chunk
+                    return
+                async for chunk in res.aiter_bytes():
+                    for item in decoder.feed(chunk):
+                        yield item
+                    if decoder.done:
+                        return
+                for item in decoder.flush():
+                    yield item
+            else:
+                await res.aread()
+                yield False, res.content
+
+    async def _aget_proper_res_content(self, res: httpx.Response):
+        content = self._agenerator(res)
+        is_stream, non_stream_content = await content.__anext__()
+        if is_stream:
+            return content
+        # Close the generator eagerly, so that the streamed response (if any) is
+        # released without waiting for the event loop to finalize it.
+        await content.aclose()
+        return non_stream_content
+
+    def _build_method(self, path_name: str, http_method: str) -> Callable:
+        send = self._apost if http_method == "post" else self._aget
+
+        async def _method(*args, **kwargs):
+            if args:
+                raise RuntimeError(
+                    _get_positional_argument_error_message(
+                        self.openapi, path_name, args
+                    )
+                )
+            out = kwargs.pop("_out", None)
+            request_kwargs = self._request_kwargs(path_name, http_method, kwargs)
+            if out is not None:
+                return await self._adownload(
+                    path_name, http_method, request_kwargs, out
+                )
+            res = await send(path_name, **request_kwargs)
+            return await self._aget_proper_res_content(res)
+
+        return _method
+
+    async def _adownload(
+        self, path_name: str, http_method: str, request_kwargs: Dict, out: Any
+    ) -> Dict[str, Any]:
+        async with self._async_session.stream(
+            http_method.upper(), f"{self.url}/{path_name.lstrip('/')}", **request_kwargs
+        ) as res:
+            if res.is_error:
+                # read the body so the detailed error message can be built.
+                await res.aread()
+                self._raise_for_detailed_status(res)
+            with _OutputWriter(out) as writer:
+                async for chunk in res.aiter_bytes():
+                    writer.write(chunk)
+            return writer.metadata(res)
+
+    async def map(  # type: ignore[override]
+        self,
+        path: Union[str, Callable],
+        inputs: Iterable[Dict],
+        concurrency: int = 8,
+        ordered: bool = True,
+        return_exceptions: bool = True,
+    ) -> AsyncIterator:
+        """
+        The async version of :meth:`Client.map`. This is an async generator:
+
+            async for result in client.map("run", ({"x": i} for i in range(1000))):
+                ...
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be positive, got {concurrency}.")
+        method = self._resolve_path(path) if isinstance(path, str) else path
+        iterator = enumerate(inputs)
+
+        def _submit() -> Optional[asyncio.Task]:
+            try:
+                index, kwargs = next(iterator)
+            except StopIteration:
+                return None
+            task = asyncio.ensure_future(method(**kwargs))
+            task.index = index  # type: ignore
+            return task
+
+        async def _result(task: asyncio.Task):
+            if not return_exceptions:
+                return await task
+            try:
+                return await task
+            except Exception as e:
+                return e
+
+        queue: deque = deque()
+        pending: Set[asyncio.Task] = set()
+        try:
+            if ordered:
+                while len(queue) < concurrency:
+                    task = _submit()
+                    if task is None:
+                        break
+                    queue.append(task)
+                while queue:
+                    result = await _result(queue.popleft())
+                    task = _submit()
+                    if task is not None:
+                        queue.append(task)
+                    yield result
+            else:
+                while len(pending) < concurrency:
+                    task = _submit()
+                    if task is None:
+                        break
+                    pending.add(task)
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        new_task = _submit()
+                        if new_task is not None:
+                            pending.add(new_task)
+                        yield task.index, await _result(task)  # type: ignore
+        finally:
+            for task in list(queue) + list(pending):
+                task.cancel()
+
+    def _binary_content(self, value: Union[File, IO]):
+        if isinstance(value, File):
+            return value.content
+
+        async def _chunks():
+            while True:
+                chunk = value.read(_UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+        return _chunks()
+
+    def websocket(  # type: ignore[override]
+        self,
+        path: str,
+        params: Optional[Dict] = None,
+        heartbeat: Optional[float] = 20.0,
+        **kwargs,
+    ) -> AsyncWebSocketConnection:
+        """
+        The async version of :meth:`Client.websocket`. The returned connection is
+        opened by awaiting it, or by using it as an async context manager:
+
+            async with client.websocket("/stream") as ws:
+                ...
+        """
+        url, headers = self._websocket_args(path, params)
+        return AsyncWebSocketConnection(url, headers, heartbeat, **kwargs)
+
+    async def _aopenai_model(self, path: str) -> str:
+        models_path = _models_path(path)
+        if models_path not in self._openai_models:
+            res = await self._async_session.get(f"{self.url}/{models_path.lstrip('/')}")
+            if res.is_error:
+                await res.aread()
+                self._raise_for_detailed_status(res)
+            self._openai_models[models_path] = _first_model(res)
+        return self._openai_models[models_path]
+
+    async def _aopenai_call(
+        self,
+        suffix: str,
+        body: Dict,
+        model: Optional[str],
+        stream: bool,
+        path: Optional[str],
+    ) -> Union[AsyncCompletionStream, Dict[str, Any]]:
+        path = path or _find_openai_path(self.openapi, suffix)
+        body["model"] = model or await self._aopenai_model(path)
+        request = self._openai_request(self._async_session, path, body, stream)
+        start = time.perf_counter()
+        res = await self._async_session.send(request, stream=stream)
+        if res.is_error:
+            await res.aread()
+            self._raise_for_detailed_status(res)
+        if not stream:
+            return res.json()
+        return AsyncCompletionStream(res, suffix == CHAT_COMPLETIONS_SUFFIX, start)
+
+    async def chat(  # type: ignore[override]
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        stream: bool = True,
+        path: Optional[str] = None,
+        **params,
+    ) -> Union[AsyncCompletionStream, Dict[str, Any]]:
+        """
+        The async version of :meth:`Client.chat`. A stream is iterated with
+        `async for`:
+
+            stream = await client.chat([{"role": "user", "content": "Hi"}])
+            async for delta in stream:
+                ...
+        """
+        return await self._aopenai_call(
+            CHAT_COMPLETIONS_SUFFIX,
+            dict(params, messages=messages),
+            model,
+            stream,
+            path,
+        )
+
+    async def complete(  # type: ignore[override]
+        self,
+        prompt: Union[str, List],
+        model: Optional[str] = None,
+        stream: bool = True,
+        path: Optional[str] = None,
+        **params,
+    ) -> Union[AsyncCompletionStream, Dict[str, Any]]:
+        """
+        The async version of :meth:`Client.complete`.
+        """
+        return await self._aopenai_call(
+            COMPLETIONS_SUFFIX, dict(params, prompt=prompt), model, stream, path
         )
+
+    async def _awarm(self, n_connections: int) -> None:
+        opened = 0
+        all_opened = asyncio.Event()
+
+        async def _one() -> None:
+            nonlocal opened
+            request = self._async_session.build_request("GET", f"{self.url}/healthz")
+            try:
+                res = await self._async_session.send(request, stream=True)
+            except BaseException:
+                all_opened.set()
+                raise
+            try:
+                opened += 1
+                if opened == n_connections:
+                    all_opened.set()
+                await asyncio.wait_for(all_opened.wait(), _WARMUP_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                await res.aread()
+                await res.aclose()
+
+        await asyncio.gather(*(_one() for _ in range(n_connections)))
+
+    @staticmethod
+    async def _akeepalive(
+        client_ref: "weakref.ref[AsyncClient]", n_connections: int, interval: float
+    ) -> None:
+        # Only a weak reference to the client is kept, so that a client dropped
+        # without stopping its pings is still collected.
+        while True:
+            await asyncio.sleep(interval)
+            client = client_ref()
+            if client is None:
+                return
+            try:
+                await client._awarm(n_connections)
+            except Exception as e:
+                logger.debug(f"Keepalive ping failed: {e}")
+            del client
+
+    async def awarmup(
+        self, n_connections: int = 1, keepalive_interval: Optional[float] = None
+    ) -> int:
+        """
+        The async version of :meth:`Client.warmup`, which warms up the connections
+        used by the coroutines of the client. The keepalive pings are sent from a
+        task on the running event loop.
+        """
+        if n_connections < 1:
+            raise ValueError(f"n_connections must be positive, got {n_connections}.")
+        await self._awarm(n_connections)
+        if keepalive_interval is not None:
+            self._check_keepalive_interval(keepalive_interval)
+            self.stop_keepalive()
+            self._async_keepalive = asyncio.ensure_future(
+                self._akeepalive(weakref.ref(self), n_connections, keepalive_interval)
+            )
+        return self._connection_count(self._async_session)
+
+    def stop_keepalive(self) -> None:
+        """
+        Stops the keepalive pings started by `warmup()` or `awarmup()`, if any.
+        """
+        super().stop_keepalive()
+        if self._async_keepalive is not None:
+            self._async_keepalive.cancel()
+            self._async_keepalive = None
+
+    async def ahealthz(self) -> bool:
+        """
+        The async version of :meth:`Client.healthz`.
+
+        :return: whether the deployment is healthily running.
+        """
+        if self._endpoint_pool is not None:
+            return await self._async_balancing_transport.check_endpoints(
+                self._async_session.headers
+            )
+        for path in ("/healthz", "/health"):
+            try:
+                res = await self._aget(path)
+                await self._aget_proper_res_content(res)
+                return True
+            except (httpx.ConnectError, httpx.HTTPError):
+                continue
+        return False
+
+
+class _PoolEntry(object):
+    __slots__ = ("lock", "client", "refcount")
+
+    def __init__(self):
+        # Serializes the construction of the client, without holding the pool lock
+        # during its network round trips.
+        self.lock = threading.Lock()
+        self.client: Optional[Client] = None
+        self.refcount = 0
+
+
+_client_pool_lock = threading.Lock()
+_client_pool: Dict[Tuple, _PoolEntry] = {}
+
+
+def _get_pool_key(
+    client_cls: type,
+    workspace_or_url: Union[str, List[Union[str, Tuple[str, str]]]],
+    deployment: Optional[str],
+    token: Optional[str],
+    kwargs: Dict,
+) -> Tuple:
+    if isinstance(workspace_or_url, list):
+        url: Any = tuple(
+            _build_url(*e) if isinstance(e, tuple) else _build_url(e)
+            for e in workspace_or_url
+        )
+    else:
+        url = _build_url(workspace_or_url, deployment)
+    # Options such as httpx.Limits are not hashable, so they are keyed by repr.
+    options = tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+    return (client_cls, url, token, options)
+
+
+def get_client(
+    workspace_or_url: Union[str, List[Union[str, Tuple[str, str]]]],
+    deployment: Optional[str] = None,
+    token: Optional[str] = None,
+    asynchronous: bool = False,
+    **kwargs,
+) -> Client:
+    """
+    Returns a Client shared by all callers that ask for the same url, token and
+    options, creating it on first use. As a client fetches the openapi
+    specification and opens its own connection pool when constructed, reusing a
+    shared one makes repeated calls cost a dictionary lookup instead of network
+    round trips. Clients are thread safe, so the shared client can be used from
+    multiple threads.
+
+    The shared client is reference counted: every call to get_client() should be
+    paired with a call to `client.close()` (or `await client.aclose()` for an
+    AsyncClient), or the client can be used as a context manager. The connections
+    are closed when the last reference is released, and the next get_client()
+    call creates a new client.
+
+        with get_client("my-workspace", "my-deployment", token=MY_TOKEN) as c:
+            c.foo(x=1)
+
+    Args:
+        workspace_or_url, deployment, token: the same as for :class:`Client`.
+        asynchronous (bool, optional): Whether to return an AsyncClient instead of
+            a Client. Defaults to False.
+        **kwargs: other arguments of :class:`Client`, which are part of the key of
+            the shared client.
+    """
+    client_cls = AsyncClient if asynchronous else Client
+    key = _get_pool_key(client_cls, workspace_or_url, deployment, token, kwargs)
+    with _client_pool_lock:
+        entry = _client_pool.get(key)
+        if entry is None:
+            entry = _client_pool[key] = _PoolEntry()
+        entry.refcount += 1
+    with entry.lock:
+        if entry.client is None:
+            try:
+                client = client_cls(
+                    workspace_or_url, deployment=deployment, token=token, **kwargs
+                )
+            except BaseException:
+                with _client_pool_lock:
+                    entry.refcount -= 1
+                    if entry.refcount == 0 and _client_pool.get(key) is entry:
+                        del _client_pool[key]
+                raise
+            client._pool_key = key
+            entry.client = client
+        return entry.client
+
+
+def _release_client(client: Client) -> bool:
+    """
+    Releases one reference of a client obtained from get_client(), and returns
+    whether its connections should be closed: true if it was the last reference,
+    or if the client is not shared at all.
+    """
+    if client._pool_key is None:
+        return True
+    with _client_pool_lock:
+        entry = _client_pool.get(client._pool_key)
+        if entry is None or entry.client is not client:
+            # Already released by its last reference.
+            return False
+        entry.refcount -= 1
+        if entry.refcount > 0:
+            return False
+        del _client_pool[client._pool_key]
+        return True
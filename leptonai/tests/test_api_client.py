@@ -0,0 +1,463 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import httpx
+import requests
+import respx
+
+from leptonai import config
+from leptonai.api.v2 import (
+    APICache,
+    ClientError,
+    RetryPolicy,
+    WorkspaceUnauthorizedError,
+)
+from leptonai.api.v2.client import APIClient, AsyncAPIClient
+from leptonai.api.v2.types.deployment import LeptonDeployment
+
+
+class _WorkspaceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps(
+            {"path": self.path, "request": self.headers.get("X-Request")}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAPIClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _WorkspaceHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = APIClient(
+            "ws",
+            "token",
+            url="http://127.0.0.1:%d/api/v2" % self.server.server_address[1],
+            workspace_origin_url="http://127.0.0.1",
+        )
+
+    def tearDown(self):
+        self.client.stop_keepalive()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_warmup(self):
+        self.assertEqual(self.client.warmup(4), 4)
+        for _ in range(8):
+            self.client._get("/workspace").json()
+        stats = self.client.connection_stats()
+        self.assertEqual(stats["new_connections"], 4)
+        self.assertEqual(stats["requests"], 12)
+        self.assertAlmostEqual(stats["connection_reuse_ratio"], 2 / 3)
+
+    def test_shared_across_threads(self):
+        self.assertEqual(
+            self.client._session.get_adapter(self.client.url)._pool_maxsize, 32
+        )
+        header = dict(self.client._header)
+
+        def _call(i):
+            headers = {"X-Request": str(i)}
+            body = self.client._get("/workspace", headers=headers).json()
+            self.assertEqual(headers, {"X-Request": str(i)})
+            return body["request"]
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            self.assertEqual(
+                list(executor.map(_call, range(64))), [str(i) for i in range(64)]
+            )
+        self.assertEqual(self.client._header, header)
+        self.assertLessEqual(self.client.connection_stats()["new_connections"], 16)
+
+    def test_keepalive(self):
+        self.client.warmup(2, keepalive_interval=0.05)
+        time.sleep(0.3)
+        self.client.stop_keepalive()
+        stats = self.client.connection_stats()
+        self.assertGreater(stats["requests"], 6)
+        self.assertEqual(stats["new_connections"], 2)
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Answers with the statuses queued in server.statuses, then with 200.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        self.server.requests.append(self.command)
+        status, headers = (
+            self.server.statuses.pop(0) if self.server.statuses else (200, {})
+        )
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAPIClientRetry(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+        self.server.statuses = []
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d/api/v2" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _client(self, **kwargs):
+        return APIClient(
+            "ws",
+            "token",
+            url=self.url,
+            workspace_origin_url="http://127.0.0.1",
+            **kwargs,
+        )
+
+    def test_retries_idempotent_calls(self):
+        client = self._client(
+            retry=RetryPolicy(
+                backoff_base=0.001, idempotent_methods=("GET", "PUT", "DELETE")
+            )
+        )
+        self.server.statuses = [(503, {"Retry-After": "0"}), (502, {})]
+        self.assertEqual(client._get("/workspace").status_code, 200)
+        self.server.statuses = [(429, {})]
+        self.assertEqual(client._delete("/workspace").status_code, 200)
+        self.assertEqual(
+            client.retry_stats(),
+            {"retries": 3, "retried_calls": 2, "exhausted_calls": 0},
+        )
+
+    def test_no_retries_by_default(self):
+        client = self._client()
+        self.server.statuses = [(500, {}), (503, {})]
+        self.assertEqual(client._get("/workspace").status_code, 500)
+        self.assertEqual(client._get("/workspace").status_code, 503)
+        self.assertEqual(self.server.requests, ["GET", "GET"])
+        self.assertEqual(client.retry_stats()["retries"], 0)
+
+    def test_does_not_retry_other_calls(self):
+        client = self._client(retry=RetryPolicy(backoff_base=0.001))
+        self.server.statuses = [(503, {}), (503, {})]
+        self.assertEqual(client._post("/workspace").status_code, 503)
+        self.assertEqual(client._put("/workspace").status_code, 503)
+        self.assertEqual(self.server.requests, ["POST", "PUT"])
+        self.assertEqual(client.retry_stats()["retries"], 0)
+
+        client = self._client(retry=None)
+        self.server.statuses = [(503, {})]
+        self.assertEqual(client._get("/workspace").status_code, 503)
+
+    def test_gives_up(self):
+        client = self._client(retry=RetryPolicy(max_retries=2, backoff_base=0.001))
+        self.server.statuses = [(503, {})] * 3
+        self.assertEqual(client._get("/workspace").status_code, 503)
+
+        # Retry-After beyond the deadline returns the response right away.
+        client = self._client(retry=RetryPolicy(deadline=1.0))
+        self.server.statuses = [(429, {"Retry-After": "5"})]
+        start = time.time()
+        self.assertEqual(client._get("/workspace").status_code, 429)
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(
+            client.retry_stats(),
+            {"retries": 0, "retried_calls": 0, "exhausted_calls": 1},
+        )
+
+    def test_retries_connection_errors(self):
+        self.server.shutdown()
+        self.server.server_close()
+        client = self._client(retry=RetryPolicy(max_retries=2, backoff_base=0.001))
+        with self.assertRaises(requests.ConnectionError):
+            client._get("/workspace")
+        self.assertEqual(
+            client.retry_stats(),
+            {"retries": 2, "retried_calls": 1, "exhausted_calls": 1},
+        )
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    """
+    Serves server.version as the body of every path, with an ETag of it.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        etag = '"%d"' % self.server.version
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"version": self.server.version}).encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.version += 1
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAPIClientCache(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ETagHandler)
+        self.server.version = 0
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d/api/v2" % self.server.server_address[1]
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.patcher = mock.patch.object(config, "CACHE_DIR", Path(self.cache_dir.name))
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.cache_dir.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _client(self, cache, workspace_id="ws"):
+        return APIClient(
+            workspace_id,
+            "token",
+            url=self.url,
+            workspace_origin_url="http://127.0.0.1",
+            cache=cache,
+        )
+
+    def test_no_cache_by_default(self):
+        client = self._client(None)
+        client._get("/shapes")
+        client._get("/shapes")
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertIsNone(client.cache_stats())
+
+    def test_ttl(self):
+        client = self._client(APICache(ttl=None, ttls={"/shapes": 60}))
+        for _ in range(3):
+            self.assertEqual(client._get("/shapes").json(), {"version": 0})
+        # Different queries are different entries, and endpoints without a ttl
+        # are not cached.
+        client._get("/shapes", params={"node_group": "ng"})
+        client._get("/deployments")
+        client._get("/deployments")
+        self.assertEqual(
+            self.server.requests,
+            ["/api/v2/shapes", "/api/v2/shapes?node_group=ng"]
+            + ["/api/v2/deployments"] * 2,
+        )
+        stats = client.cache_stats()
+        self.assertEqual((stats["hits"], stats["stores"]), (2, 2))
+
+    def test_revalidate(self):
+        client = self._client(APICache())
+        self.assertEqual(client._get("/deployments").json(), {"version": 0})
+        response = client._get("/deployments")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"version": 0})
+        self.assertEqual(client.cache_stats()["revalidated"], 1)
+        # A change on the server is seen right away.
+        self.server.version = 1
+        self.assertEqual(client._get("/deployments").json(), {"version": 1})
+
+    def test_write_invalidates(self):
+        client = self._client(APICache(ttls={"/deployments": 60}))
+        client._get("/deployments")
+        client._post("/deployments", json={})
+        self.assertEqual(client._get("/deployments").json(), {"version": 1})
+        self.assertEqual(client.cache_stats()["invalidations"], 1)
+
+    def test_persist(self):
+        cache = APICache(ttl=None, ttls={"/dedicated-node-groups": 60}, persist=True)
+        self._client(cache)._get("/dedicated-node-groups")
+        # A new process reuses the response on disk.
+        client = self._client(
+            APICache(ttl=None, ttls={"/dedicated-node-groups": 60}, persist=True)
+        )
+        self.assertEqual(client._get("/dedicated-node-groups").json(), {"version": 0})
+        self.assertEqual(len(self.server.requests), 1)
+        # Writes drop the responses on disk too.
+        client._post("/dedicated-node-groups/ng", json={})
+        fresh = self._client(
+            APICache(ttl=None, ttls={"/dedicated-node-groups": 60}, persist=True)
+        )
+        self.assertEqual(fresh._get("/dedicated-node-groups").json(), {"version": 1})
+
+    def test_stream_cached_hit(self):
+        client = self._client(APICache(ttl=None, ttls={"/shapes": 60}))
+        client._get("/shapes")
+        body = json.dumps({"version": 0}).encode()
+        self.assertEqual(b"".join(client._get("/shapes").iter_content(4)), body)
+        self.assertEqual(list(client._get("/shapes").iter_lines()), [body])
+        self.assertEqual(client._get("/shapes").raw.read(), body)
+        self.assertEqual(client.cache_stats()["hits"], 3)
+
+    def test_persist_scope_and_memory_only(self):
+        def _cache():
+            return APICache(
+                ttl=None,
+                ttls={"/shapes": 60, "/usersecrets": 60},
+                persist=True,
+                memory_only=["/usersecrets"],
+            )
+
+        client = self._client(_cache())
+        client._get("/shapes")
+        client._get("/usersecrets")
+        client._get("/usersecrets")
+        self.assertEqual(client.cache_stats()["hits"], 1)
+        files = [
+            os.path.join(d, f)
+            for d, _, fs in os.walk(Path(self.cache_dir.name) / "api_responses")
+            for f in fs
+        ]
+        self.assertEqual(len(files), 1)
+        self.assertIn(os.sep + "shapes" + os.sep, files[0])
+        self.assertEqual(os.stat(files[0]).st_mode & 0o777, 0o600)
+        self.assertEqual(os.stat(os.path.dirname(files[0])).st_mode & 0o777, 0o700)
+
+        # Another workspace behind the same url does not see the responses.
+        self._client(_cache(), workspace_id="other")._get("/shapes")
+        self.assertEqual(self.server.requests.count("/api/v2/shapes"), 2)
+        self._client(_cache())._get("/shapes")
+        self.assertEqual(self.server.requests.count("/api/v2/shapes"), 2)
+
+    def test_cli_disk_cache_is_opt_in(self):
+        from leptonai.cli import util
+
+        with mock.patch.dict(os.environ, {"LEPTON_CLI_DISK_CACHE": ""}):
+            self.assertFalse(util._cli_disk_cache_enabled())
+        with mock.patch.dict(os.environ, {"LEPTON_CLI_DISK_CACHE": "1"}):
+            self.assertTrue(util._cli_disk_cache_enabled())
+        self.assertIn("/usersecrets", util._CLI_CACHE_MEMORY_ONLY)
+        self.assertIn("/deployments", util._CLI_CACHE_MEMORY_ONLY)
+
+
+_URL = "https://ws.example.com/api/v2"
+
+
+class TestAsyncAPIClient(unittest.TestCase):
+    def setUp(self):
+        self.router = respx.mock(base_url=_URL, assert_all_called=False)
+        self.router.start()
+        self.client = AsyncAPIClient(
+            "ws", "token", url=_URL, workspace_origin_url="https://ws.example.com"
+        )
+
+    def tearDown(self):
+        asyncio.run(self.client.aclose())
+        self.router.stop()
+
+    def test_resource_groups(self):
+        deployments = self.router.get("/deployments").respond(
+            json=[{"metadata": {"id": "d1"}}, {"metadata": {"id": "d2"}}]
+        )
+
+        def _jobs(request):
+            page = int(request.url.params["page"])
+            items = [{"metadata": {"id": "j1"}}] if page == 1 else []
+            return httpx.Response(200, json={"jobs": items})
+
+        self.router.get("/jobs").mock(side_effect=_jobs)
+
+        async def _main():
+            return await asyncio.gather(
+                self.client.deployment.list_all(), self.client.job.list_all()
+            )
+
+        deployments_list, jobs = asyncio.run(_main())
+        self.assertIsInstance(deployments_list[0], LeptonDeployment)
+        self.assertEqual([d.metadata.id_ for d in deployments_list], ["d1", "d2"])
+        self.assertEqual([j.metadata.id_ for j in jobs], ["j1"])
+        request = deployments.calls.last.request
+        self.assertEqual(request.headers["Authorization"], "Bearer token")
+        self.assertEqual(request.headers["origin"], "https://ws.example.com")
+
+    def test_headers_are_not_shared(self):
+        route = self.router.get("/storage").respond(json=[])
+        asyncio.run(self.client._get("/storage", headers={"X-Extra": "1"}))
+        self.assertEqual(route.calls.last.request.headers["X-Extra"], "1")
+        self.assertNotIn("X-Extra", self.client._header)
+
+    def test_errors(self):
+        self.router.get("/deployments/missing").respond(404, text="not found")
+        self.router.get("/workspace").respond(401)
+        with self.assertRaises(ClientError):
+            asyncio.run(self.client.deployment.get("missing"))
+        with self.assertRaises(WorkspaceUnauthorizedError):
+            asyncio.run(self.client.info())
+
+    def test_get_log(self):
+        self.router.get("/deployments/d1/replicas/r1/log").respond(
+            content=b"line 1\nline 2\n"
+        )
+        self.router.get("/jobs/j1/replicas/r1/log").respond(500, text="boom")
+
+        async def _collect(chunks):
+            return "".join([c async for c in chunks])
+
+        self.assertEqual(
+            asyncio.run(_collect(self.client.deployment.get_log("d1", "r1"))),
+            "line 1\nline 2\n",
+        )
+        with self.assertRaisesRegex(RuntimeError, "boom"):
+            asyncio.run(_collect(self.client.job.get_log("j1", "r1")))
+
+    def test_batch_fetch_nodes(self):
+        node = {
+            "metadata": {"id": "n1"},
+            "spec": {"unschedulable": False},
+            "status": None,
+        }
+        self.router.get("/dedicated-node-groups/ng1/nodes").respond(json=[node])
+        self.router.get("/dedicated-node-groups/ng2/nodes").respond(403)
+        results = asyncio.run(
+            self.client.nodegroup.batch_fetch_nodes(
+                ["ng1", "ng2"], return_exceptions=True
+            )
+        )
+        self.assertEqual(results[0][0].metadata.id_, "n1")
+        self.assertIsInstance(results[1], ClientError)
+
+
+if __name__ == "__main__":
+    unittest.main()
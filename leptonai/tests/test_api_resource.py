@@ -0,0 +1,82 @@
+import contextlib
+import io
+import json
+import unittest
+
+import httpx
+import requests
+
+from leptonai.api.v2.api_resource import APIResourse, ClientError
+from leptonai.api.v2.types.job import LeptonJob
+from leptonai.api.v2.types.secret import SecretItem
+
+
+def _response(body, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    return response
+
+
+class TestEnsureList(unittest.TestCase):
+    def setUp(self):
+        self.api = APIResourse.__new__(APIResourse)
+
+    def _ensure_list(self, response, EnsuredType, list_key=None):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            items = self.api.ensure_list(response, EnsuredType, list_key=list_key)
+        return items, stderr.getvalue()
+
+    def test_valid(self):
+        body = [{"name": "a", "value": "1"}, {"name": "b"}]
+        items, stderr = self._ensure_list(_response(body), SecretItem)
+        self.assertEqual(items, [SecretItem(name="a", value="1"), SecretItem(name="b")])
+        self.assertEqual(stderr, "")
+
+        jobs = [{"metadata": {"id": "j1"}}, {"metadata": {"id": "j2"}}]
+        items, _ = self._ensure_list(
+            _response({"jobs": jobs, "total": 2}), LeptonJob, list_key="jobs"
+        )
+        self.assertEqual([j.metadata.id_ for j in items], ["j1", "j2"])
+        # Mutable defaults are not shared between the items.
+        self.assertIsNot(items[0].spec.envs, items[1].spec.envs)
+
+    def test_skips_invalid_items(self):
+        jobs = [{"metadata": {"id": "j1"}}, {"metadata": None}, {"metadata": {}}]
+        for response, list_key in (
+            (_response(jobs), None),
+            (_response({"jobs": jobs}), "jobs"),
+        ):
+            items, stderr = self._ensure_list(response, LeptonJob, list_key=list_key)
+            self.assertEqual([j.metadata.id_ for j in items], ["j1", None])
+            self.assertIn("Skipped 1 invalid item(s)", stderr)
+            self.assertIn("index 1:", stderr)
+
+    def test_list_key_fallbacks(self):
+        # A list body is used as it is, even if a list_key is given.
+        items, _ = self._ensure_list(
+            _response([{"name": "a"}]), SecretItem, list_key="secrets"
+        )
+        self.assertEqual(items, [SecretItem(name="a")])
+        # An object without the list_key is iterated as it is, as before.
+        items, stderr = self._ensure_list(
+            _response({"other": []}), SecretItem, list_key="secrets"
+        )
+        self.assertEqual(items, [])
+        self.assertIn("Skipped 1 invalid item(s)", stderr)
+
+    def test_errors(self):
+        with self.assertRaises(requests.JSONDecodeError):
+            self.api.ensure_list(_response(b"not json"), SecretItem)
+        with self.assertRaises(ClientError):
+            self.api.ensure_list(_response([], status_code=404), SecretItem)
+
+    def test_httpx_response(self):
+        response = httpx.Response(200, json=[{"name": "a"}])
+        items, _ = self._ensure_list(response, SecretItem)
+        self.assertEqual(items, [SecretItem(name="a")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,1407 @@
+import asyncio
+import gc
+import gzip
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+from pathlib import Path
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import httpx
+import respx
+
+from leptonai import config
+from leptonai.client import (
+    AsyncClient,
+    CircuitBreaker,
+    CircuitOpenError,
+    Client,
+    ConcurrencyLimit,
+    RequestCompression,
+    ResponseCache,
+    RetryPolicy,
+    ServerSentEvent,
+    get_client,
+)
+from leptonai.types import File
+
+try:
+    from websockets.sync.server import serve as websocket_serve
+except ImportError:
+    websocket_serve = None
+
+URL = "http://lepton-client-test.local"
+
+OPENAPI = {
+    "openapi": "3.0.2",
+    "paths": {
+        "/run": {
+            "post": {
+                "description": "Runs the model.",
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/RunInput"}
+                        }
+                    }
+                },
+            }
+        },
+        "/info": {
+            "get": {
+                "description": "Returns info.",
+                "parameters": [{
+                    "name": "verbose",
+                    "required": False,
+                    "schema": {"type": "boolean"},
+                }],
+            }
+        },
+        "/generate": {"post": {"description": "Streams text."}},
+        "/render": {"post": {"description": "Renders a video."}},
+        "/upload": {
+            "post": {
+                "description": "Uploads a file.",
+                "requestBody": {"content": {"multipart/form-data": {}}},
+            }
+        },
+        "/raw": {
+            "post": {
+                "description": "Takes raw bytes.",
+                "requestBody": {"content": {"application/octet-stream": {}}},
+            }
+        },
+    },
+    "components": {
+        "schemas": {
+            "RunInput": {
+                "properties": {"x": {"type": "integer"}},
+                "required": ["x"],
+            }
+        }
+    },
+}
+
+
+def _mock_deployment(router: respx.Router) -> None:
+    router.get(f"{URL}/healthz").respond(200, json={"status": "ok"})
+    router.get(f"{URL}/openapi.json", name="openapi").respond(200, json=OPENAPI)
+
+    def run(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"y": json.loads(request.content)["x"] * 2})
+
+    router.post(f"{URL}/run").mock(side_effect=run)
+    router.get(f"{URL}/info").mock(
+        side_effect=lambda request: httpx.Response(
+            200, json={"verbose": request.url.params.get("verbose")}
+        )
+    )
+    router.post(f"{URL}/generate").respond(
+        200,
+        headers={"content-type": "text/plain", "transfer-encoding": "chunked"},
+        content=b"hello world",
+    )
+
+
+class TestClient(unittest.TestCase):
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+
+    def tearDown(self):
+        self.router.stop()
+
+    def test_post_and_get_paths(self):
+        client = Client(URL)
+        self.assertEqual(
+            sorted(client.paths()),
+            ["/generate", "/info", "/raw", "/render", "/run", "/upload"],
+        )
+        self.assertEqual(client.run(x=21), {"y": 42})
+        self.assertEqual(client.info(verbose=True), {"verbose": "true"})
+        self.assertIn("Input Schema", client.run.__doc__)
+
+    def test_http2_and_limits_reach_connection_pool(self):
+        limits = httpx.Limits(
+            max_connections=256, max_keepalive_connections=32, keepalive_expiry=7
+        )
+        client = Client(URL, limits=limits)
+        pool = client._session._transport._pool
+        self.assertTrue(pool._http2)
+        self.assertEqual(pool._max_connections, 256)
+        self.assertEqual(pool._max_keepalive_connections, 32)
+        self.assertEqual(pool._keepalive_expiry, 7)
+        self.assertFalse(Client(URL, http2=False)._session._transport._pool._http2)
+
+    def test_methods_are_built_lazily(self):
+        with mock.patch(
+            "leptonai.client._get_method_docstring", return_value="doc"
+        ) as get_docstring:
+            client = Client(URL)
+            self.assertEqual(get_docstring.call_count, 0)
+            self.assertEqual(client.run.__doc__, "doc")
+            self.assertIs(client.run, client.run)
+            self.assertEqual(get_docstring.call_count, 1)
+        self.assertEqual(
+            sorted(dir(client._path_cache)),
+            ["generate", "info", "raw", "render", "run", "upload"],
+        )
+
+    def test_map(self):
+        client = Client(URL)
+        inputs = [{"x": i} for i in range(50)]
+        self.assertEqual(
+            list(client.map("run", inputs, concurrency=4)),
+            [{"y": i * 2} for i in range(50)],
+        )
+        unordered = list(client.map("/run", inputs, concurrency=4, ordered=False))
+        self.assertEqual(
+            sorted(unordered, key=lambda r: r[0]),
+            [(i, {"y": i * 2}) for i in range(50)],
+        )
+
+    def test_map_captures_errors_and_applies_backpressure(self):
+        client = Client(URL)
+        consumed = []
+
+        def inputs():
+            for i in range(100):
+                consumed.append(i)
+                yield {"x": i} if i != 3 else {}
+
+        results = client.map(client.run, inputs(), concurrency=4)
+        self.assertEqual(next(results), {"y": 0})
+        self.assertLessEqual(len(consumed), 5)
+        results = list(results)
+        self.assertIsInstance(results[2], Exception)
+        self.assertEqual(results[3], {"y": 8})
+        with self.assertRaises(Exception):
+            list(client.map("run", [{}], return_exceptions=False))
+
+    def test_stream_decoder(self):
+        sse = b'data: {"t": "a"}\n\ndata: {"t": "b"}\n\ndata: [DONE]\n\n'
+        self.router.post(f"{URL}/chat").respond(
+            200, headers={"content-type": "text/event-stream"}, content=sse
+        )
+        self.router.post(f"{URL}/lines").respond(
+            200,
+            headers={"content-type": "application/x-ndjson"},
+            content=b'{"i": 0}\n{"i": 1}\n',
+        )
+        client = Client(URL, stream=True, stream_decoder="auto")
+        events = list(client._get_proper_res_content(client._post("chat")))
+        self.assertEqual([e.json() for e in events], [{"t": "a"}, {"t": "b"}])
+        self.assertIsInstance(events[0], ServerSentEvent)
+        lines = client._get_proper_res_content(client._post("lines"))
+        self.assertEqual(list(lines), [{"i": 0}, {"i": 1}])
+        # chunked responses of other types are still streamed as raw bytes.
+        self.assertEqual(b"".join(client.generate()), b"hello world")
+        with self.assertRaises(ValueError):
+            Client(URL, stream_decoder="xml")
+
+    def test_binary_arguments(self):
+        upload = self.router.post(f"{URL}/upload").respond(200, json="ok")
+        raw = self.router.post(f"{URL}/raw").respond(200, json="ok")
+        client = Client(URL)
+
+        client.upload(image=File(b"\x00\x01"), prompt="cat", n=2)
+        request = upload.calls.last.request
+        self.assertTrue(
+            request.headers["content-type"].startswith("multipart/form-data")
+        )
+        body = request.read()
+        self.assertIn(b"\x00\x01", body)
+        self.assertIn(b'name="prompt"\r\n\r\ncat', body)
+        self.assertIn(b'name="n"\r\n\r\n2', body)
+
+        client.raw(data=io.BytesIO(b"x" * 10))
+        request = raw.calls.last.request
+        self.assertEqual(request.headers["content-type"], "application/octet-stream")
+        self.assertEqual(request.read(), b"x" * 10)
+
+        # paths that only accept json still receive base64 encoded files.
+        kwargs = client._request_kwargs("/run", "post", {"x": File(b"abc")})
+        self.assertEqual(kwargs["headers"], {"Content-Type": "application/json"})
+        self.assertEqual(
+            json.loads(kwargs["content"]),
+            {"x": {"content": "data:application/octet-stream;base64,YWJj"}},
+        )
+
+    def test_stats(self):
+        records = []
+        client = Client(URL, stats=True, stats_callback=records.append)
+        for i in range(5):
+            client.run(x=i)
+        stats = client.stats()
+        self.assertEqual(stats["/run"]["requests"], 5)
+        self.assertEqual(stats["/run"]["status_codes"], {200: 5})
+        self.assertEqual(stats["/run"]["latency"]["count"], 5)
+        self.assertLessEqual(
+            stats["/run"]["ttfb"]["max"], stats["/run"]["latency"]["max"]
+        )
+        self.assertEqual(stats["/run"]["request_bytes"]["max"], len(b'{"x":4}'))
+        self.assertEqual(
+            stats["/run"]["response_bytes"]["max"], len(json.dumps({"y": 8}))
+        )
+        self.assertIn("/openapi.json", stats)
+        run_records = [r for r in records if r.path == "/run"]
+        self.assertEqual(len(run_records), 5)
+        self.assertEqual(run_records[0].method, "POST")
+        self.assertEqual(client.stats(reset=True)["/run"]["requests"], 5)
+        self.assertEqual(client.stats(), {})
+
+        streaming = Client(URL, stream=True, stats=True)
+        chunks = streaming.generate()
+        self.assertNotIn("/generate", streaming.stats())
+        self.assertEqual(b"".join(chunks), b"hello world")
+        self.assertEqual(streaming.stats()["/generate"]["response_bytes"]["max"], 11)
+
+        with self.assertRaises(RuntimeError):
+            Client(URL).stats()
+        with self.assertRaises(RuntimeError):
+            Client(URL, stats_callback=records.append).stats()
+
+    def test_stats_with_cache(self):
+        records = []
+        client = Client(
+            URL,
+            stats=True,
+            stats_callback=records.append,
+            cache=ResponseCache(default_ttl=60),
+        )
+        for _ in range(3):
+            client.info(verbose=True)
+        stats = client.stats()["/info"]
+        self.assertEqual((stats["requests"], stats["cache_hits"]), (3, 2))
+        self.assertEqual(stats["connection_reuse_ratio"], 1.0)
+        self.assertEqual(
+            [r.cached for r in records if r.path == "/info"], [False, True, True]
+        )
+
+    def test_debug_record(self):
+        url = "http://lepton-debug-record.local"
+        self.router.get(f"{url}/healthz").respond(200, json={"status": "ok"})
+        self.router.get(f"{url}/openapi.json").respond(
+            200, json={"openapi": "3.0.2", "paths": {"/put-only": {"put": {}}}}
+        )
+        client = Client(url, no_check=True)
+        with mock.patch("builtins.print"):
+            record = client.debug_record()
+        self.assertEqual(len(record), 1)
+        self.assertIn("/put-only", record[0])
+        self.assertIn("debug_record", dir(client))
+
+    def test_out(self):
+        body = bytes(range(256)) * 1024
+        self.router.post(f"{URL}/render").respond(
+            200, headers={"content-type": "video/mp4"}, content=body
+        )
+        client = Client(URL)
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "video.mp4"
+            meta = client.render(prompt="cat", _out=path)
+            self.assertEqual(
+                meta,
+                {
+                    "status_code": 200,
+                    "content_type": "video/mp4",
+                    "bytes": len(body),
+                    "path": str(path),
+                },
+            )
+            self.assertEqual(path.read_bytes(), body)
+        # a pre-allocated bytearray is filled in place, an empty one grows.
+        buffer = bytearray(len(body) + 10)
+        self.assertEqual(client.render(_out=buffer)["bytes"], len(body))
+        self.assertEqual(buffer[: len(body)], body)
+        self.assertEqual(len(buffer), len(body) + 10)
+        buffer = bytearray()
+        client.render(_out=buffer)
+        self.assertEqual(buffer, body)
+        view = memoryview(bytearray(len(body)))
+        client.render(_out=view)
+        self.assertEqual(view.tobytes(), body)
+        with self.assertRaises(ValueError):
+            client.render(_out=memoryview(bytearray(10)))
+        stream = io.BytesIO()
+        client.render(_out=stream)
+        self.assertEqual(stream.getvalue(), body)
+        with self.assertRaises(TypeError):
+            client.render(_out=1)
+
+    def test_positional_arguments_rejected(self):
+        client = Client(URL)
+        with self.assertRaises(RuntimeError):
+            client.run(21)
+
+
+class TestGetClient(unittest.TestCase):
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+
+    def tearDown(self):
+        self.router.stop()
+
+    def test_shared_and_refcounted(self):
+        openapi = self.router.routes["openapi"]
+        client = get_client(URL, token="a")
+        self.assertIs(get_client(URL + "/", token="a"), client)
+        self.assertEqual(openapi.call_count, 1)
+        self.assertIsNot(get_client(URL, token="b"), client)
+        self.assertIsNot(get_client(URL, token="a", stream=True), client)
+        self.assertEqual(client.run(x=1), {"y": 2})
+
+        client.close()
+        self.assertFalse(client._session.is_closed)
+        with get_client(URL, token="a") as same:
+            self.assertIs(same, client)
+        self.assertFalse(client._session.is_closed)
+        client.close()
+        self.assertTrue(client._session.is_closed)
+        # releasing more references than acquired is a no-op.
+        client.close()
+        self.assertIsNot(get_client(URL, token="a"), client)
+
+    def test_concurrent_construction(self):
+        openapi = self.router.routes["openapi"]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            clients = list(
+                executor.map(lambda _: get_client(URL, token="c"), range(64))
+            )
+        self.assertTrue(all(c is clients[0] for c in clients))
+        self.assertEqual(openapi.call_count, 1)
+        for c in clients:
+            c.close()
+        self.assertTrue(clients[0]._session.is_closed)
+
+    def test_failed_construction_is_not_cached(self):
+        self.router.get(f"{URL}/openapi.json").mock(side_effect=httpx.ConnectError)
+        with self.assertRaises(ConnectionError):
+            get_client(URL, token="d")
+        self.router.get(f"{URL}/openapi.json").respond(200, json=OPENAPI)
+        self.assertEqual(get_client(URL, token="d").run(x=2), {"y": 4})
+
+
+class TestOpenAPICache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.patcher = mock.patch.object(config, "CACHE_DIR", Path(self.cache_dir.name))
+        self.patcher.start()
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+        self.openapi_route = self.router.get(f"{URL}/openapi.json").mock(
+            side_effect=self._serve_openapi
+        )
+
+    def tearDown(self):
+        self.router.stop()
+        self.patcher.stop()
+        self.cache_dir.cleanup()
+
+    @staticmethod
+    def _serve_openapi(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(200, json=OPENAPI, headers={"etag": '"v1"'})
+
+    def test_fresh_cache_skips_round_trip(self):
+        Client(URL, openapi_cache_ttl=60)
+        self.assertEqual(self.openapi_route.call_count, 1)
+        client = Client(URL, openapi_cache_ttl=60, skip_healthz=True)
+        self.assertEqual(self.openapi_route.call_count, 1)
+        self.assertEqual(client.run(x=1), {"y": 2})
+
+    def test_stale_cache_is_revalidated(self):
+        Client(URL, openapi_cache_ttl=0)
+        client = Client(URL, openapi_cache_ttl=0)
+        self.assertEqual(self.openapi_route.call_count, 2)
+        last_request = self.openapi_route.calls.last.request
+        self.assertEqual(last_request.headers["if-none-match"], '"v1"')
+        self.assertEqual(client.openapi, OPENAPI)
+        self.assertEqual(client.run(x=1), {"y": 2})
+
+    def test_cache_disabled_by_default(self):
+        Client(URL)
+        Client(URL)
+        self.assertEqual(self.openapi_route.call_count, 2)
+        self.assertNotIn("if-none-match", self.openapi_route.calls.last.request.headers)
+
+    def test_skip_healthz(self):
+        healthz_route = self.router.get(f"{URL}/healthz")
+        Client(URL, skip_healthz=True)
+        self.assertFalse(healthz_route.called)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.patcher = mock.patch.object(config, "CACHE_DIR", Path(self.cache_dir.name))
+        self.patcher.start()
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+
+    def tearDown(self):
+        self.router.stop()
+        self.patcher.stop()
+        self.cache_dir.cleanup()
+
+    def test_max_age_and_canonical_params(self):
+        info = self.router.get(f"{URL}/info").respond(
+            200, headers={"cache-control": "max-age=60"}, json={"n": 1}
+        )
+        client = Client(URL, cache=ResponseCache())
+        self.assertEqual(client.info(a=1, b=2), {"n": 1})
+        self.assertEqual(client.info(b=2, a=1), {"n": 1})
+        self.assertEqual(info.call_count, 1)
+        client.info(a=2)
+        self.assertEqual(info.call_count, 2)
+        # post calls are never cached.
+        client.run(x=1)
+        client.run(x=1)
+        self.assertEqual(self.router.routes[2].call_count, 2)
+        # health checks are not cached.
+        self.assertTrue(client.healthz())
+        self.assertTrue(client.healthz())
+        cache = client.stats()["cache"]
+        self.assertEqual((cache["hits"], cache["misses"], cache["entries"]), (1, 2, 2))
+
+    def test_etag_revalidation(self):
+        def info(request):
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"etag": '"v1"'})
+            return httpx.Response(200, headers={"etag": '"v1"'}, json={"n": 1})
+
+        route = self.router.get(f"{URL}/info").mock(side_effect=info)
+        client = Client(URL, cache=ResponseCache())
+        self.assertEqual(client.info(), {"n": 1})
+        self.assertEqual(client.info(), {"n": 1})
+        self.assertEqual(route.call_count, 2)
+        self.assertEqual(route.calls.last.response.status_code, 304)
+        self.assertEqual(client.stats()["cache"]["revalidated"], 1)
+
+    def test_uncacheable_responses(self):
+        route = self.router.get(f"{URL}/info").respond(
+            200, headers={"cache-control": "no-store, max-age=60"}, json={}
+        )
+        client = Client(URL, cache=ResponseCache())
+        client.info()
+        client.info()
+        # without caching headers, responses are only cached with a default ttl.
+        route.respond(200, json={})
+        client.info()
+        client.info()
+        self.assertEqual(route.call_count, 4)
+        client = Client(URL, cache=ResponseCache(default_ttl=60))
+        client.info()
+        client.info()
+        self.assertEqual(route.call_count, 5)
+
+    def test_lru_and_disk_spill(self):
+        route = self.router.get(f"{URL}/info").mock(
+            side_effect=lambda request: httpx.Response(
+                200,
+                headers={"cache-control": "max-age=60"},
+                json={"i": request.url.params["i"]},
+            )
+        )
+        cache = ResponseCache(max_entries=2, spill_to_disk=True)
+        client = Client(URL, cache=cache)
+        for i in range(3):
+            client.info(i=i)
+        self.assertEqual(cache.stats()["entries"], 2)
+        # the evicted entry is read back from disk.
+        self.assertEqual(client.info(i=0), {"i": "0"})
+        self.assertEqual(route.call_count, 3)
+        cache.clear()
+        other = Client(URL, cache=ResponseCache(spill_to_disk=True))
+        self.assertEqual(other.info(i=1), {"i": "1"})
+        self.assertEqual(route.call_count, 3)
+
+
+class TestConcurrencyLimit(unittest.TestCase):
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+
+    def tearDown(self):
+        self.router.stop()
+
+    def _queued(self, client, path="/run") -> int:
+        limiter = client._session._transport._limiters.get(path)
+        return len(limiter._queue) if limiter is not None else 0
+
+    def test_max_in_flight(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def run(request):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return httpx.Response(200, json={})
+
+        self.router.post(f"{URL}/run").mock(side_effect=run)
+        client = Client(
+            URL,
+            stats=True,
+            concurrency_limit=ConcurrencyLimit(max_in_flight=2),
+        )
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: client.run(x=1), range(16)))
+        self.assertEqual(in_flight[1], 2)
+        queue_wait = client.stats()["/run"]["queue_wait"]
+        self.assertEqual(queue_wait["count"], 16)
+        self.assertGreater(queue_wait["max"], 0.02)
+
+    def test_priority(self):
+        release = threading.Event()
+        order = []
+
+        def run(request):
+            order.append(json.loads(request.content)["x"])
+            if len(order) == 1:
+                release.wait(5)
+            return httpx.Response(200, json={})
+
+        self.router.post(f"{URL}/run").mock(side_effect=run)
+        client = Client(URL, concurrency_limit=ConcurrencyLimit(max_in_flight=1))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(client.run, x=0)]
+            while not order:
+                time.sleep(0.001)
+            for i, priority in ((1, 0), (2, 0), (3, 10)):
+                futures.append(executor.submit(client.run, x=i, _priority=priority))
+                while self._queued(client) < i:
+                    time.sleep(0.001)
+            release.set()
+            for future in futures:
+                future.result()
+        self.assertEqual(order, [0, 3, 1, 2])
+
+    def test_max_qps(self):
+        client = Client(URL, concurrency_limit=ConcurrencyLimit(max_qps=50, burst=1))
+        start = time.time()
+        for i in range(6):
+            client.run(x=i)
+        self.assertGreaterEqual(time.time() - start, 0.09)
+        with self.assertRaises(ValueError):
+            ConcurrencyLimit(max_in_flight=0)
+
+
+class TestRequestCompression(unittest.TestCase):
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+        self.echo = self.router.post(f"{URL}/run").mock(
+            side_effect=lambda request: httpx.Response(
+                200,
+                json={
+                    "encoding": request.headers.get("content-encoding"),
+                    "size": len(request.content),
+                },
+            )
+        )
+
+    def tearDown(self):
+        self.router.stop()
+
+    def _advertise(self, accept_encoding: str = "gzip, zstd"):
+        self.router.get(f"{URL}/healthz").respond(
+            200, headers={"accept-encoding": accept_encoding}, json={}
+        )
+
+    def test_compresses_large_bodies_when_advertised(self):
+        self._advertise()
+        client = Client(URL, compression=RequestCompression(encoding="gzip"))
+        self.assertEqual(client.run(x=1)["encoding"], None)
+        result = client.run(x=1, text="lorem ipsum " * 10000)
+        self.assertEqual(result["encoding"], "gzip")
+        self.assertLess(result["size"], 10000)
+        body = json.loads(gzip.decompress(self.echo.calls.last.request.content))
+        self.assertEqual(body["text"], "lorem ipsum " * 10000)
+
+    def test_requires_advertised_encoding(self):
+        payload = {"x": 1, "text": "lorem ipsum " * 10000}
+        client = Client(URL, compression=RequestCompression(encoding="gzip"))
+        self.assertEqual(client.run(**payload)["encoding"], None)
+        compression = RequestCompression(encoding="gzip", require_advertised=False)
+        client = Client(URL, compression=compression)
+        self.assertEqual(client.run(**payload)["encoding"], "gzip")
+
+    def test_unsupported_media_type_falls_back(self):
+        self._advertise("gzip")
+
+        def run(request):
+            if request.headers.get("content-encoding"):
+                return httpx.Response(415)
+            return httpx.Response(200, json={"size": len(request.content)})
+
+        route = self.router.post(f"{URL}/run").mock(side_effect=run)
+        client = Client(URL, compression=RequestCompression(threshold=10))
+        payload = {"x": 1, "text": "lorem ipsum " * 100}
+        self.assertGreater(client.run(**payload)["size"], 1200)
+        client.run(**payload)
+        self.assertEqual(route.call_count, 3)
+
+    @unittest.skipIf(
+        importlib.util.find_spec("zstandard") is not None, "zstandard is installed"
+    )
+    def test_zstd_requires_zstandard(self):
+        with self.assertRaises(ImportError):
+            RequestCompression(encoding="zstd")
+        with self.assertRaises(ValueError):
+            RequestCompression(encoding="brotli")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+        self.transitions = []
+        self.breaker = CircuitBreaker(
+            failure_threshold=2,
+            recovery_timeout=0.05,
+            on_state_change=lambda old, new: self.transitions.append(new),
+        )
+
+    def tearDown(self):
+        self.router.stop()
+
+    def test_open_probe_and_close(self):
+        client = Client(URL, circuit_breaker=self.breaker)
+        run = self.router.post(f"{URL}/run")
+        run.respond(503)
+        for _ in range(2):
+            with self.assertRaises(httpx.HTTPStatusError):
+                client.run(x=1)
+        self.assertEqual(client.circuit_status()["state"], "open")
+        with self.assertRaises(CircuitOpenError):
+            client.run(x=1)
+        self.assertEqual(run.call_count, 2)
+        # healthz() fails fast as well.
+        self.assertFalse(client.healthz())
+
+        # A failed probe opens the circuit again, for twice as long.
+        healthz = self.router.get(f"{URL}/healthz")
+        healthz.respond(503)
+        self.router.get(f"{URL}/health").respond(503)
+        time.sleep(0.06)
+        with self.assertRaises(CircuitOpenError):
+            client.run(x=1)
+        self.assertEqual(run.call_count, 2)
+        self.assertGreater(client.circuit_status()["retry_in"], 0.06)
+
+        healthz.respond(200)
+        run.respond(200, json={"y": 2})
+        time.sleep(0.11)
+        self.assertEqual(client.run(x=1), {"y": 2})
+        self.assertEqual(client.circuit_status()["state"], "closed")
+        self.assertEqual(
+            self.transitions, ["open", "half_open", "open", "half_open", "closed"]
+        )
+
+    def test_connect_errors_and_successes(self):
+        client = Client(URL, circuit_breaker=self.breaker)
+        run = self.router.post(f"{URL}/run")
+        run.mock(
+            side_effect=[
+                httpx.ConnectError("refused"),
+                httpx.Response(200, json={"y": 2}),
+                httpx.ReadTimeout("slow"),
+                httpx.ConnectError("refused"),
+            ]
+        )
+        with self.assertRaises(httpx.ConnectError):
+            client.run(x=1)
+        # A success resets the count of consecutive failures.
+        client.run(x=1)
+        self.assertEqual(client.circuit_status()["failures"], 0)
+        with self.assertRaises(httpx.ReadTimeout):
+            client.run(x=1)
+        with self.assertRaises(httpx.ConnectError):
+            client.run(x=1)
+        self.assertEqual(client.circuit_status()["state"], "open")
+
+    def test_probe_is_not_retried(self):
+        retry = RetryPolicy(backoff_base=0.001)
+        client = Client(URL, retry=retry, circuit_breaker=self.breaker)
+        self.router.post(f"{URL}/run").respond(500)
+        for _ in range(2):
+            with self.assertRaises(httpx.HTTPStatusError):
+                client.run(x=1)
+        healthz = self.router.get(f"{URL}/healthz")
+        healthz.respond(503)
+        self.router.get(f"{URL}/health").respond(503)
+        calls = healthz.call_count
+        time.sleep(0.06)
+        with self.assertRaises(CircuitOpenError):
+            client.run(x=1)
+        # The probe skips the retries of the client, and has a timeout of its own.
+        self.assertEqual(healthz.call_count, calls + 1)
+        self.assertEqual(healthz.calls.last.request.extensions["timeout"]["read"], 5)
+
+    def test_async(self):
+        async def main():
+            async with AsyncClient(URL, circuit_breaker=self.breaker) as client:
+                self.router.post(f"{URL}/run").respond(500)
+                for _ in range(2):
+                    with self.assertRaises(httpx.HTTPStatusError):
+                        await client.run(x=1)
+                with self.assertRaises(CircuitOpenError):
+                    await client.run(x=1)
+                self.router.post(f"{URL}/run").respond(200, json={"y": 2})
+                await asyncio.sleep(0.06)
+                self.assertEqual(await client.run(x=1), {"y": 2})
+
+        asyncio.run(main())
+        self.assertEqual(self.transitions, ["open", "half_open", "closed"])
+
+    def test_without_breaker(self):
+        self.assertEqual(Client(URL).circuit_status()["state"], "closed")
+
+    def test_bounded_default_timeout(self):
+        client = Client(URL, circuit_breaker=self.breaker)
+        self.assertEqual(client._session.timeout.connect, 10.0)
+        self.assertEqual(client._session.timeout.read, 120.0)
+        # An explicit timeout of the caller wins.
+        client = Client(URL, timeout=3, circuit_breaker=self.breaker)
+        self.assertEqual(client._session.timeout.read, 3)
+
+
+class _SlowRunHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps(OPENAPI if self.path == "/openapi.json" else {}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(0.5)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCircuitBreakerTimeout(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowRunHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_read_timeout_opens_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=2, read_timeout=0.1)
+        client = Client(self.url, http2=False, circuit_breaker=breaker)
+        for _ in range(2):
+            with self.assertRaises(httpx.ReadTimeout):
+                client.run(x=1)
+        self.assertEqual(client.circuit_status()["state"], "open")
+        with self.assertRaises(CircuitOpenError):
+            client.run(x=1)
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"paths": {}} if self.path == "/openapi.json" else {})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class TestWarmup(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_warmup(self):
+        with Client(self.url, http2=False, stats=True) as client:
+            self.assertEqual(client.warmup(4), 4)
+            # The warm connections are reused by the next calls.
+            client.stats(reset=True)
+            for _ in range(8):
+                client.healthz()
+            stats = client.stats()["/healthz"]
+            self.assertEqual(stats["new_connections"], 0)
+            self.assertEqual(stats["connection_reuse_ratio"], 1.0)
+
+    def test_keepalive(self):
+        client = Client(self.url, http2=False, stats=True)
+        client.warmup(2, keepalive_interval=0.05)
+        time.sleep(0.3)
+        client.close()
+        self.assertIsNone(client._keepalive)
+        stats = client.stats()["/healthz"]
+        self.assertGreater(stats["requests"], 6)
+        self.assertEqual(stats["new_connections"], 2)
+
+    def test_keepalive_stops_when_client_is_collected(self):
+        client = Client(self.url, http2=False)
+        client.warmup(1, keepalive_interval=0.05)
+        keepalive = client._keepalive
+        del client
+        for _ in range(20):
+            gc.collect()
+            keepalive.join(0.1)
+            if not keepalive.is_alive():
+                break
+        self.assertFalse(keepalive.is_alive())
+
+    def test_async_warmup(self):
+        async def main():
+            async with AsyncClient(self.url, http2=False) as client:
+                self.assertEqual(await client.awarmup(3, keepalive_interval=0.05), 3)
+                await asyncio.sleep(0.2)
+                self.assertFalse(client._async_keepalive.done())
+            self.assertIsNone(client._async_keepalive)
+
+        asyncio.run(main())
+
+
+@unittest.skipIf(websocket_serve is None, "websockets is not installed")
+class TestWebSocket(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+
+        def echo(connection):
+            self.requests.append(connection.request)
+            for message in connection:
+                if isinstance(message, bytes):
+                    connection.send(message[::-1])
+                else:
+                    connection.send(message.upper())
+
+        self.server = websocket_serve(echo, "127.0.0.1", 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.socket.getsockname()[1]
+        openapi = {
+            "paths": {
+                "/listen": {"get": {"x-websocket": True}},
+                "/talk": {"get": {"responses": {"101": {}}}},
+            }
+        }
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        self.router.get(f"{self.url}/healthz").respond(200)
+        self.router.get(f"{self.url}/openapi.json").respond(200, json=openapi)
+
+    def tearDown(self):
+        self.router.stop()
+        self.server.shutdown()
+
+    def test_sync(self):
+        client = Client(self.url, token="secret")
+        self.assertEqual(sorted(client.paths()), ["/listen", "/talk"])
+        with client.listen(lang="en") as ws:
+            ws.send("hello")
+            self.assertEqual(ws.recv(timeout=5), "HELLO")
+            ws.send(b"\x00\x01\x02")
+            self.assertEqual(ws.recv(timeout=5), b"\x02\x01\x00")
+            ws.send({"a": 1})
+            self.assertEqual(ws.recv_json(timeout=5), {"A": 1})
+        request = self.requests[-1]
+        self.assertEqual(request.path, "/listen?lang=en")
+        self.assertEqual(request.headers["Authorization"], "Bearer secret")
+        with client.websocket("/talk", heartbeat=None) as ws:
+            ws.send("x")
+            self.assertEqual(next(iter(ws)), "X")
+
+    def test_async(self):
+        async def main():
+            async with AsyncClient(self.url, token="secret") as client:
+                async with client.talk() as ws:
+                    await ws.send(b"ab")
+                    self.assertEqual(await ws.recv(), b"ba")
+                ws = await client.websocket("/listen")
+                await ws.send("hi")
+                async for message in ws:
+                    self.assertEqual(message, "HI")
+                    break
+                await ws.aclose()
+
+        asyncio.run(main())
+        self.assertEqual(self.requests[0].headers["Authorization"], "Bearer secret")
+
+
+def _sse_chunks(*chunks) -> bytes:
+    return b"".join(b"data: " + json.dumps(c).encode() + b"\n\n" for c in chunks)
+
+
+_CHAT_STREAM = (
+    _sse_chunks(
+        {"model": "m", "choices": [{"delta": {"role": "assistant"}}]},
+        {"model": "m", "choices": [{"delta": {"content": "Hel"}}]},
+        {
+            "model": "m",
+            "choices": [{"delta": {"content": "lo"}, "finish_reason": "stop"}],
+        },
+        {"model": "m", "choices": [], "usage": {"prompt_tokens": 3}},
+    )
+    + b"data: [DONE]\n\n"
+)
+
+
+class TestOpenAICompatible(unittest.TestCase):
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+        self.router.get(f"{URL}/v1/models", name="models").respond(
+            200, json={"data": [{"id": "m"}, {"id": "other"}]}
+        )
+        self.bodies = []
+
+        def completions(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            self.bodies.append(body)
+            if body.get("max_tokens") == 0:
+                return httpx.Response(400, json={"error": "bad request"})
+            if not body["stream"]:
+                return httpx.Response(200, json={"choices": [{"text": "Hi"}]})
+            if request.url.path.endswith("/chat/completions"):
+                content = _CHAT_STREAM
+            else:
+                content = _sse_chunks(
+                    {"choices": [{"text": "a"}]}, {"choices": [{"text": "b"}]}
+                )
+            return httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, content=content
+            )
+
+        self.router.post(url__regex=rf"{URL}/v1/.*completions").mock(
+            side_effect=completions
+        )
+
+    def tearDown(self):
+        self.router.stop()
+
+    def test_chat_stream(self):
+        client = Client(URL, token="secret")
+        messages = [{"role": "user", "content": "Hi"}]
+        with client.chat(messages, max_tokens=8) as stream:
+            self.assertEqual(list(stream), ["Hel", "lo"])
+        self.assertEqual(stream.text, "Hello")
+        self.assertEqual(stream.finish_reason, "stop")
+        self.assertEqual(stream.usage, {"prompt_tokens": 3})
+        self.assertIsNotNone(stream.ttft)
+        self.assertEqual(len(stream.inter_token_latencies), 1)
+        self.assertGreaterEqual(stream.latency, stream.ttft)
+        self.assertEqual(stream.timing()["chunks"], 2)
+        self.assertEqual(
+            self.bodies[-1],
+            {"max_tokens": 8, "messages": messages, "model": "m", "stream": True},
+        )
+        request = self.router.calls.last.request
+        self.assertEqual(request.headers["authorization"], "Bearer secret")
+        # The default model is looked up once.
+        client.chat(messages, model="other").close()
+        client.chat(messages).close()
+        self.assertEqual(self.router["models"].call_count, 1)
+        self.assertEqual(self.bodies[-2]["model"], "other")
+
+    def test_complete(self):
+        client = Client(URL)
+        self.assertEqual("".join(client.complete("x", model="m")), "ab")
+        self.assertEqual(
+            client.complete("x", model="m", stream=False),
+            {"choices": [{"text": "Hi"}]},
+        )
+        self.assertEqual(self.bodies[-1]["prompt"], "x")
+
+    def test_path_from_openapi(self):
+        openapi = dict(OPENAPI, paths={"/api/v1/chat/completions": {"post": {}}})
+        self.router["openapi"].respond(200, json=openapi)
+        self.router.post(f"{URL}/api/v1/chat/completions").respond(
+            200, headers={"content-type": "text/event-stream"}, content=_CHAT_STREAM
+        )
+        client = Client(URL)
+        self.assertEqual("".join(client.chat([], model="m")), "Hello")
+
+    def test_error(self):
+        with self.assertRaisesRegex(httpx.HTTPStatusError, "bad request"):
+            Client(URL).chat([], model="m", max_tokens=0)
+
+    def test_workspace_token(self):
+        info = mock.Mock(auth_token="workspace-token")
+        with (
+            mock.patch("leptonai.client.WorkspaceRecord.get", return_value=info) as get,
+            mock.patch("leptonai.client.build_endpoint_url", return_value=URL),
+        ):
+            client = Client("ws", "llm")
+            get.assert_called_once_with("ws")
+            self.assertEqual(
+                client._session.headers["authorization"], "Bearer workspace-token"
+            )
+            client = Client("ws", "llm", token="explicit")
+            self.assertEqual(
+                client._session.headers["authorization"], "Bearer explicit"
+            )
+
+    def test_async_chat(self):
+        async def main():
+            async with AsyncClient(URL) as client:
+                stream = await client.chat([{"role": "user", "content": "Hi"}])
+                deltas = [delta async for delta in stream]
+                completion = await client.complete("x", stream=False)
+            return stream, deltas, completion
+
+        stream, deltas, completion = asyncio.run(main())
+        self.assertEqual(deltas, ["Hel", "lo"])
+        self.assertEqual(stream.usage, {"prompt_tokens": 3})
+        self.assertIsNotNone(stream.latency)
+        self.assertEqual(completion, {"choices": [{"text": "Hi"}]})
+
+
+class TestMultiEndpointClient(unittest.TestCase):
+    URL2 = "http://lepton-client-test-2.local"
+
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+        self.router.get(f"{self.URL2}/healthz").respond(200)
+        self.router.get(f"{self.URL2}/openapi.json").respond(200, json=OPENAPI)
+        self.run2 = self.router.post(f"{self.URL2}/run").respond(200, json={"y": -1})
+        self.router.post(f"{self.URL2}/generate").respond(
+            200,
+            headers={"content-type": "text/plain", "transfer-encoding": "chunked"},
+            content=b"hello world",
+        )
+
+    def tearDown(self):
+        self.router.stop()
+
+    def test_calls_are_spread_over_endpoints(self):
+        client = Client([URL, self.URL2], load_balancing="least_outstanding")
+        results = [client.run(x=1) for _ in range(40)]
+        self.assertIn({"y": 2}, results)
+        self.assertIn({"y": -1}, results)
+        status = client.endpoint_status()
+        self.assertEqual([s["url"] for s in status], [URL, self.URL2])
+        self.assertTrue(all(s["healthy"] and s["outstanding"] == 0 for s in status))
+
+    def test_unhealthy_endpoint_is_ejected_and_readmitted(self):
+        healthz2 = self.router.get(f"{self.URL2}/healthz").mock(
+            side_effect=httpx.ConnectError("down")
+        )
+        self.router.get(f"{self.URL2}/health").mock(
+            side_effect=httpx.ConnectError("down")
+        )
+        client = Client([URL, self.URL2])
+        self.assertFalse(client.endpoint_status()[1]["healthy"])
+        self.assertEqual([client.run(x=1) for _ in range(10)], [{"y": 2}] * 10)
+        self.assertFalse(self.run2.called)
+
+        # once the backoff expires, the endpoint is probed and re-admitted.
+        healthz2.mock(side_effect=None, return_value=httpx.Response(200))
+        client._endpoint_pool.endpoints[1].retry_at = 0
+        results = [client.run(x=1) for _ in range(40)]
+        self.assertTrue(client.endpoint_status()[1]["healthy"])
+        self.assertIn({"y": -1}, results)
+
+    def test_connect_error_fails_over(self):
+        client = Client([URL, self.URL2])
+        self.run2.mock(side_effect=httpx.ConnectError("down"))
+        self.assertEqual([client.run(x=1) for _ in range(10)], [{"y": 2}] * 10)
+        self.assertFalse(client.endpoint_status()[1]["healthy"])
+
+    def test_streaming_releases_outstanding(self):
+        client = Client([URL, self.URL2], stream=True)
+        generator = client.generate()
+        self.assertEqual(sum(s["outstanding"] for s in client.endpoint_status()), 1)
+        self.assertEqual(b"".join(generator), b"hello world")
+        self.assertEqual(sum(s["outstanding"] for s in client.endpoint_status()), 0)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+
+    def tearDown(self):
+        self.router.stop()
+
+    def test_retry_honors_retry_after(self):
+        route = self.router.post(f"{URL}/run")
+        route.side_effect = [
+            httpx.Response(429, headers={"retry-after": "0"}),
+            httpx.Response(503),
+            httpx.Response(200, json={"y": 2}),
+        ]
+        client = Client(URL, retry=RetryPolicy(backoff_base=0.001))
+        self.assertEqual(client.run(x=1), {"y": 2})
+        self.assertEqual(route.call_count, 3)
+
+    def test_retry_after_beyond_backoff_max_is_not_retried(self):
+        route = self.router.post(f"{URL}/run")
+        route.side_effect = [httpx.Response(429, headers={"retry-after": "3600"})]
+        client = Client(URL, retry=RetryPolicy(), no_check=True)
+        with self.assertRaises(httpx.HTTPStatusError):
+            client.run(x=1)
+        self.assertEqual(route.call_count, 1)
+
+    def test_retry_stops_at_deadline(self):
+        route = self.router.post(f"{URL}/run")
+        route.side_effect = [httpx.Response(503, headers={"retry-after": "0.2"})] * 5
+        client = Client(URL, retry=RetryPolicy(deadline=0.3), no_check=True)
+        with self.assertRaises(httpx.HTTPStatusError):
+            client.run(x=1)
+        self.assertEqual(route.call_count, 2)
+
+    def test_only_idempotent_calls_retry_gateway_errors(self):
+        route = self.router.post(f"{URL}/run")
+        route.side_effect = [httpx.Response(502), httpx.Response(200, json={})]
+        client = Client(URL, retry=RetryPolicy(backoff_base=0.001))
+        with self.assertRaises(httpx.HTTPStatusError):
+            client.run(x=1)
+        route.side_effect = [httpx.Response(502), httpx.Response(200, json={})]
+        client = Client(
+            URL, retry=RetryPolicy(backoff_base=0.001, idempotent_paths=["run"])
+        )
+        self.assertEqual(client.run(x=1), {})
+
+    def test_hedged_request_wins_over_slow_one(self):
+        calls = []
+
+        def run(request):
+            calls.append(request)
+            if len(calls) == 2:
+                # the first call after warm up is slow, and should be hedged.
+                time.sleep(1)
+            return httpx.Response(200, json={"n": len(calls)})
+
+        self.router.post(f"{URL}/run").mock(side_effect=run)
+        policy = RetryPolicy(idempotent_paths=["/run"], hedge=True, hedge_min_samples=1)
+        client = Client(URL, retry=policy)
+        self.assertEqual(client.run(x=1), {"n": 1})
+        start = time.time()
+        self.assertEqual(client.run(x=1), {"n": 3})
+        self.assertLess(time.time() - start, 0.9)
+
+    def test_hedging_does_not_queue_beyond_the_connection_limit(self):
+        calls = []
+
+        def run(request):
+            calls.append(request)
+            if len(calls) > 1:
+                time.sleep(0.3)
+            return httpx.Response(200, json={})
+
+        self.router.post(f"{URL}/run").mock(side_effect=run)
+        policy = RetryPolicy(idempotent_paths=["/run"], hedge=True, hedge_min_samples=1)
+        client = Client(URL, retry=policy, limits=httpx.Limits(max_connections=2))
+        client.run(x=1)
+        start = time.time()
+        # 8 callers share 2 hedging workers: the calls that find no free worker
+        # are sent right away without hedging, instead of queueing.
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: client.run(x=1), range(8)))
+        self.assertEqual(results, [{}] * 8)
+        self.assertLess(time.time() - start, 0.6)
+        self.assertLessEqual(len(calls), 1 + 8 + 2)
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.router = respx.mock(assert_all_called=False)
+        self.router.start()
+        _mock_deployment(self.router)
+
+    def tearDown(self):
+        self.router.stop()
+
+    async def test_methods_are_awaitable(self):
+        async with AsyncClient(URL) as client:
+            self.assertTrue(asyncio.iscoroutinefunction(client.run))
+            self.assertEqual(await client.run(x=21), {"y": 42})
+            self.assertEqual(await client.info(verbose=False), {"verbose": "false"})
+            self.assertTrue(await client.ahealthz())
+
+    async def test_concurrent_calls(self):
+        async with AsyncClient(URL) as client:
+            results = await asyncio.gather(*(client.run(x=i) for i in range(200)))
+        self.assertEqual(results, [{"y": i * 2} for i in range(200)])
+
+    async def test_map(self):
+        async with AsyncClient(URL) as client:
+            inputs = ({"x": i} for i in range(50))
+            results = [r async for r in client.map("run", inputs, concurrency=8)]
+            self.assertEqual(results, [{"y": i * 2} for i in range(50)])
+            inputs = [{"x": 1}, {}, {"x": 3}]
+            results = [r async for r in client.map("run", inputs, ordered=False)]
+            results.sort(key=lambda r: r[0])
+            self.assertEqual(results[0], (0, {"y": 2}))
+            self.assertIsInstance(results[1][1], Exception)
+            self.assertEqual(results[2], (2, {"y": 6}))
+
+    async def test_binary_arguments_are_streamed(self):
+        raw = self.router.post(f"{URL}/raw").respond(200, json="ok")
+        async with AsyncClient(URL) as client:
+            self.assertEqual(await client.raw(data=io.BytesIO(b"x" * 10)), "ok")
+        request = raw.calls.last.request
+        self.assertEqual(request.headers["content-type"], "application/octet-stream")
+        self.assertEqual(await request.aread(), b"x" * 10)
+
+    async def test_stats(self):
+        records = []
+        async with AsyncClient(URL, stats=True, stats_callback=records.append) as c:
+            await asyncio.gather(*(c.run(x=i) for i in range(10)))
+            self.assertEqual(c.stats()["/run"]["requests"], 10)
+        self.assertEqual(len([r for r in records if r.path == "/run"]), 10)
+
+    async def test_out(self):
+        body = b"x" * 100000
+        self.router.post(f"{URL}/render").respond(200, content=body)
+        buffer = bytearray()
+        async with AsyncClient(URL) as client:
+            self.assertEqual((await client.render(_out=buffer))["bytes"], len(body))
+            self.router.post(f"{URL}/render").respond(500, json={"error": "oops"})
+            with self.assertRaises(httpx.HTTPStatusError):
+                await client.render(_out=bytearray())
+        self.assertEqual(buffer, body)
+
+    async def test_cache(self):
+        route = self.router.get(f"{URL}/info").respond(
+            200, headers={"cache-control": "max-age=60"}, json={"n": 1}
+        )
+        async with AsyncClient(URL, cache=ResponseCache()) as client:
+            self.assertEqual(await client.info(), {"n": 1})
+            self.assertEqual(await client.info(), {"n": 1})
+        self.assertEqual(route.call_count, 1)
+
+    async def test_concurrency_limit(self):
+        order = []
+        release = asyncio.Event()
+
+        async def run(request):
+            order.append(json.loads(request.content)["x"])
+            if len(order) == 1:
+                await release.wait()
+            return httpx.Response(200, json={})
+
+        self.router.post(f"{URL}/run").mock(side_effect=run)
+        limit = ConcurrencyLimit(max_in_flight=1)
+        async with AsyncClient(URL, concurrency_limit=limit) as client:
+            tasks = [asyncio.ensure_future(client.run(x=0))]
+            await asyncio.sleep(0.01)
+            tasks.append(asyncio.ensure_future(client.run(x=1)))
+            tasks.append(asyncio.ensure_future(client.run(x=2, _priority=5)))
+            cancelled = asyncio.ensure_future(client.run(x=3, _priority=9))
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            await asyncio.sleep(0.01)
+            release.set()
+            await asyncio.gather(*tasks)
+        self.assertEqual(order, [0, 2, 1])
+
+    async def test_compression_in_worker_thread(self):
+        self.router.get(f"{URL}/healthz").respond(
+            200, headers={"accept-encoding": "gzip"}, json={}
+        )
+        route = self.router.post(f"{URL}/run").respond(200, json={})
+        compression = RequestCompression(threshold=1, thread_threshold=1)
+        async with AsyncClient(URL, compression=compression) as client:
+            await client.run(x=1)
+        request = route.calls.last.request
+        self.assertEqual(request.headers["content-encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(request.content)), {"x": 1})
+
+    async def test_multiple_endpoints(self):
+        url2 = "http://lepton-client-test-2.local"
+        self.router.get(f"{url2}/healthz").respond(200)
+        self.router.get(f"{url2}/openapi.json").respond(200, json=OPENAPI)
+        self.router.post(f"{url2}/run").respond(200, json={"y": -1})
+        async with AsyncClient([URL, url2]) as client:
+            results = await asyncio.gather(*(client.run(x=1) for _ in range(40)))
+            self.assertIn({"y": 2}, results)
+            self.assertIn({"y": -1}, results)
+            self.assertTrue(await client.ahealthz())
+
+    async def test_retry_and_hedge(self):
+        calls = []
+
+        async def run(request):
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"retry-after": "0"})
+            if len(calls) == 3:
+                await asyncio.sleep(1)
+            return httpx.Response(200, json={"n": len(calls)})
+
+        self.router.post(f"{URL}/run").mock(side_effect=run)
+        policy = RetryPolicy(idempotent_paths=["run"], hedge=True, hedge_min_samples=1)
+        async with AsyncClient(URL, retry=policy) as client:
+            self.assertEqual(await client.run(x=1), {"n": 2})
+            start = time.time()
+            self.assertEqual(await client.run(x=1), {"n": 4})
+            self.assertLess(time.time() - start, 0.9)
+
+    async def test_stream_decoder(self):
+        self.router.post(f"{URL}/lines").respond(
+            200,
+            headers={"content-type": "application/x-ndjson"},
+            content=b'{"i": 0}\n{"i": 1}',
+        )
+        async with AsyncClient(URL, stream=True, stream_decoder="ndjson") as client:
+            res = await client._apost("lines")
+            lines = await client._aget_proper_res_content(res)
+            self.assertEqual([line async for line in lines], [{"i": 0}, {"i": 1}])
+
+    async def test_streaming_returns_async_generator(self):
+        async with AsyncClient(URL, stream=True) as client:
+            chunks = [chunk async for chunk in await client.generate()]
+            self.assertEqual(b"".join(chunks), b"hello world")
+            # json responses are still returned lump sum when streaming.
+            self.assertEqual(await client.run(x=1), {"y": 2})
+
+    async def test_error_status_raises(self):
+        self.router.post(f"{URL}/run").respond(500, json={"error": "boom"})
+        async with AsyncClient(URL) as client:
+            with self.assertRaises(httpx.HTTPStatusError) as cm:
+                await client.run(x=1)
+        self.assertIn("boom", str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
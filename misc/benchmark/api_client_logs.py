@@ -0,0 +1,148 @@
+"""
+Measures the throughput of `lep log get` style log downloads, which fetch many
+time windows from worker threads, when every window creates its own APIClient
+(the previous behavior) and when all the threads share one APIClient.
+
+The logs are served by a local server, which waits --connect-delay seconds on
+every new connection to stand in for the tcp and tls handshakes to a remote
+workspace, and --latency seconds on every request. It needs no workspace:
+
+    python api_client_logs.py --windows 512 --workers 8,32 --lines 2000
+
+Each line of the output table reports the windows and log lines fetched per
+second, and the number of connections opened, for one (mode, workers) pair.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from rich.console import Console
+from rich.table import Table
+
+from leptonai.api.v2.client import APIClient
+from leptonai.cli.log import fetch_all_within_time_slot
+
+# Nanoseconds between two log lines, and the timestamp of the first line.
+_STEP = 1000
+_EPOCH = 1_700_000_000 * 10**9
+
+
+def _make_server(connect_delay, latency):
+    connections = [0]
+    lock = threading.Lock()
+
+    class _LogHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with lock:
+                connections[0] += 1
+            time.sleep(connect_delay)
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            start, end = int(query["start"][0]), int(query["end"][0])
+            limit = int(query["limit"][0])
+            # The lines in [start, end), newest first, like the log api.
+            last = (end - 1) // _STEP * _STEP
+            first = max(start + (-start) % _STEP, last - (limit - 1) * _STEP)
+            values = [[str(ts), f"line {ts}"] for ts in range(last, first - 1, -_STEP)]
+            time.sleep(latency)
+            body = json.dumps({"data": {"result": [{"values": values}]}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _LogHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, connections
+
+
+def run(url, shared, windows, lines, workers):
+    def new_client():
+        return APIClient(
+            "ws", "token", url=url, workspace_origin_url="http://127.0.0.1"
+        )
+
+    client = new_client() if shared else None
+    results = [[] for _ in range(windows)]
+
+    def fetch(index):
+        start = _EPOCH + index * lines * _STEP
+        fetch_all_within_time_slot(
+            client if shared else new_client(),
+            "deployment",
+            None,
+            None,
+            None,
+            "",
+            start,
+            start + lines * _STEP,
+            results[index],
+        )
+
+    st = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fetch, range(windows)))
+    return time.time() - st, sum(len(r) for r in results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, default=512, help="time windows")
+    parser.add_argument(
+        "--lines", type=int, default=2000, help="log lines per time window"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=str,
+        default="8,32",
+        help="worker threads, use comma to separate multiple values",
+    )
+    parser.add_argument(
+        "--connect-delay",
+        type=float,
+        default=0.03,
+        help="seconds the server waits on every new connection",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="seconds the server waits on every request",
+    )
+    args = parser.parse_args()
+
+    table = Table(show_header=True, header_style="bold magenta")
+    for column in ("Client", "Workers", "Windows/s", "Lines/s", "Connections"):
+        table.add_column(column)
+
+    for workers in [int(w) for w in args.workers.split(",")]:
+        for shared in (False, True):
+            server, connections = _make_server(args.connect_delay, args.latency)
+            url = f"http://127.0.0.1:{server.server_address[1]}/api/v2"
+            elapsed, fetched = run(url, shared, args.windows, args.lines, workers)
+            server.shutdown()
+            server.server_close()
+            table.add_row(
+                "shared" if shared else "per window",
+                str(workers),
+                f"{args.windows / elapsed:.1f}",
+                f"{fetched / elapsed:.0f}",
+                str(connections[0]),
+            )
+
+    Console().print(table)
@@ -0,0 +1,126 @@
+"""
+Measures how fast `APIResourse.ensure_list` turns a list response into models,
+such as the `LeptonJob`s of `lep job list --include-archived`, compared with the
+previous path that decoded the body with `response.json()` and validated the
+items one by one with `EnsuredType(**raw)`.
+
+The responses are built locally, so it needs no workspace:
+
+    python api_ensure_list.py --items 1000,10000,100000
+
+"invalid" lists have one invalid item in every thousand, which makes
+ensure_list fall back to validating the items one by one.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from requests import Response
+from rich.console import Console
+from rich.table import Table
+
+from leptonai.api.v2.api_resource import APIResourse
+from leptonai.api.v2.types.job import LeptonJob
+
+
+def _job(i):
+    return {
+        "metadata": {
+            "id": f"job-{i}",
+            "name": f"job-{i}",
+            "created_at": 1700000000000 + i,
+            "owner": "user",
+            "version": 3,
+        },
+        "spec": {
+            "resource_shape": "gpu.8xh100-80gb",
+            "completions": 4,
+            "parallelism": 4,
+            "container": {
+                "image": "nvcr.io/nvidia/pytorch:24.01-py3",
+                "command": ["bash", "-c", "torchrun train.py"],
+            },
+            "envs": [{"name": "EPOCHS", "value": "10"}],
+            "affinity": {"allowed_dedicated_node_groups": ["ng-1"]},
+        },
+        "status": {
+            "state": "Completed",
+            "succeeded": 4,
+            "creation_time": 1700000000,
+            "completion_time": 1700003600,
+        },
+    }
+
+
+def _response(count, invalid, list_key):
+    items = [_job(i) for i in range(count)]
+    if invalid:
+        for i in range(0, count, 1000):
+            items[i] = {"metadata": None}
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps({list_key: items} if list_key else items).encode()
+    return response
+
+
+def _per_item(response, list_key):
+    # The previous implementation of ensure_list, without the error report.
+    data = response.json()
+    items_raw = data.get(list_key, data) if list_key else data
+    valid_items = []
+    for raw in items_raw:
+        try:
+            valid_items.append(LeptonJob(**raw))
+        except Exception:
+            pass
+    return valid_items
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--items",
+        type=str,
+        default="1000,10000,100000",
+        help="list sizes, use comma to separate multiple values",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case")
+    args = parser.parse_args()
+
+    api = APIResourse.__new__(APIResourse)
+    table = Table(show_header=True, header_style="bold magenta")
+    for column in ("Items", "List", "Per item (s)", "ensure_list (s)", "Speedup"):
+        table.add_column(column)
+
+    for count in [int(n) for n in args.items.split(",")]:
+        for invalid, list_key in ((False, None), (False, "jobs"), (True, None)):
+            response = _response(count, invalid, list_key)
+            old = _best(lambda: _per_item(response, list_key), args.repeat)
+            # The skipped items are reported on stderr, which is not shown.
+            with contextlib.redirect_stderr(io.StringIO()):
+                new = _best(
+                    lambda: api.ensure_list(response, LeptonJob, list_key=list_key),
+                    args.repeat,
+                )
+            kind = (
+                "invalid"
+                if invalid
+                else (f"under {list_key!r}" if list_key else "body")
+            )
+            table.add_row(
+                str(count), kind, f"{old:.3f}", f"{new:.3f}", f"{old / new:.2f}x"
+            )
+
+    Console().print(table)
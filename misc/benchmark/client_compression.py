@@ -0,0 +1,106 @@
+"""
+Measures the bytes saved and the latency tradeoff of compressing request bodies
+with leptonai.client.RequestCompression, on payloads typical for deployments:
+embedding batches, long chat histories and token id batches.
+
+Usage:
+    python client_compression.py --scale 1,10 --bandwidth 100,1000
+
+Each line of the output table reports, for one payload and coding, the
+compression ratio and time, and the net latency change when sending the body
+over a link of the given bandwidth (negative is faster). zstd is included if
+the zstandard package is installed. No server is needed.
+"""
+
+import argparse
+import random
+import timeit
+
+from rich.console import Console
+from rich.table import Table
+
+from leptonai._internal.client_compression import compress, zstandard
+from leptonai._internal.client_encoding import _encode_json_body
+
+
+def _payloads(scale: int):
+    random.seed(0)
+    words = ["the", "model", "token", "prompt", "deployment", "lepton", "of", "a"]
+    return {
+        "embedding batch": {
+            "inputs": [[random.random() for _ in range(768)] for _ in range(8 * scale)]
+        },
+        "chat history": {
+            "messages": [
+                {
+                    "role": "user" if i % 2 else "assistant",
+                    "content": " ".join(random.choices(words, k=200)),
+                }
+                for i in range(20 * scale)
+            ]
+        },
+        "token ids": {
+            "input_ids": [
+                [random.randrange(32000) for _ in range(512)] for _ in range(4 * scale)
+            ]
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scale",
+        type=str,
+        default="1,10",
+        help="payload sizes, use comma to separate multiple values",
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=str,
+        default="100,1000",
+        help="link bandwidths in Mbit/s, use comma to separate multiple values",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="compressions per measurement"
+    )
+    args = parser.parse_args()
+
+    bandwidths = [float(b) for b in args.bandwidth.split(",")]
+    codings = [("gzip", 1), ("gzip", 6)]
+    if zstandard is not None:
+        codings += [("zstd", 3), ("zstd", 9)]
+
+    table = Table(show_header=True, header_style="bold magenta")
+    for column in ["Payload", "Scale", "Size(KB)", "Coding", "Ratio", "Time(ms)"]:
+        table.add_column(column)
+    for bandwidth in bandwidths:
+        table.add_column(f"Net@{bandwidth:g}Mbps(ms)")
+
+    for scale in [int(s) for s in args.scale.split(",")]:
+        for name, payload in _payloads(scale).items():
+            body = _encode_json_body(payload)
+            for encoding, level in codings:
+                compressed = compress(body, encoding, level)
+                elapsed = (
+                    timeit.timeit(
+                        lambda: compress(body, encoding, level), number=args.repeat
+                    )
+                    / args.repeat
+                )
+                saved_bits = (len(body) - len(compressed)) * 8
+                deltas = [
+                    f"{(elapsed - saved_bits / (b * 1e6)) * 1000:+.2f}"
+                    for b in bandwidths
+                ]
+                table.add_row(
+                    name,
+                    str(scale),
+                    f"{len(body) / 1024:.1f}",
+                    f"{encoding}-{level}",
+                    f"{len(body) / len(compressed):.2f}",
+                    f"{elapsed * 1000:.2f}",
+                    *deltas,
+                )
+
+    Console().print(table)
@@ -0,0 +1,123 @@
+"""
+Measures the throughput of leptonai.client.Client and AsyncClient when calling a
+deployment endpoint at different concurrency levels, with and without http2.
+
+Usage:
+    python client_concurrency.py \
+      --url https://my-deployment-url \
+      --token WORKSPACE_TOKEN \
+      --path run \
+      --payload '{"x": 1}' \
+      --concurrency 1,16,256 \
+      --requests 1024
+
+Each line of the output table reports the requests per second and the latency
+percentiles for one (client, http version, concurrency) combination.
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+
+import httpx
+from rich.console import Console
+from rich.table import Table
+
+from leptonai.client import AsyncClient, Client
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_sync(client, path, payload, concurrency, num_requests):
+    method = getattr(client, path)
+
+    def call(_):
+        st = time.time()
+        method(**payload)
+        return time.time() - st
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # warm up the connection pool so that connection setup is not counted
+        # towards throughput.
+        list(executor.map(call, range(concurrency)))
+        st = time.time()
+        latencies = list(executor.map(call, range(num_requests)))
+        return time.time() - st, latencies
+
+
+def run_async(client, path, payload, concurrency, num_requests):
+    method = getattr(client, path)
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with semaphore:
+                st = time.time()
+                await method(**payload)
+                return time.time() - st
+
+        # warm up within the same event loop, as pooled async connections are
+        # bound to the loop that created them.
+        await asyncio.gather(*(call() for _ in range(concurrency)))
+        st = time.time()
+        latencies = await asyncio.gather(*(call() for _ in range(num_requests)))
+        elapsed = time.time() - st
+        await client.aclose()
+        return elapsed, latencies
+
+    return asyncio.run(main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", type=str, required=True, help="deployment url")
+    parser.add_argument("--token", type=str, default=None, help="auth token")
+    parser.add_argument("--path", type=str, default="run", help="endpoint to call")
+    parser.add_argument(
+        "--payload", type=str, default="{}", help="json kwargs passed to the endpoint"
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=str,
+        default="1,16,256",
+        help="concurrency levels, use comma to separate multiple values",
+    )
+    parser.add_argument(
+        "-n", "--requests", type=int, default=1024, help="requests per measurement"
+    )
+    args = parser.parse_args()
+
+    payload = json.loads(args.payload)
+    table = Table(show_header=True, header_style="bold magenta")
+    for column in ("Client", "HTTP", "Concurrency", "QPS", "P50(s)", "P99(s)"):
+        table.add_column(column)
+
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        limits = httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+        for http2 in (False, True):
+            for client_cls, runner in ((Client, run_sync), (AsyncClient, run_async)):
+                client = client_cls(
+                    args.url, token=args.token, http2=http2, limits=limits
+                )
+                elapsed, latencies = runner(
+                    client, args.path, payload, concurrency, args.requests
+                )
+                table.add_row(
+                    client_cls.__name__,
+                    "2" if http2 else "1.1",
+                    str(concurrency),
+                    f"{args.requests / elapsed:.1f}",
+                    f"{_percentile(latencies, 0.5):.3f}",
+                    f"{_percentile(latencies, 0.99):.3f}",
+                )
+
+    Console().print(table)
@@ -0,0 +1,116 @@
+"""
+Compares the request body encoding of leptonai.client.Client with the previous
+`json.dumps(jsonable_encoder(kwargs))` path, on payloads typical for deployments:
+embedding batches, long chat histories, pydantic models and files.
+
+Usage:
+    python client_encoding.py --scale 1,10,100 --repeat 20
+
+Each line of the output table reports the time to encode one payload with each
+path, and the speedup of the new path. numpy payloads are included if numpy is
+installed; jsonable_encoder cannot encode numpy arrays, so its baseline is
+measured on the equivalent python lists.
+"""
+
+import argparse
+import json
+import random
+import timeit
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from rich.console import Console
+from rich.table import Table
+
+from leptonai._internal.client_encoding import _encode_json_body
+from leptonai.types import File
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Message(BaseModel):
+    role: str
+    content: str
+
+
+class ChatRequest(BaseModel):
+    model: str
+    messages: List[Message]
+    temperature: float = 0.7
+
+
+def _payloads(scale: int):
+    random.seed(0)
+    embeddings = [[random.random() for _ in range(768)] for _ in range(8 * scale)]
+    history = [
+        {"role": "user" if i % 2 else "assistant", "content": "lorem ipsum " * 40}
+        for i in range(20 * scale)
+    ]
+    payloads = {
+        "embedding batch": ({"inputs": embeddings}, None),
+        "chat history (dicts)": ({"messages": history}, None),
+        "chat history (pydantic)": (
+            {
+                "request": ChatRequest(
+                    model="llama", messages=[Message(**m) for m in history]
+                )
+            },
+            None,
+        ),
+        "files": (
+            {"images": [File(random.randbytes(64 * 1024)) for _ in range(scale)]},
+            None,
+        ),
+    }
+    if np is not None:
+        array = np.asarray(embeddings, dtype=np.float32)
+        payloads["embedding batch (numpy)"] = (
+            {"inputs": array},
+            {"inputs": array.tolist()},
+        )
+    return payloads
+
+
+def _baseline(payload):
+    return json.dumps(jsonable_encoder(payload)).encode("utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scale",
+        type=str,
+        default="1,10,100",
+        help="payload sizes, use comma to separate multiple values",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="encodings per measurement"
+    )
+    args = parser.parse_args()
+
+    table = Table(show_header=True, header_style="bold magenta")
+    for column in ("Payload", "Scale", "Size(KB)", "Baseline(ms)", "Fast(ms)", "x"):
+        table.add_column(column)
+
+    for scale in [int(s) for s in args.scale.split(",")]:
+        for name, (payload, baseline_payload) in _payloads(scale).items():
+            baseline_payload = baseline_payload or payload
+            size = len(_encode_json_body(payload))
+            baseline = timeit.timeit(
+                lambda: _baseline(baseline_payload), number=args.repeat
+            )
+            fast = timeit.timeit(lambda: _encode_json_body(payload), number=args.repeat)
+            table.add_row(
+                name,
+                str(scale),
+                f"{size / 1024:.1f}",
+                f"{baseline / args.repeat * 1000:.2f}",
+                f"{fast / args.repeat * 1000:.2f}",
+                f"{baseline / fast:.1f}",
+            )
+
+    Console().print(table)
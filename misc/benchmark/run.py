@@ -12,8 +12,8 @@ from rich.table import Table
 import sys
 import threading
 import time
+from urllib.parse import urlsplit
 
-import openai
 from num2words import num2words
 import pandas as pd
 
@@ -65,7 +65,40 @@ async def endpoint_evaluation_request(client, ep_config):
     try:
         st = time.time()
         ttft = None
-        if args.use_chat:
+        if args.client == "lepton":
+            # The leptonai client streams the deltas over its own connection pool,
+            # and records the time to first token itself.
+            kwargs = dict(
+                model=ep_config["model"],
+                max_tokens=args.max_tokens,
+                temperature=0,
+                stream_options={"include_usage": True},
+            )
+            if args.use_chat:
+                stream = await client.chat(
+                    [{"role": "user", "content": prompt}],
+                    path=ep_config["api_prefix"] + "/chat/completions",
+                    **kwargs,
+                )
+            else:
+                stream = await client.complete(
+                    prompt, path=ep_config["api_prefix"] + "/completions", **kwargs
+                )
+            num_deltas = 0
+            async for delta in stream:
+                words += delta
+                num_deltas += 1
+            ttft = stream.ttft
+            ep_config["model"] = ep_config["model"] or stream.model
+            if stream.usage is not None:
+                tokens_in = stream.usage["prompt_tokens"]
+                tokens_out = stream.usage["completion_tokens"]
+            else:
+                # The server sent no usage chunk: each delta is roughly one token,
+                # and the prompt tokens are unknown.
+                tokens_in = None
+                tokens_out = num_deltas
+        elif args.use_chat:
             messages = [
                 {"role": "user", "content": prompt},
             ]
@@ -173,12 +206,26 @@ def endpoint_evaluation_qps(client, ep_config, results_queue, stop_event):
 
 
 def endpoint_evaluation(ep_config):
-    client = openai.AsyncOpenAI(
-        base_url=ep_config["api_base"], api_key=ep_config["api_key"]
-    )
     loop = asyncio.new_event_loop()
+    if args.client == "lepton":
+        from leptonai.client import AsyncClient
+
+        url = urlsplit(ep_config["api_base"])
+        ep_config["api_prefix"] = url.path.rstrip("/")
+        client = AsyncClient(
+            f"{url.scheme}://{url.netloc}",
+            token=ep_config["api_key"],
+            skip_healthz=True,
+            no_check=True,
+        )
+    else:
+        import openai
+
+        client = openai.AsyncOpenAI(
+            base_url=ep_config["api_base"], api_key=ep_config["api_key"]
+        )
 
-    if ep_config["model"] is None:
+    if ep_config["model"] is None and args.client == "openai":
 
         async def get_model():
             async for model in client.models.list():
@@ -285,7 +332,9 @@ def results_analysis(
             json_record = {}
 
         cdf["tokens_per_s"] = cdf.tokens_out / cdf.total_time
-        mean_tokens_in = int(cdf["tokens_in"].mean())
+        # The prompt tokens are unknown if the server reported no usage.
+        mean_tokens_in = cdf["tokens_in"].mean()
+        mean_tokens_in = None if pd.isna(mean_tokens_in) else int(mean_tokens_in)
         mean_tokens_out = int(cdf["tokens_out"].mean())
 
         s_per_output_token = (cdf["total_time"] - cdf["ttft"]) / (cdf["tokens_out"] - 1)
@@ -434,6 +483,16 @@ if __name__ == "__main__":
         default="a" * 32,
         help="API key",
     )
+    parser.add_argument(
+        "--client",
+        type=str,
+        choices=["lepton", "openai"],
+        default="lepton",
+        help=(
+            "Client to send the requests with: leptonai.client.AsyncClient, or the"
+            " openai sdk for comparison"
+        ),
+    )
     parser.add_argument(
         "--validate",
         action="store_true",